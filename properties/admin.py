@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
     Property, PropertyConfiguration, PropertyImage, PropertyAmenity,
-    SharedPropertyList, UserProfile,  AirtableSyncLog
+    SharedPropertyList, UserProfile,  AirtableSyncLog, AirtableSyncState, BackgroundJob, PropertyPDFExport
 )
 
 
@@ -51,8 +51,15 @@ class PropertyAdmin(admin.ModelAdmin):
         'created_at', 
         'updated_at',
         'get_primary_image_preview',
-        'get_min_price',
-        'get_max_bedrooms'
+        'min_price',
+        'max_price',
+        'min_bedrooms',
+        'max_bedrooms',
+        'min_bathrooms',
+        'max_bathrooms',
+        'configuration_count',
+        'image_count',
+        'amenity_count',
     ]
     prepopulated_fields = {'slug': ('name',)}
     inlines = [PropertyConfigurationInline, PropertyImageInline, PropertyAmenityInline]
@@ -75,7 +82,12 @@ class PropertyAdmin(admin.ModelAdmin):
             'fields': ('is_active', 'luxury_status')
         }),
         ('Property Stats', {
-            'fields': ('get_min_price', 'get_max_bedrooms'),
+            'fields': (
+                ('min_price', 'max_price'),
+                ('min_bedrooms', 'max_bedrooms'),
+                ('min_bathrooms', 'max_bathrooms'),
+                ('configuration_count', 'image_count', 'amenity_count'),
+            ),
             'classes': ('collapse',)
         }),
         ('Sync Information', {
@@ -89,19 +101,20 @@ class PropertyAdmin(admin.ModelAdmin):
     )
 
     def get_configuration_count(self, obj):
-        return obj.configurations.count()
+        return obj.configuration_count
     get_configuration_count.short_description = 'Configs'
+    get_configuration_count.admin_order_field = 'configuration_count'
 
     def get_image_count(self, obj):
-        return obj.images.count()
+        return obj.image_count
     get_image_count.short_description = 'Images'
+    get_image_count.admin_order_field = 'image_count'
 
     def get_primary_image_preview(self, obj):
-        primary_image = obj.get_primary_image()
-        if primary_image and primary_image.image:
+        if obj.primary_image:
             return format_html(
                 '<img src="{}" style="max-height: 100px; max-width: 200px;" />',
-                primary_image.image.url
+                obj.primary_image_url
             )
         return "No primary image"
     get_primary_image_preview.short_description = 'Primary Image Preview'
@@ -245,14 +258,20 @@ try:
         list_display = [
             'sync_type', 
             'status', 
+            'phase',
             'started_at', 
             'duration_display', 
             'total_records_processed', 
+            'records_per_second',
             'errors_count',
             'dry_run'
         ]
+        change_list_template = 'admin/properties/airtablesynclog/change_list.html'
+        chart_runs = 30
         list_filter = ['sync_type', 'status', 'dry_run', 'started_at']
         readonly_fields = [
+            'job',
+            'phase',
             'started_at', 
             'completed_at',
             'duration_display', 
@@ -260,16 +279,24 @@ try:
             'properties_processed',
             'configurations_processed',
             'images_processed',
-            'amenities_processed'
+            'amenities_processed',
+            'phase_timings',
+            'records_per_second',
+            'bytes_downloaded',
+            'http_requests',
+            'http_retries',
         ]
         search_fields = ['notes']
         
         fieldsets = (
             ('Sync Details', {
-                'fields': ('sync_type', 'status', 'dry_run', 'files_downloaded')
+                'fields': ('sync_type', 'status', 'phase', 'job', 'dry_run', 'files_downloaded')
             }),
             ('Timing', {
-                'fields': ('started_at', 'completed_at', 'duration_display')
+                'fields': ('started_at', 'completed_at', 'duration_display', 'phase_timings')
+            }),
+            ('Throughput', {
+                'fields': ('records_per_second', 'bytes_downloaded', 'http_requests', 'http_retries')
             }),
             ('Statistics', {
                 'fields': (
@@ -309,11 +336,53 @@ try:
             return obj.total_records_processed()
         total_records_processed.short_description = 'Total Records'
 
+        def changelist_view(self, request, extra_context=None):
+            extra_context = extra_context or {}
+            extra_context['sync_chart'] = self.chart_data()
+            return super().changelist_view(request, extra_context=extra_context)
+
+        def chart_data(self):
+            """Duration, throughput and per-phase timings of recent finished runs, oldest first"""
+            runs = list(
+                AirtableSyncLog.objects.filter(completed_at__isnull=False, dry_run=False)
+                .order_by('-started_at')[:self.chart_runs]
+            )[::-1]
+            phases = sorted({phase for run in runs for phase in (run.phase_timings or {})})
+            return {
+                'labels': [f"#{run.pk} {run.sync_type}" for run in runs],
+                'duration': [round(run.duration().total_seconds(), 1) for run in runs],
+                'records_per_second': [run.records_per_second for run in runs],
+                'phases': {
+                    phase: [(run.phase_timings or {}).get(phase, 0) for run in runs]
+                    for phase in phases
+                },
+            }
+
 except ImportError:
     # AirtableSyncLog model doesn't exist yet
     pass
 
 
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "created_by", "created_at", "started_at", "finished_at")
+    list_filter = ("name", "status")
+    readonly_fields = ("created_at", "started_at", "finished_at", "error")
+
+
+@admin.register(PropertyPDFExport)
+class PropertyPDFExportAdmin(admin.ModelAdmin):
+    list_display = ("id", "format", "shared_list", "total", "rendered", "file_size", "created_by", "created_at", "completed_at")
+    list_filter = ("format",)
+    readonly_fields = ("job", "property_ids", "total", "rendered", "file_path", "file_size", "created_at", "completed_at")
+
+
+@admin.register(AirtableSyncState)
+class AirtableSyncStateAdmin(admin.ModelAdmin):
+    list_display = ("table", "last_modified_at", "last_synced_at", "last_reconciled_at", "records_synced")
+    readonly_fields = ("updated_at",)
+
+
 @admin.register(SharedPropertyList)
 class SharedPropertyListAdmin(admin.ModelAdmin):
     list_display = ("name", "created_by", "created_at", "expires_at", "is_active", "view_count")
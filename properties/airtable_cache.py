@@ -0,0 +1,190 @@
+import logging
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+
+from .cache import persistent_cache
+from .locks import FileLock
+from .snapshots import build_airtable_data
+
+logger = logging.getLogger(__name__)
+
+AIRTABLE_DATA_KEY = 'airtable_data'
+REFRESH_LOCK_NAME = 'airtable_data'
+
+
+def _options():
+    options = {'SOFT_TTL': 15 * 60, 'HARD_TTL': 24 * 60 * 60, 'LOCK_TIMEOUT': 30}
+    options.update(getattr(settings, 'AIRTABLE_CACHE_SETTINGS', {}))
+    return options
+
+
+def empty_airtable_data():
+    return index_airtable_data({'properties': [], 'configurations': [], 'images': [], 'amenities': []})
+
+
+def get_property_min_price(configurations):
+    """
+    Get the minimum price from property configurations
+    """
+    if not configurations:
+        return None
+    
+    prices = []
+    for config in configurations:
+        if config.get('price') and config.get('is_available', True):
+            try:
+                # Handle Decimal objects
+                if isinstance(config['price'], Decimal):
+                    prices.append(float(config['price']))
+                elif isinstance(config['price'], (int, float)):
+                    prices.append(float(config['price']))
+                elif isinstance(config['price'], str):
+                    # Try to convert string to float, removing any currency symbols
+                    clean_price = config['price'].replace('₦', '').replace(',', '').strip()
+                    if clean_price and clean_price.replace('.', '').isdigit():
+                        prices.append(float(clean_price))
+            except (ValueError, TypeError):
+                continue
+    
+    return min(prices) if prices else None
+
+
+def group_by_property(configurations, images, amenities):
+    """
+    Group child rows under their property's Airtable id in one pass, e.g.
+    {'recXXX': {'configurations': [...], 'images': [...], 'amenities': [...], 'min_price': 1.0}}
+    Images are sorted by order.
+    """
+    grouped = {}
+
+    def related(property_id):
+        if property_id not in grouped:
+            grouped[property_id] = {'configurations': [], 'images': [], 'amenities': [], 'min_price': None}
+        return grouped[property_id]
+
+    for config in configurations:
+        related(config['property_id'])['configurations'].append(config)
+    for image in images:
+        related(image['property_id'])['images'].append(image)
+    for amenity in amenities:
+        related(amenity['property_id'])['amenities'].append(amenity)
+
+    for entry in grouped.values():
+        entry['images'].sort(key=lambda image: image.get('order', 0))
+        entry['min_price'] = get_property_min_price(entry['configurations'])
+    return grouped
+
+
+def no_related():
+    return {'configurations': [], 'images': [], 'amenities': [], 'min_price': None}
+
+
+def index_airtable_data(data):
+    """
+    Add lookup indexes to airtable_data so readers never scan the lists:
+    'property_index' maps an Airtable id to its property and 'by_property'
+    holds its children (see group_by_property). Already indexed data is
+    returned unchanged. A 'version' token is added for caches derived from it.
+    """
+    if 'by_property' in data and 'property_index' in data:
+        return data
+    # Identifies this payload to caches of derived data, e.g. the filter index
+    data.setdefault('version', uuid.uuid4().hex)
+    data['property_index'] = {prop['airtable_id']: prop for prop in data.get('properties', [])}
+    data['by_property'] = group_by_property(
+        data.get('configurations', []), data.get('images', []), data.get('amenities', [])
+    )
+    return data
+
+
+def store_airtable_data(data, soft_ttl=None):
+    """
+    Cache data in an envelope recording when it stops being fresh.
+    The entry itself lives for HARD_TTL so it can still be served stale.
+    """
+    options = _options()
+    soft_ttl = options['SOFT_TTL'] if soft_ttl is None else soft_ttl
+    envelope = {'data': index_airtable_data(data), 'fresh_until': time.time() + soft_ttl}
+    persistent_cache.set(AIRTABLE_DATA_KEY, envelope, timeout=options['HARD_TTL'])
+
+
+def get_envelope():
+    """The cached airtable_data envelope (see store_airtable_data), or None"""
+    return persistent_cache.get(AIRTABLE_DATA_KEY)
+
+
+def is_fresh(envelope):
+    return bool(envelope) and time.time() < envelope['fresh_until']
+
+
+def refresh_airtable_data(soft_ttl=None):
+    """
+    Rebuild airtable_data from the synced tables and cache it.
+    Requests never crawl Airtable; if nothing has been synced yet a sync
+    job is queued for the worker instead.
+    """
+    data = build_airtable_data()
+    if not data['properties']:
+        from .jobs import enqueue
+        job, created = enqueue('sync_airtable', dedupe_key='sync_airtable')
+        if created:
+            logger.info(f"No synced properties, queued {job}")
+    store_airtable_data(data, soft_ttl)
+    return data
+
+
+def _refresh_in_background():
+    """Start a refresh unless another thread or process is already running one"""
+    lock = FileLock(REFRESH_LOCK_NAME)
+    if not lock.acquire(blocking=False):
+        return
+
+    def run():
+        try:
+            envelope = get_envelope()
+            # Another worker may have refreshed while we were starting
+            if not is_fresh(envelope):
+                refresh_airtable_data()
+        except Exception as e:
+            logger.error(f"Background airtable_data refresh failed: {e}")
+        finally:
+            lock.release()
+            connection.close()
+
+    threading.Thread(target=run, name='airtable-data-refresh', daemon=True).start()
+
+
+def get_airtable_data():
+    """
+    Return the cached Airtable data, with the indexes from index_airtable_data.
+    Fresh entries are returned as-is. Entries past their soft TTL are still
+    returned while a single background refresh runs. On a miss one caller
+    rebuilds the entry and concurrent callers wait for it instead of each
+    doing the same work.
+    """
+    envelope = get_envelope()
+    if envelope:
+        if not is_fresh(envelope):
+            _refresh_in_background()
+        # Entries cached before the indexes existed are indexed on read
+        return index_airtable_data(envelope['data'])
+
+    lock = FileLock(REFRESH_LOCK_NAME)
+    if not lock.acquire(timeout=_options()['LOCK_TIMEOUT']):
+        logger.warning("Timed out waiting for the airtable_data refresh")
+        return empty_airtable_data()
+    try:
+        envelope = get_envelope()
+        if envelope:
+            return index_airtable_data(envelope['data'])
+        return refresh_airtable_data()
+    except Exception as e:
+        logger.error(f"Failed to refresh Airtable data: {e}")
+        return empty_airtable_data()
+    finally:
+        lock.release()
@@ -0,0 +1,6 @@
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+# Long-lived entries (API snapshots, airtable_data, the search vocabulary)
+# live in their own cache, so culling of short-lived entries never evicts them
+persistent_cache = ConnectionProxy(caches, 'persistent')
@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadTask:
+    """
+    A remote file to be stored on `field` of the model row `pk`.
+    fingerprint identifies the source attachment so unchanged files can be
+    skipped next time.
+    """
+
+    def __init__(self, model, pk, field, filename, url, label='', fingerprint=''):
+        self.model = model
+        self.pk = pk
+        self.field = field
+        self.filename = filename
+        self.url = url
+        self.label = label
+        self.fingerprint = fingerprint
+
+    @property
+    def host(self):
+        return urlsplit(self.url).netloc
+
+
+def build_session(pool_size, retries, backoff_factor):
+    """Session with connection pooling and retry/backoff on transient errors"""
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET']),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class MediaDownloader:
+    """
+    Download many files concurrently over one pooled session.
+    A worker pool bounds total concurrency and a semaphore per host stops a
+    single CDN from receiving every connection at once.
+    """
+
+    def __init__(self, max_workers=None, per_host_limit=None, retries=None,
+                 backoff_factor=None, timeout=None, progress_every=None):
+        options = getattr(settings, 'DOWNLOAD_SETTINGS', {})
+        self.max_workers = max_workers or options.get('MAX_WORKERS', 8)
+        self.per_host_limit = per_host_limit or options.get('PER_HOST_LIMIT', 4)
+        self.timeout = timeout or options.get('REQUEST_TIMEOUT', 30)
+        self.progress_every = progress_every or options.get('PROGRESS_EVERY', 25)
+        # Downloaded bodies waiting for the consumer are held in memory, so
+        # only this many downloads are submitted or unconsumed at a time
+        self.max_in_flight = options.get('MAX_IN_FLIGHT') or self.max_workers * 2
+        self.session = build_session(
+            self.max_workers,
+            retries if retries is not None else options.get('RETRIES', 3),
+            backoff_factor if backoff_factor is not None else options.get('BACKOFF_FACTOR', 0.5),
+        )
+        self._host_locks = defaultdict(lambda: threading.BoundedSemaphore(self.per_host_limit))
+        self._host_locks_lock = threading.Lock()
+
+        self.completed = 0
+        self.failed = 0
+        self.bytes_downloaded = 0
+        self.requests = 0
+        self.retries = 0
+        self._counter_lock = threading.Lock()
+
+    def _host_semaphore(self, host):
+        with self._host_locks_lock:
+            return self._host_locks[host]
+
+    def fetch(self, url):
+        """Return the body of `url`, or None if it could not be downloaded"""
+        with self._host_semaphore(urlsplit(url).netloc):
+            response = None
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+                response.raise_for_status()
+                return response.content
+            except requests.RequestException as e:
+                logger.warning(f"Download failed for {url}: {e}")
+                return None
+            finally:
+                self._count_request(response)
+
+    def _count_request(self, response):
+        """Count a GET and the retries urllib3 made behind it"""
+        retry = getattr(getattr(response, 'raw', None), 'retries', None)
+        with self._counter_lock:
+            self.requests += 1
+            self.retries += len(retry.history) if retry is not None else 0
+
+    def download_all(self, tasks):
+        """
+        Download every task and yield (task, content) as each finishes.
+        content is None for failed downloads. At most max_in_flight downloads
+        are pending at once, and a body is released as soon as it is yielded.
+        A progress line is printed every `progress_every` files and a
+        throughput summary at the end.
+        """
+        tasks = list(tasks)
+        total = len(tasks)
+        if not total:
+            return
+
+        started = time.monotonic()
+        print(f"📥 Downloading {total} files ({self.max_workers} workers, {self.per_host_limit} per host)...")
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='media') as executor:
+            pending_tasks = iter(tasks)
+            futures = {executor.submit(self.fetch, task.url): task for task in islice(pending_tasks, self.max_in_flight)}
+            while futures:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    task = futures.pop(future)
+                    content = future.result()
+                    if content is None:
+                        self.failed += 1
+                    else:
+                        self.completed += 1
+                        self.bytes_downloaded += len(content)
+
+                    done = self.completed + self.failed
+                    if done % self.progress_every == 0 and done < total:
+                        self.report(done, total, started)
+                    yield task, content
+                    del content
+                    # Refill only after the consumer has handled the body
+                    for next_task in islice(pending_tasks, 1):
+                        futures[executor.submit(self.fetch, next_task.url)] = next_task
+
+        self.report(total, total, started)
+
+    def report(self, done, total, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        megabytes = self.bytes_downloaded / (1024 * 1024)
+        print(
+            f"📊 {done}/{total} files, {self.failed} failed, {megabytes:.1f} MB "
+            f"in {elapsed:.1f}s ({done / elapsed:.1f} files/s, {megabytes / elapsed:.2f} MB/s)"
+        )
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,147 @@
+import logging
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+import django
+from django.db import connections
+from django.utils import timezone
+
+from .models import Property, PropertyPDFExport
+from .pdf import PropertyPDFGenerator, cached_pdf, pdf_data_version, pdf_settings
+
+try:
+    from pypdf import PdfWriter
+except ImportError:  # in requirements.txt; without it merged exports are laid out in one document
+    PdfWriter = None
+
+logger = logging.getLogger(__name__)
+
+
+def render_property_pdf(property_id):
+    """
+    Path of the cached PDF of one property, rendering it if needed.
+    Runs in the export process pool, so it only takes and returns plain values.
+    """
+    prop = Property.objects.prefetch_related('configurations', 'amenities').get(pk=property_id)
+    version, _ = pdf_data_version([property_id])
+    return cached_pdf('property', [property_id], version,
+                      lambda f: PropertyPDFGenerator().generate_property_pdf(prop, output=f))
+
+
+def render_property_pdfs(property_ids, on_progress=None):
+    """
+    {property id: PDF path} for every property, rendered by a pool of
+    EXPORT_WORKERS processes (in this process when it is 1).
+    on_progress(count) is called as each PDF becomes available.
+    """
+    workers = min(pdf_settings()['EXPORT_WORKERS'], len(property_ids))
+    paths = {}
+    if workers <= 1:
+        for property_id in property_ids:
+            paths[property_id] = render_property_pdf(property_id)
+            if on_progress:
+                on_progress(len(paths))
+        return paths
+
+    # Forked workers must open their own database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+        futures = {executor.submit(render_property_pdf, property_id): property_id for property_id in property_ids}
+        for future in as_completed(futures):
+            paths[futures[future]] = future.result()
+            if on_progress:
+                on_progress(len(paths))
+    return paths
+
+
+def _write_zip(f, export, paths):
+    slugs = dict(Property.objects.filter(pk__in=paths).values_list('pk', 'slug'))
+    # PDFs are already compressed, so store them as-is
+    with zipfile.ZipFile(f, 'w', zipfile.ZIP_STORED) as archive:
+        for property_id in export.property_ids:
+            if property_id in paths:
+                archive.write(paths[property_id], f"{slugs.get(property_id) or property_id}-details.pdf")
+
+
+def _write_merged(f, export, paths):
+    writer = PdfWriter()
+    for property_id in export.property_ids:
+        if property_id in paths:
+            writer.append(paths[property_id])
+    writer.write(f)
+
+
+def prune_pdf_exports(max_age=None):
+    """
+    Delete export files older than EXPORT_MAX_AGE seconds (max_age), along
+    with temporary files left by a worker that died. The exports then
+    report 'expired'. Returns the number of files removed.
+    """
+    options = pdf_settings()
+    max_age = options['EXPORT_MAX_AGE'] if max_age is None else max_age
+    root = options['EXPORT_ROOT']
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(root):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    PropertyPDFExport.objects.filter(
+        completed_at__lt=timezone.now() - timedelta(seconds=max_age)
+    ).exclude(file_path='').update(file_path='')
+    return removed
+
+
+def run_pdf_export(export):
+    """Render every property of the export and write the ZIP or merged PDF"""
+    prune_pdf_exports()
+    ids = set(Property.objects.filter(pk__in=export.property_ids).values_list('pk', flat=True))
+    export.property_ids = [property_id for property_id in export.property_ids if property_id in ids]
+    export.total = len(export.property_ids)
+    export.save(update_fields=['property_ids', 'total'])
+
+    def progress(count):
+        PropertyPDFExport.objects.filter(pk=export.pk).update(rendered=count)
+
+    root = pdf_settings()['EXPORT_ROOT']
+    os.makedirs(root, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=root, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if export.format == 'pdf' and PdfWriter is None:
+                properties = Property.objects.filter(pk__in=export.property_ids).prefetch_related(
+                    'configurations', 'amenities'
+                ).in_bulk()
+                PropertyPDFGenerator().generate_properties_pdf(
+                    [properties[property_id] for property_id in export.property_ids],
+                    on_property=progress, output=f,
+                )
+            else:
+                paths = render_property_pdfs(export.property_ids, on_progress=progress)
+                if export.format == 'pdf':
+                    _write_merged(f, export, paths)
+                else:
+                    _write_zip(f, export, paths)
+        path = os.path.join(root, f"export-{export.pk}.{export.format}")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    export.file_path = path
+    export.file_size = os.path.getsize(path)
+    export.rendered = export.total
+    export.completed_at = timezone.now()
+    export.save(update_fields=['file_path', 'file_size', 'rendered', 'completed_at'])
+    logger.info(f"{export} written to {path} ({export.file_size} bytes)")
+    return export
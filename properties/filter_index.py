@@ -0,0 +1,299 @@
+import math
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from decimal import Decimal
+
+try:
+    import numpy as np
+except ImportError:  # in requirements.txt; the pure-Python columns give the same results, slower
+    np = None
+
+NAN = float('nan')
+# Search text of each property is joined with this, so no match can span two
+SEPARATOR = '\x00'
+_INDEX_CACHE_SIZE = 2
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def parse_price(value):
+    """Price of a configuration as a float, or None if missing or unparsable"""
+    if not value:
+        return None
+    try:
+        if isinstance(value, (Decimal, int, float)):
+            return float(value)
+        if isinstance(value, str):
+            clean_price = value.replace('₦', '').replace(',', '').strip()
+            if clean_price and clean_price.replace('.', '').isdigit():
+                return float(clean_price)
+    except (ValueError, TypeError):
+        pass
+    return None
+
+
+def _parse_int(value):
+    """int(value) for ints and numeric strings, else None"""
+    if isinstance(value, (int, str)):
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            pass
+    return None
+
+
+def _bound(value, cast):
+    """A filter bound from a request value; empty or invalid values mean no bound"""
+    if not value:
+        return None
+    try:
+        return cast(value)
+    except (ValueError, TypeError):
+        return None
+
+
+class FilterIndex:
+    """
+    Columnar index over property dicts and their configurations, built once
+    so price, bedroom/bathroom and text filters are array operations rather
+    than a walk over every dict. Filters return boolean masks over
+    properties that can be combined with & and passed to select().
+    Uses numpy arrays, falling back to Python lists when numpy is missing.
+    """
+
+    def __init__(self, properties, configurations_for=None):
+        configurations_for = configurations_for or (lambda prop: prop.get('configurations') or [])
+        self.properties = list(properties)
+
+        owners, prices, available, bedrooms, bathrooms = [], [], [], [], []
+        texts, has_configurations = [], []
+        for position, prop in enumerate(self.properties):
+            configurations = configurations_for(prop)
+            has_configurations.append(bool(configurations))
+            for config in configurations:
+                is_available = bool(config.get('is_available', True))
+                price = parse_price(config.get('price')) if is_available else None
+                owners.append(position)
+                available.append(is_available)
+                prices.append(NAN if price is None else price)
+                bedrooms.append(_parse_int(config.get('bedrooms')))
+                bathrooms.append(_parse_int(config.get('bathrooms')))
+            texts.append(' '.join([
+                (prop.get('name') or '').lower(),
+                (prop.get('address') or '').lower(),
+                (prop.get('description') or '').lower(),
+            ]).replace(SEPARATOR, ' '))
+
+        # One string for the whole catalog; offsets map a match back to its property
+        self.text = SEPARATOR.join(texts)
+        self.offsets = []
+        position = 0
+        for text in texts:
+            self.offsets.append(position)
+            position += len(text) + 1
+
+        self.size = len(self.properties)
+        self.owner = self._column(owners, int)
+        self.price = self._column(prices, float)
+        # Missing counts compare as 0 in filters but are left out of range stats
+        self.bedrooms = self._column([value or 0 for value in bedrooms], int)
+        self.bathrooms = self._column([value or 0 for value in bathrooms], int)
+        self.bedroom_valid = self._column([value is not None for value in bedrooms], bool)
+        self.bathroom_valid = self._column([value is not None for value in bathrooms], bool)
+        self.available = self._column(available, bool)
+        self.has_configurations = self._column(has_configurations, bool)
+
+        # Per-property price spans drive the price filter
+        prop_min = [math.inf] * self.size
+        prop_max = [-math.inf] * self.size
+        for owner, price in zip(owners, prices):
+            if price == price:  # not NaN
+                prop_min[owner] = min(prop_min[owner], price)
+                prop_max[owner] = max(prop_max[owner], price)
+        self.prop_min_price = self._column(prop_min, float)
+        self.prop_max_price = self._column(prop_max, float)
+        self.has_price = self._column([value != math.inf for value in prop_min], bool)
+
+        self._ranges = self._format_ranges(
+            [price for price in prices if price == price],
+            [value for value in bedrooms if value is not None],
+            [value for value in bathrooms if value is not None],
+        )
+
+    @staticmethod
+    def _column(values, dtype):
+        if np is not None:
+            return np.array(values, dtype=dtype)
+        return values
+
+    def everything(self):
+        """Mask selecting every property"""
+        if np is not None:
+            return np.ones(self.size, dtype=bool)
+        return [True] * self.size
+
+    def nothing(self):
+        if np is not None:
+            return np.zeros(self.size, dtype=bool)
+        return [False] * self.size
+
+    @staticmethod
+    def combine(*masks):
+        """Properties selected by every mask"""
+        result = masks[0]
+        for mask in masks[1:]:
+            if np is not None:
+                result = result & mask
+            else:
+                result = [a and b for a, b in zip(result, mask)]
+        return result
+
+    def select(self, mask):
+        """The property dicts selected by mask, in index order"""
+        if np is not None:
+            return [self.properties[i] for i in np.flatnonzero(mask)]
+        return [prop for prop, keep in zip(self.properties, mask) if keep]
+
+    def search(self, query):
+        """Properties whose name, address or description contains query (case-insensitive)"""
+        query = (query or '').lower()
+        if not query:
+            return self.everything()
+        mask = self.nothing()
+        if SEPARATOR in query:
+            return mask
+        start = self.text.find(query)
+        while start != -1:
+            position = bisect_right(self.offsets, start) - 1
+            mask[position] = True
+            # Skip the rest of this property's text
+            start = self.text.find(query, self.offsets[position + 1] if position + 1 < self.size else len(self.text))
+        return mask
+
+    def price_range(self, min_price=None, max_price=None):
+        """
+        Properties with an available configuration price overlapping the
+        range. Properties without prices only match when no bound is given.
+        """
+        if not min_price and not max_price:
+            return self.everything()
+        low, high = _bound(min_price, float), _bound(max_price, float)
+        if np is not None:
+            mask = self.has_price.copy()
+            if low is not None:
+                mask &= self.prop_max_price >= low
+            if high is not None:
+                mask &= self.prop_min_price <= high
+            return mask
+        return [
+            has_price and (low is None or prop_max >= low) and (high is None or prop_min <= high)
+            for has_price, prop_min, prop_max in zip(self.has_price, self.prop_min_price, self.prop_max_price)
+        ]
+
+    def rooms(self, min_bedrooms=None, max_bedrooms=None, min_bathrooms=None, max_bathrooms=None):
+        """
+        Properties with an available configuration inside every given
+        bedroom/bathroom bound. Properties without configurations only
+        match when no bound is given.
+        """
+        bounds = [
+            (self.bedrooms, _bound(min_bedrooms, int), _bound(max_bedrooms, int)),
+            (self.bathrooms, _bound(min_bathrooms, int), _bound(max_bathrooms, int)),
+        ]
+        filtered = any([min_bedrooms, max_bedrooms, min_bathrooms, max_bathrooms])
+
+        if np is not None:
+            matching = self.available.copy()
+            for column, low, high in bounds:
+                if low is not None:
+                    matching &= column >= low
+                if high is not None:
+                    matching &= column <= high
+            mask = np.zeros(self.size, dtype=bool)
+            mask[self.owner[matching]] = True
+            if not filtered:
+                mask |= ~self.has_configurations
+            return mask
+
+        mask = [not filtered and not has_configurations for has_configurations in self.has_configurations]
+        for i, owner in enumerate(self.owner):
+            if mask[owner] or not self.available[i]:
+                continue
+            if all((low is None or column[i] >= low) and (high is None or column[i] <= high)
+                   for column, low, high in bounds):
+                mask[owner] = True
+        return mask
+
+    def filter(self, search=None, min_price=None, max_price=None, min_bedrooms=None,
+               max_bedrooms=None, min_bathrooms=None, max_bathrooms=None):
+        """Property dicts matching every given filter"""
+        return self.select(self.combine(
+            self.search(search),
+            self.price_range(min_price, max_price),
+            self.rooms(min_bedrooms, max_bedrooms, min_bathrooms, max_bathrooms),
+        ))
+
+    def ranges(self, mask=None):
+        """
+        Price/bedroom/bathroom ranges for the filter form. Without a mask the
+        ranges of the whole index are returned, computed once at build time.
+        """
+        if mask is None:
+            return self._ranges
+        if np is not None:
+            selected = mask[self.owner] if len(self.owner) else np.zeros(0, dtype=bool)
+            prices = self.price[selected & ~np.isnan(self.price)]
+            return self._format_ranges(
+                prices, self.bedrooms[selected & self.bedroom_valid],
+                self.bathrooms[selected & self.bathroom_valid],
+            )
+        selected = [mask[owner] for owner in self.owner]
+        return self._format_ranges(
+            [p for p, keep in zip(self.price, selected) if keep and p == p],
+            [b for b, keep, valid in zip(self.bedrooms, selected, self.bedroom_valid) if keep and valid],
+            [b for b, keep, valid in zip(self.bathrooms, selected, self.bathroom_valid) if keep and valid],
+        )
+
+    @staticmethod
+    def _format_ranges(prices, bedrooms, bathrooms):
+        def bounds(values, cast):
+            if len(values) == 0:
+                return None, None
+            if np is not None:
+                return cast(np.min(values)), cast(np.max(values))
+            return cast(min(values)), cast(max(values))
+
+        min_price, max_price = bounds(prices, float)
+        min_bedrooms, max_bedrooms = bounds(bedrooms, int)
+        min_bathrooms, max_bathrooms = bounds(bathrooms, int)
+        return {
+            'price_range': {'min_price': min_price, 'max_price': max_price},
+            'bedroom_range': {'min_bedrooms': min_bedrooms, 'max_bedrooms': max_bedrooms},
+            'bathroom_range': {'min_bathrooms': min_bathrooms, 'max_bathrooms': max_bathrooms},
+        }
+
+
+def get_filter_index(airtable_data):
+    """
+    FilterIndex over the properties of the cached airtable_data, built once
+    per cached version and reused by later requests.
+    """
+    version = airtable_data.get('version')
+    with _indexes_lock:
+        index = _indexes.get(version) if version else None
+        if index is not None:
+            _indexes.move_to_end(version)
+            return index
+
+    by_property = airtable_data.get('by_property', {})
+    index = FilterIndex(
+        airtable_data.get('properties', []),
+        configurations_for=lambda prop: by_property.get(prop['airtable_id'], {}).get('configurations', []),
+    )
+    if version:
+        with _indexes_lock:
+            _indexes[version] = index
+            while len(_indexes) > _INDEX_CACHE_SIZE:
+                _indexes.popitem(last=False)
+    return index
@@ -0,0 +1,118 @@
+import math
+
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Leaflet zoom level -> geohash length used to group markers into clusters
+_ZOOM_PRECISION = (
+    (2, 1),
+    (5, 2),
+    (7, 3),
+    (10, 4),
+    (12, 5),
+    (14, 6),
+)
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate pair as a geohash string"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    latitude = float(latitude)
+    longitude = float(longitude)
+
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits = bits << 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def geohash_cell_size(precision):
+    """Return the (height, width) of a geohash cell in degrees"""
+    lat_bits = (5 * precision) // 2
+    lng_bits = 5 * precision - lat_bits
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def zoom_to_precision(zoom):
+    """Geohash precision used for clustering at a given map zoom"""
+    for max_zoom, precision in _ZOOM_PRECISION:
+        if zoom <= max_zoom:
+            return precision
+    return _ZOOM_PRECISION[-1][1]
+
+
+def geohash_cover(south, west, north, east, max_precision=GEOHASH_PRECISION, max_cells=16):
+    """
+    Return geohash prefixes that together cover a bounding box.
+    Picks the finest precision (up to max_precision) that needs at most
+    max_cells prefixes, so callers can turn the box into a few index ranges.
+    """
+    south, north = max(south, -90.0), min(north, 90.0)
+    west, east = max(west, -180.0), min(east, 180.0)
+    if south > north or west > east:
+        return []
+
+    precision = 1
+    for candidate in range(max_precision, 0, -1):
+        height, width = geohash_cell_size(candidate)
+        rows = math.floor(north / height) - math.floor(south / height) + 1
+        cols = math.floor(east / width) - math.floor(west / width) + 1
+        if rows * cols <= max_cells:
+            precision = candidate
+            break
+
+    height, width = geohash_cell_size(precision)
+    cells = set()
+    lat = south
+    while True:
+        lng = west
+        while True:
+            cells.add(encode_geohash(min(lat, 90.0 - 1e-9), min(lng, 180.0 - 1e-9), precision))
+            if lng >= east:
+                break
+            lng = min(lng + width, east)
+        if lat >= north:
+            break
+        lat = min(lat + height, north)
+    return sorted(cells)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    """Bounding box (south, west, north, east) enclosing a circle"""
+    latitude = float(latitude)
+    longitude = float(longitude)
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    lng_delta = 180.0 if cos_lat < 1e-6 else min(180.0, lat_delta / cos_lat)
+    return (
+        max(-90.0, latitude - lat_delta),
+        max(-180.0, longitude - lng_delta),
+        min(90.0, latitude + lat_delta),
+        min(180.0, longitude + lng_delta),
+    )
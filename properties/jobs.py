@@ -0,0 +1,173 @@
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BackgroundJob, PropertyPDFExport
+
+logger = logging.getLogger(__name__)
+
+JOB_HANDLERS = {}
+
+
+def _options():
+    options = {'HEARTBEAT_INTERVAL': 60, 'STALE_AFTER': 10 * 60}
+    options.update(getattr(settings, 'JOB_SETTINGS', {}))
+    return options
+
+
+def stale_after():
+    """How long a running job may go without a heartbeat before it is failed"""
+    return timedelta(seconds=_options()['STALE_AFTER'])
+
+
+def job_handler(name):
+    """Register a function as the handler for jobs called `name`"""
+    def register(func):
+        JOB_HANDLERS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, dedupe_key=None, created_by=None, **kwargs):
+    """
+    Queue a job and return (job, created).
+    If a job with the same dedupe_key is already queued or running, that job
+    is returned instead and nothing new is queued.
+    """
+    if name not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job: {name}")
+    try:
+        with transaction.atomic():
+            job = BackgroundJob.objects.create(
+                name=name, kwargs=kwargs, dedupe_key=dedupe_key, created_by=created_by
+            )
+        return job, True
+    except IntegrityError:
+        existing = BackgroundJob.objects.filter(
+            dedupe_key=dedupe_key, status__in=BackgroundJob.ACTIVE_STATUSES
+        ).first()
+        if existing is None:
+            # The active job finished between our insert and this lookup
+            return enqueue(name, dedupe_key=dedupe_key, created_by=created_by, **kwargs)
+        return existing, False
+
+
+def claim_next_job():
+    """
+    Atomically move the oldest queued job to running and return it.
+    The conditional UPDATE means two workers can never claim the same job.
+    """
+    while True:
+        job = BackgroundJob.objects.filter(status='queued').order_by('created_at', 'pk').first()
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = BackgroundJob.objects.filter(pk=job.pk, status='queued').update(
+            status='running', started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            job.status = 'running'
+            job.started_at = job.heartbeat_at = now
+            return job
+
+
+class Heartbeat:
+    """
+    Record a heartbeat for a running job every `interval` seconds from a
+    background thread, so fail_stale_jobs can tell a long job from a lost one.
+    """
+
+    def __init__(self, job, interval):
+        self.job = job
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'job-{job.pk}-heartbeat', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    BackgroundJob.objects.filter(pk=self.job.pk, status='running').update(
+                        heartbeat_at=timezone.now()
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not record heartbeat for {self.job}: {e}")
+        finally:
+            connection.close()
+
+
+def run_job(job):
+    """Run a claimed job and record how it finished"""
+    handler = JOB_HANDLERS.get(job.name)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler registered for job {job.name}")
+        with Heartbeat(job, _options()['HEARTBEAT_INTERVAL']):
+            handler(job, **job.kwargs)
+    except Exception as e:
+        logger.error(f"Job {job} failed: {e}")
+        job.status = 'failed'
+        job.error = traceback.format_exc()
+    else:
+        job.status = 'completed'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    return job
+
+
+def fail_stale_jobs(max_age=None):
+    """
+    Mark running jobs without a heartbeat for max_age (default: stale_after())
+    as failed, e.g. after a worker was killed, so their dedupe_key can be
+    queued again. Jobs that are merely slow keep beating and are left alone.
+    """
+    cutoff = timezone.now() - (stale_after() if max_age is None else max_age)
+    lost = Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    return BackgroundJob.objects.filter(lost, status='running').update(
+        status='failed', finished_at=timezone.now(), error='Worker stopped before the job finished'
+    )
+
+
+@job_handler('sync_airtable')
+def run_sync_airtable(job, **options):
+    call_command('sync_airtable', job_id=job.pk, **options)
+
+
+@job_handler('build_renditions')
+def run_build_renditions(job, model, pk, field):
+    """Build the renditions of an uploaded image or thumbnail, until they match the current file"""
+    from .renditions import refresh_renditions
+    from .snapshots import invalidate_properties_snapshot
+    model = apps.get_model('properties', model)
+    changed = False
+    # refresh_renditions is False once the renditions match the file, so a
+    # file replaced while this ran is picked up by the next pass
+    while True:
+        instance = model.objects.filter(pk=pk).first()
+        if instance is None or not refresh_renditions(instance, field):
+            break
+        changed = True
+    if changed:
+        invalidate_properties_snapshot()
+
+
+@job_handler('export_pdfs')
+def run_export_pdfs(job, export_id):
+    from .exports import run_pdf_export
+    run_pdf_export(PropertyPDFExport.objects.get(pk=export_id))
@@ -0,0 +1,34 @@
+from django.db.models import Prefetch
+
+from .models import PropertyAmenity, PropertyConfiguration, PropertyImage
+
+# Number of configurations/amenities shown on a property card
+CARD_CONFIGURATION_LIMIT = 2
+CARD_AMENITY_LIMIT = 3
+
+
+def with_card_data(properties):
+    """
+    Attach everything a property card renders in a fixed number of queries.
+
+    Cards read card_images (all images, ordered for the gallery),
+    card_configurations and card_amenities (sliced per property), and the
+    configuration_count/amenity_count/min_price summary columns for totals.
+    """
+    return properties.prefetch_related(
+        Prefetch(
+            'images',
+            queryset=PropertyImage.objects.order_by('order', 'id'),
+            to_attr='card_images',
+        ),
+        Prefetch(
+            'configurations',
+            queryset=PropertyConfiguration.objects.order_by('bedrooms', 'price', 'id')[:CARD_CONFIGURATION_LIMIT],
+            to_attr='card_configurations',
+        ),
+        Prefetch(
+            'amenities',
+            queryset=PropertyAmenity.objects.order_by('id')[:CARD_AMENITY_LIMIT],
+            to_attr='card_amenities',
+        ),
+    )
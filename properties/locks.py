@@ -0,0 +1,64 @@
+import os
+import threading
+import time
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_local_locks = {}
+_local_locks_lock = threading.Lock()
+
+
+class FileLock:
+    """
+    Lock shared by every process on this host, held with flock() on a file
+    under LOCK_ROOT. The OS releases it if the holder dies, so a crashed
+    worker can never leave it stuck. Where flock() is unavailable it falls
+    back to a lock shared by the threads of this process only.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.path = os.path.join(settings.LOCK_ROOT, f"{name}.lock")
+        self._file = None
+        self._local = None
+
+    def acquire(self, blocking=True, timeout=None):
+        """Take the lock; returns False if it is held elsewhere and we gave up"""
+        if fcntl is None:
+            with _local_locks_lock:
+                self._local = _local_locks.setdefault(self.name, threading.Lock())
+            return self._local.acquire(blocking, -1 if timeout is None or not blocking else timeout)
+
+        os.makedirs(settings.LOCK_ROOT, exist_ok=True)
+        lock_file = open(self.path, 'a')
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self._file = lock_file
+                return True
+            except BlockingIOError:
+                if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                    lock_file.close()
+                    return False
+                time.sleep(0.05)
+
+    def release(self):
+        if self._local is not None:
+            self._local.release()
+        elif self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
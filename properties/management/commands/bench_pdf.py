@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from properties.models import Property
+from properties.pdf import PropertyPDFGenerator, build_pdf_styles
+
+
+def _average_ms(func, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started) * 1000 / iterations
+
+
+class Command(BaseCommand):
+    help = 'Time PDF generator setup and rendering, to compare per-request costs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=50,
+            help='Times each step is repeated (default: 50).'
+        )
+        parser.add_argument(
+            '--property-id',
+            type=int,
+            help='Property to render (default: the first active property).'
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        properties = Property.objects.filter(is_active=True).prefetch_related('configurations', 'amenities')
+        if options['property_id']:
+            properties = properties.filter(pk=options['property_id'])
+        prop = properties.first()
+        if prop is None:
+            raise CommandError("No property to render")
+
+        # Warm the style registry and the image cache
+        generator = PropertyPDFGenerator()
+        generator.generate_property_pdf(prop)
+
+        rows = [
+            ("Style sheet built per request (old)", _average_ms(build_pdf_styles, iterations)),
+            ("PropertyPDFGenerator() with shared styles", _average_ms(PropertyPDFGenerator, iterations)),
+            ("Property PDF render", _average_ms(lambda: PropertyPDFGenerator().generate_property_pdf(prop), iterations)),
+        ]
+        self.stdout.write(f"{prop.name}, {iterations} iterations:")
+        for label, ms in rows:
+            self.stdout.write(f"  {label:<45} {ms:8.3f} ms")
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from properties.models import Property, PropertyImage
+from properties.renditions import available_formats, refresh_renditions
+from properties.snapshots import rebuild_properties_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive WebP/AVIF renditions for property images and thumbnails.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild renditions even when they are up to date.'
+        )
+
+    def handle(self, *args, **options):
+        formats = available_formats()
+        if not formats:
+            self.stderr.write(self.style.ERROR("This Pillow build cannot encode WebP or AVIF"))
+            return
+        self.stdout.write(f"Building {', '.join(formats)} renditions...")
+
+        built = 0
+        for model, field, renditions_field in (
+            (PropertyImage, 'image', 'renditions'),
+            (Property, 'thumbnail', 'thumbnail_renditions'),
+        ):
+            queryset = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            for obj in queryset.only('pk', field, renditions_field).iterator():
+                if options['force']:
+                    setattr(obj, renditions_field, {})
+                if refresh_renditions(obj, field):
+                    built += 1
+
+        if built:
+            rebuild_properties_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"Built renditions for {built} files."))
@@ -0,0 +1,59 @@
+import os
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from properties.media_store import MANAGED_PREFIXES, referenced_media, walk_storage
+
+
+class Command(BaseCommand):
+    help = 'Delete media files that are no longer referenced by any property or image.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List orphaned files without deleting them.'
+        )
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=1,
+            help='Keep files newer than this, so an in-progress sync is not affected (default: 1).'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        referenced = referenced_media()
+
+        orphans = []
+        for prefix in MANAGED_PREFIXES:
+            for name in walk_storage(prefix):
+                if os.path.normpath(name) in referenced:
+                    continue
+                try:
+                    if default_storage.get_modified_time(name) > cutoff:
+                        continue
+                except (NotImplementedError, OSError):
+                    pass
+                orphans.append(name)
+
+        freed = 0
+        for name in orphans:
+            try:
+                freed += default_storage.size(name)
+            except (NotImplementedError, OSError):
+                pass
+            if dry_run:
+                self.stdout.write(f"Would delete {name}")
+            else:
+                default_storage.delete(name)
+
+        verb = 'Would free' if dry_run else 'Freed'
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(orphans)} orphaned files ({len(referenced)} referenced). "
+            f"{verb} {freed / (1024 * 1024):.1f} MB."
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from properties.models import Property
+from properties.search import create_index, index_available, index_properties
+
+
+class Command(BaseCommand):
+    help = 'Create the property full-text search index if needed and rebuild it from the database.'
+
+    def handle(self, *args, **options):
+        create_index(connection)
+        if not index_available(connection):
+            self.stderr.write(self.style.WARNING(
+                f"No full-text search on {connection.vendor}; searches use substring matching."
+            ))
+            return
+        index_properties(connection=connection)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {Property.objects.count()} properties."))
@@ -1,26 +1,24 @@
-# Create this file: management/commands/refresh_airtable_cache.py
-
 import logging
 from django.core.management.base import BaseCommand
-from django.core.management import call_command
-from django.core.cache import cache
+
+from properties.airtable_cache import get_envelope, is_fresh, refresh_airtable_data
 
 logger = logging.getLogger(__name__)
 
 class Command(BaseCommand):
-    help = 'Refresh the Airtable data cache'
+    help = 'Refresh the shared Airtable data cache from the synced database tables'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--force',
             action='store_true',
-            help='Force refresh even if cache is not expired',
+            help='Force refresh even if the cached data is still fresh',
         )
         parser.add_argument(
             '--timeout',
             type=int,
-            default=3600,
-            help='Cache timeout in seconds (default: 3600)',
+            default=None,
+            help='Seconds the refreshed data counts as fresh (default: AIRTABLE_CACHE_SETTINGS SOFT_TTL)',
         )
 
     def handle(self, *args, **options):
@@ -31,18 +29,14 @@ class Command(BaseCommand):
         try:
             # Check if we should refresh
             if not options['force']:
-                existing_data = cache.get('airtable_data')
-                if existing_data:
-                    self.stdout.write('Cache exists and --force not specified. Skipping refresh.')
+                if is_fresh(get_envelope()):
+                    self.stdout.write('Cache is fresh and --force not specified. Skipping refresh.')
                     return
             
-            # Refresh the data using the existing command
-            result = call_command('fetch_airtable_data', return_data=True)
+            # The tables hold the last sync, so no Airtable requests are needed
+            result = refresh_airtable_data(soft_ttl=options['timeout'])
             
             if result:
-                # Update cache with custom timeout if specified
-                cache.set('airtable_data', result, timeout=options['timeout'])
-                
                 # Display summary
                 properties_count = len(result.get('properties', []))
                 configs_count = len(result.get('configurations', []))
@@ -56,7 +50,7 @@ class Command(BaseCommand):
                         f'Configurations: {configs_count}\n'
                         f'Images: {images_count}\n'
                         f'Amenities: {amenities_count}\n'
-                        f'Cache timeout: {options["timeout"]} seconds'
+                        f'Fresh for: {options["timeout"] or "default"} seconds'
                     )
                 )
             else:
@@ -0,0 +1,53 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from properties.jobs import claim_next_job, fail_stale_jobs, run_job, stale_after
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (Airtable syncs etc.). Meant to run as a worker process.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run every queued job, then exit instead of polling.'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between polls when the queue is empty (default: 2).'
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=float,
+            default=None,
+            help='Minutes without a heartbeat after which a running job is assumed lost and marked failed '
+                 '(default: JOB_SETTINGS["STALE_AFTER"]).'
+        )
+
+    def handle(self, *args, **options):
+        max_age = stale_after() if options['stale_after'] is None else timedelta(minutes=options['stale_after'])
+        self.stdout.write(self.style.SUCCESS('Job worker started'))
+
+        while True:
+            close_old_connections()
+            stale = fail_stale_jobs(max_age)
+            if stale:
+                self.stdout.write(self.style.WARNING(f'Marked {stale} stale jobs as failed'))
+
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+
+            self.stdout.write(f'Running {job}...')
+            run_job(job)
+            style = self.style.SUCCESS if job.status == 'completed' else self.style.ERROR
+            self.stdout.write(style(f'Finished {job}'))
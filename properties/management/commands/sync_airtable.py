@@ -1,19 +1,57 @@
 import os
+import json
 import logging
-import requests
+import queue
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from decimal import Decimal, InvalidOperation
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.utils.text import slugify
 from django.db import transaction
-from django.core.files.base import ContentFile
 from pyairtable import Table
 from decouple import config
-from django.core.cache import cache
-from properties.models import Property, PropertyConfiguration, PropertyImage, PropertyAmenity
+from properties.models import (
+    AirtableSyncLog, AirtableSyncState, Property, PropertyConfiguration, PropertyImage, PropertyAmenity,
+    refresh_property_summaries,
+)
+from properties.airtable_cache import store_airtable_data
+from properties.snapshots import AIRTABLE_RECORDS_SCHEMA, build_airtable_data, rebuild_properties_snapshot
+from properties.downloads import DownloadTask, MediaDownloader
+from properties.media_store import attachment_fingerprint, store_blob
+from properties.renditions import refresh_renditions
+from properties.search import index_properties
+from properties.exports import prune_pdf_exports
+from properties.pdf import prerender_property_pdfs, prune_pdf_cache
 from django.utils import timezone
-from datetime import datetime
+from django.utils.dateparse import parse_datetime
+from datetime import datetime, timedelta, timezone as dt_timezone
 log = logging.getLogger(__name__)
 
+SYNC_BATCH_SIZE = 500
+MAX_LOGGED_ERRORS = 200
+# Pages each table may fetch ahead of the page being written. Child tables
+# are only written once every property page has been, so their pages are
+# spooled to disk meanwhile (see PageSpool) rather than blocking the fetch.
+PAGE_QUEUE_SIZE = 2
+# Child tables link to properties, so properties are written first
+SYNC_ORDER = ('properties', 'configurations', 'images', 'amenities')
+
+LUXURY_MAPPING = {
+    'Luxurious': 'luxurious',
+    'Non Luxurious': 'non_luxurious',
+    'luxurious': 'luxurious',
+    'non_luxurious': 'non_luxurious'
+}
+
+PROPERTY_SYNC_FIELDS = [
+    'name', 'slug', 'address', 'description', 'latitude', 'longitude',
+    'contact_name', 'contact_phone', 'is_active', 'luxury_status', 'completion_date',
+]
+CONFIGURATION_SYNC_FIELDS = ['type', 'bedrooms', 'bathrooms', 'square_footage', 'price', 'is_available']
+
 def env(name, default=None):
     v = os.environ.get(name)
     return v if v is not None else default
@@ -34,34 +72,273 @@ def to_date(v):
     except (TypeError, ValueError):
         return None
 
+def unique_slug(slug, airtable_id, owners):
+    """Return slug, suffixed if another record already owns it, and claim it"""
+    candidate = slug
+    suffix = 2
+    while owners.get(candidate, airtable_id) != airtable_id:
+        candidate = f"{slug}-{suffix}"
+        suffix += 1
+    owners[candidate] = airtable_id
+    return candidate
+
+def modified_since_formula(field, since):
+    """Airtable formula matching records modified after `since`"""
+    # Overlap by a second; re-applying an unchanged record is a no-op
+    since = (since - timedelta(seconds=1)).astimezone(dt_timezone.utc)
+    return f"IS_AFTER({{{field}}}, DATETIME_PARSE('{since.strftime('%Y-%m-%dT%H:%M:%S.000Z')}'))"
+
+def latest_modified(records, field):
+    """Latest Last Modified value among fetched records, or None"""
+    latest = None
+    for rec in records:
+        if not isinstance(rec, dict):
+            continue
+        value = rec.get("fields", {}).get(field)
+        modified = parse_datetime(value) if isinstance(value, str) else None
+        if modified and (latest is None or modified > latest):
+            latest = modified
+    return latest
+
+def record_id(airtable_id):
+    """Airtable record id behind a split image/amenity id like recXXX_1"""
+    return airtable_id.split('_', 1)[0]
+
+def needs_download(obj, field, url, fingerprint):
+    """
+    Whether a synced file must be (re)downloaded: it is missing, or Airtable
+    now reports a different attachment than the one that was stored.
+    """
+    if not url:
+        return False
+    if not getattr(obj, field):
+        return True
+    return bool(fingerprint) and fingerprint != getattr(obj, f'{field}_fingerprint')
+
 def first_attachment(attachments):
     if not attachments:
         return None
     return attachments[0]
 
-def extract_records_from_response(table_data):
-    records = []
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart, shared across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def throttled(pages, rate_limiter=None):
+    """Yield from a page iterator, waiting on the rate limiter before each request"""
+    pages = iter(pages)
+    while True:
+        if rate_limiter:
+            rate_limiter.wait()
+        try:
+            yield next(pages)
+        except StopIteration:
+            return
+
+def iter_pages(table_data, rate_limiter=None, stats=None, **options):
+    """
+    Yield a table's records one page at a time.
+    stats records 'requests', 'retries', 'elapsed' and whether the fetch was
+    'complete'. Retries count those urllib3 made behind pyairtable's requests
+    plus the all() fallback.
+    If iterate() fails part way, all() is tried and its records are yielded
+    as a final page, with stats['fallback'] set; records from earlier pages
+    are then yielded twice, which is harmless for an upsert.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault('requests', 0)
+    stats.setdefault('retries', 0)
+
+    def count_retries(response, *args, **kwargs):
+        retry = getattr(getattr(response, 'raw', None), 'retries', None)
+        stats['retries'] += len(retry.history) if retry is not None else 0
+
+    session = getattr(getattr(table_data, 'api', None), 'session', None)
+    if session is not None:
+        session.hooks['response'].append(count_retries)
     try:
-        for item in table_data.iterate():
+        yield from _fetch_pages(table_data, rate_limiter, stats, **options)
+    finally:
+        if session is not None:
+            session.hooks['response'].remove(count_retries)
+
+
+def _fetch_pages(table_data, rate_limiter, stats, **options):
+    stats['complete'] = False
+    started = time.monotonic()
+    try:
+        for item in throttled(table_data.iterate(**options), rate_limiter):
+            stats['requests'] += 1
             if isinstance(item, list):
-                records.extend(item)
+                yield item
             elif isinstance(item, dict):
-                records.append(item)
+                yield [item]
     except Exception as e:
         print(f"iterate() failed: {e}, trying all()")
         try:
-            all_data = table_data.all()
-            if isinstance(all_data, list):
-                records = all_data
-            else:
-                records = [all_data]
+            if rate_limiter:
+                rate_limiter.wait()
+            stats['requests'] += 1
+            stats['retries'] += 1
+            all_data = table_data.all(**options)
         except Exception as e2:
             print(f"Both iterate() and all() failed: {e2}")
-            return []
+            stats['elapsed'] = time.monotonic() - started
+            return
+        stats['fallback'] = True
+        yield all_data if isinstance(all_data, list) else [all_data]
+    stats['complete'] = True
+    stats['elapsed'] = time.monotonic() - started
+
+def extract_records_from_response(table_data, rate_limiter=None, stats=None, **options):
+    """Fetch all records of a table into one list; stats['requests'] counts the pages requested"""
+    stats = stats if stats is not None else {}
+    records = []
+    for page in iter_pages(table_data, rate_limiter, stats, **options):
+        if stats.get('fallback'):
+            # all() returned the whole table again
+            records = []
+        records.extend(page)
     return records
 
+
+class PageStream:
+    """
+    Run a page generator on a background thread, buffering at most maxsize
+    pages (any number when 0), so the next pages download while the current
+    one is written.
+    Exceptions raised by the generator are re-raised to the reader.
+    """
+
+    _DONE = object()
+
+    def __init__(self, pages, maxsize=PAGE_QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(pages,), daemon=True)
+        self.thread.start()
+
+    def _put(self, item):
+        # Poll so close() can stop a producer blocked on a full queue
+        while not self.stopped.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, pages):
+        try:
+            for page in pages:
+                if not self._put(page):
+                    return
+        except Exception as e:
+            self._put(e)
+        else:
+            self._put(self._DONE)
+
+    def __iter__(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                # close() stops the producer without a final item
+                if self.stopped.is_set():
+                    return
+                continue
+            if item is self._DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+
+
+class PageSpool:
+    """
+    Drain a PageStream into a temporary file as its pages arrive, so the
+    table keeps fetching while earlier tables are written without holding
+    its pages in memory. Iterating yields the pages in order, waiting for
+    any that have not arrived yet.
+    Exceptions raised by the stream are re-raised to the reader.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.file = tempfile.TemporaryFile()
+        self.condition = threading.Condition()
+        self.written = 0
+        self.done = False
+        self.error = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        try:
+            for page in self.stream:
+                line = json.dumps(page).encode('utf-8') + b'\n'
+                with self.condition:
+                    self.file.seek(0, os.SEEK_END)
+                    self.file.write(line)
+                    self.written += 1
+                    self.condition.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            with self.condition:
+                self.done = True
+                self.condition.notify_all()
+
+    def __iter__(self):
+        offset = read = 0
+        while True:
+            with self.condition:
+                while read == self.written and not self.done:
+                    self.condition.wait()
+                if read == self.written:
+                    if self.error:
+                        raise self.error
+                    return
+                self.file.seek(offset)
+                line = self.file.readline()
+                offset = self.file.tell()
+            read += 1
+            yield json.loads(line)
+
+    def close(self):
+        self.stream.close()
+        self.thread.join()
+        self.file.close()
+
 class Command(BaseCommand):
     help = "Fetch data from Airtable and sync to Django models, deleting properties not in Airtable."
+    sync_log = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.phase_timings = {}
+        self.errors = []
+        self.http_requests = 0
+        self.http_retries = 0
+        self.bytes_downloaded = 0
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -79,6 +356,27 @@ class Command(BaseCommand):
             action='store_true',
             help='Only cache data, don\'t sync to database.'
         )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help='Only fetch records modified since the last sync. Does not delete anything.'
+        )
+        parser.add_argument(
+            '--reconcile',
+            action='store_true',
+            help='Delete rows whose Airtable records no longer exist. '
+                 'On its own this skips the data sync; combine with --incremental to do both.'
+        )
+        parser.add_argument(
+            '--render-pdfs',
+            action='store_true',
+            help='After syncing, pre-render the PDF of every active property that has no cached copy.'
+        )
+        parser.add_argument(
+            '--job-id',
+            type=int,
+            help='BackgroundJob running this sync; links the AirtableSyncLog to it.'
+        )
 
     def handle(self, *args, **options):
         print("=" * 50)
@@ -88,6 +386,8 @@ class Command(BaseCommand):
         dry_run = options.get('dry_run', False)
         no_files = options.get('no_files', False)
         cache_only = options.get('cache_only', False)
+        incremental = options.get('incremental', False)
+        reconcile = options.get('reconcile', False)
 
         if dry_run:
             print("🔍 DRY RUN MODE - No database changes will be made")
@@ -95,6 +395,8 @@ class Command(BaseCommand):
             print("📁 FILE DOWNLOAD DISABLED")
         if cache_only:
             print("💾 CACHE ONLY MODE - Database sync disabled")
+        if incremental:
+            print("⏩ INCREMENTAL MODE - Only records modified since the last sync")
 
         token = config("AIRTABLE_TOKEN")
         base_id = config("AIRTABLE_BASE_ID")
@@ -109,400 +411,680 @@ class Command(BaseCommand):
         print(f"Properties table: {tbl_props}")
 
         if not token or not base_id:
-            self.stderr.write(self.style.ERROR("AIRTABLE_TOKEN and AIRTABLE_BASE_ID are required"))
-            return
+            raise CommandError("AIRTABLE_TOKEN and AIRTABLE_BASE_ID are required")
+
+        self.sync_log = AirtableSyncLog.objects.create(
+            sync_type='incremental' if incremental else 'reconcile' if reconcile else 'full',
+            dry_run=dry_run,
+            files_downloaded=not no_files,
+            job_id=options.get('job_id'),
+            phase='starting',
+        )
 
         try:
-            props = Table(token, base_id, tbl_props)
-            cfgs = Table(token, base_id, tbl_cfgs)
-            imgs = Table(token, base_id, tbl_imgs)
-            amens = Table(token, base_id, tbl_amen)
-
-            print("\nStarting property fetch...")
-            prop_map = self.fetch_properties(props)
-            print(f"Properties fetched: {len(prop_map)}")
-
-            print("Starting configuration fetch...")
-            config_data = self.fetch_configurations(cfgs, prop_map)
-            print(f"Configurations fetched: {len(config_data)}")
-
-            print("Starting image fetch...")
-            image_data = self.fetch_images(imgs, prop_map)
-            print(f"Images fetched: {len(image_data)}")
-
-            print("Starting amenity fetch...")
-            amenity_data = self.fetch_amenities(amens, prop_map)
-            print(f"Amenities fetched: {len(amenity_data)}")
-
-            result = {
-                'properties': list(prop_map.values()),
-                'configurations': config_data,
-                'images': image_data,
-                'amenities': amenity_data
+            tables = {
+                'properties': Table(token, base_id, tbl_props),
+                'configurations': Table(token, base_id, tbl_cfgs),
+                'images': Table(token, base_id, tbl_imgs),
+                'amenities': Table(token, base_id, tbl_amen),
             }
 
-            # Store in cache
-            cache.set('airtable_data', result, timeout=3600)
-            print('✅ Cache stored successfully')
-
-            # Sync to database if not cache-only mode
-            if not cache_only:
-                print("\n" + "=" * 50)
-                print("STARTING DATABASE SYNC")
-                print("=" * 50)
-                self.sync_to_database(result, dry_run=dry_run, no_files=no_files)
+            if incremental or not reconcile:
+                self.sync_tables(tables, incremental=incremental, dry_run=dry_run,
+                                 no_files=no_files, cache_only=cache_only)
+            if reconcile:
+                self.reconcile(tables, dry_run=dry_run)
+            if not dry_run and not cache_only:
+                self.refresh_pdfs(render=options.get('render_pdfs', False))
 
+            self.finish_log('completed')
             self.stdout.write(self.style.SUCCESS("✅ Airtable data fetch and sync complete."))
 
         except Exception as e:
             print(f"❌ ERROR during fetch: {e}")
             import traceback
             traceback.print_exc()
+            self.errors.append({'phase': self.sync_log.phase, 'error': str(e)})
+            self.finish_log('failed')
             raise
 
-    def sync_to_database(self, data, dry_run=False, no_files=False):
-        """Sync fetched data to Django models and delete missing properties"""
-        try:
-            with transaction.atomic():
-                # Collect all Airtable IDs from fetched properties
-                airtable_ids = {prop['airtable_id'] for prop in data['properties']}
-                
-                print(f"🔄 Syncing {len(data['properties'])} properties...")
-                self.sync_properties(data['properties'], dry_run=dry_run, no_files=no_files)
-                
-                print(f"🔄 Syncing {len(data['configurations'])} configurations...")
-                self.sync_configurations(data['configurations'], dry_run=dry_run)
-                
-                print(f"🔄 Syncing {len(data['images'])} images...")
-                self.sync_images(data['images'], dry_run=dry_run, no_files=no_files)
-                
-                print(f"🔄 Syncing {len(data['amenities'])} amenities...")
-                self.sync_amenities(data['amenities'], dry_run=dry_run)
-
-                # Delete properties missing from Airtable
-                if not dry_run:
-                    print("🔍 Checking for properties missing from Airtable...")
-                    existing_properties = Property.objects.exclude(airtable_id__in=airtable_ids)
-                    count = existing_properties.count()
-                    if count > 0:
-                        print(f"🗑️ Deleting {count} properties missing from Airtable...")
-                        existing_properties.delete()
-                        print(f"✅ Deleted {count} missing properties")
+    def update_log(self, **fields):
+        """Record progress on this run's AirtableSyncLog, read by the job status endpoint"""
+        if self.sync_log is None:
+            return
+        for field, value in fields.items():
+            setattr(self.sync_log, field, value)
+        AirtableSyncLog.objects.filter(pk=self.sync_log.pk).update(**fields)
 
-                if dry_run:
-                    raise transaction.TransactionManagementError("🔍 Dry run - rolling back changes")
+    def set_phase(self, phase):
+        self.update_log(phase=phase)
 
-                print("✅ Database sync completed successfully!")
+    @contextmanager
+    def timed(self, phase):
+        """Add the wall time of the block to phase_timings[phase]"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.phase_timings[phase] = round(self.phase_timings.get(phase, 0) + elapsed, 3)
+            self.update_log(phase_timings=dict(self.phase_timings))
+
+    def record_error(self, table, record, message):
+        """Report a record that could not be synced and keep it for the sync log"""
+        print(message)
+        self.errors.append({'table': table, 'record': str(record), 'error': message})
+
+    def finish_log(self, status):
+        """Write the final timings, throughput and errors to the sync log"""
+        if self.sync_log is None:
+            return
+        completed_at = timezone.now()
+        elapsed = (completed_at - self.sync_log.started_at).total_seconds()
+        self.update_log(
+            status='partial' if status == 'completed' and self.errors else status,
+            phase='done' if status == 'completed' else self.sync_log.phase,
+            completed_at=completed_at,
+            phase_timings=dict(self.phase_timings),
+            records_per_second=round(self.sync_log.total_records_processed() / elapsed, 2) if elapsed > 0 else None,
+            bytes_downloaded=self.bytes_downloaded,
+            http_requests=self.http_requests,
+            http_retries=self.http_retries,
+            errors_count=len(self.errors),
+            # Keep the log row bounded on catalogs with many bad records
+            error_details=self.errors[:MAX_LOGGED_ERRORS],
+        )
 
-        except transaction.TransactionManagementError:
-            if dry_run:
-                print("🔍 Dry run completed - no actual changes made")
-        except Exception as e:
-            print(f"❌ Database sync error: {str(e)}")
-            raise
+    def sync_tables(self, tables, incremental=False, dry_run=False, no_files=False, cache_only=False):
+        """
+        Fetch the tables (or only their changes) and apply them to the database.
+        Records are streamed: each page is processed and written in its own
+        transaction while the following pages download, so memory is bounded
+        by the page size and rows appear before the crawl has finished.
+        """
+        last_modified_field = config("AIRTABLE_LAST_MODIFIED_FIELD", "Last Modified")
+        states = {state.table: state for state in AirtableSyncState.objects.all()}
+
+        fetch_options = {name: {} for name in tables}
+        if incremental:
+            for name in tables:
+                state = states.get(name)
+                if state and state.last_modified_at:
+                    fetch_options[name]['formula'] = modified_since_formula(last_modified_field, state.last_modified_at)
+                    print(f"⏩ {name}: records modified since {state.last_modified_at.isoformat()}")
+                else:
+                    print(f"⚠️ {name}: no previous sync recorded, fetching every record")
+
+        print("\nStreaming Airtable tables...")
+        rate_limiter = RateLimiter(config("AIRTABLE_REQUESTS_PER_SECOND", default=5, cast=float))
+        fetch_stats = {name: {} for name in tables}
+        streams = {}
+        for name, table in tables.items():
+            stream = PageStream(iter_pages(table, rate_limiter, fetch_stats[name], **fetch_options[name]))
+            streams[name] = stream if name == SYNC_ORDER[0] else PageSpool(stream)
+
+        self.pending_downloads = []
+        self.unsaved_properties = {}
+        marks = {name: {'latest': None, 'count': 0} for name in tables}
+        cached = {name: [] for name in tables}
+        seen_property_ids = set()
+        # An incremental sync links child rows to any property already in the database
+        property_ids = None if incremental else seen_property_ids
+        try:
+            for name in SYNC_ORDER:
+                self.set_phase(f'syncing {name}')
+                rows_synced = 0
+                for page in streams[name]:
+                    latest = latest_modified(page, last_modified_field)
+                    if latest and (marks[name]['latest'] is None or latest > marks[name]['latest']):
+                        marks[name]['latest'] = latest
+                    marks[name]['count'] += len(page)
+
+                    with self.timed('process'):
+                        rows = self.process_page(name, page, property_ids)
+                    if name == 'properties':
+                        seen_property_ids.update(row['airtable_id'] for row in rows)
+                    if cache_only:
+                        cached[name].extend(rows)
+                        continue
+
+                    with self.timed(f'db:{name}'):
+                        self.sync_page(name, rows, dry_run=dry_run, no_files=no_files)
+                    rows_synced += len(rows)
+                    self.update_log(**{f'{name}_processed': rows_synced})
+
+                stats = fetch_stats[name]
+                self.http_requests += stats.get('requests', 0)
+                self.http_retries += stats.get('retries', 0)
+                self.phase_timings[f'fetch:{name}'] = round(stats.get('elapsed', 0), 3)
+                print(f"Retrieved {marks[name]['count']} {name} records from Airtable in {stats.get('elapsed', 0):.1f}s")
+
+                if name == 'properties' and not (incremental or cache_only or dry_run):
+                    if stats.get('complete') and seen_property_ids:
+                        with self.timed('db:cleanup'):
+                            self.delete_missing_properties(seen_property_ids)
+                    else:
+                        print("⚠️ Properties fetch did not complete, not deleting missing properties")
+        finally:
+            for stream in streams.values():
+                stream.close()
 
-    def sync_properties(self, properties_data, dry_run=False, no_files=False):
-        """Sync properties to Django Property model"""
-        for prop_data in properties_data:
-            try:
-                airtable_id = prop_data['airtable_id']
-                
-                # Map luxury status
-                luxury_mapping = {
-                    'Luxurious': 'luxurious',
-                    'Non Luxurious': 'non_luxurious',
-                    'luxurious': 'luxurious',
-                    'non_luxurious': 'non_luxurious'
-                }
-                
-                property_fields = {
-                    'name': prop_data['name'],
-                    'slug': prop_data['slug'],
-                    'address': prop_data['address'],
-                    'description': prop_data['description'],
-                    'latitude': prop_data['latitude'],
-                    'longitude': prop_data['longitude'],
-                    'contact_name': prop_data['contact_name'],
-                    'contact_phone': prop_data['contact_phone'],
-                    'is_active': prop_data['is_active'],
-                    'luxury_status': luxury_mapping.get(prop_data['luxury_status'], 'non_luxurious'),
-                    'completion_date': prop_data['completion_date']
-                }
+        if incremental and not any(mark['count'] for mark in marks.values()):
+            print("✅ No Airtable changes since the last sync")
+            return
+
+        if cache_only:
+            # Only a full fetch describes the whole catalog
+            if not incremental:
+                store_airtable_data(dict(cached, schema=AIRTABLE_RECORDS_SCHEMA))
+                print('✅ Cache stored successfully')
+            return
+        if dry_run:
+            print("🔍 Dry run completed - no actual changes made")
+            return
 
+        self.save_sync_state(marks, reconciled=not incremental)
+
+        # Files are fetched after the rows are written so slow
+        # downloads never hold the database write lock
+        if self.pending_downloads:
+            self.set_phase('downloading')
+            with self.timed('download'):
+                self.download_media(self.pending_downloads)
+
+        # Read back from the database once the files are attached, so an
+        # incremental run also yields the whole catalog, with media URLs,
+        # and airtable_*_api never serves pre-sync data
+        store_airtable_data(build_airtable_data())
+        print('✅ Cache stored successfully')
+
+        self.set_phase('snapshot')
+        with self.timed('snapshot'):
+            snapshot = rebuild_properties_snapshot()
+        print(f"✅ Properties API snapshot rebuilt (version {snapshot['version']})")
+
+    def refresh_pdfs(self, render=False):
+        """Drop cached PDFs of changed properties and expired exports, and optionally render PDFs again"""
+        self.set_phase('pdfs')
+        with self.timed('pdfs'):
+            removed = prune_pdf_cache()
+            if removed:
+                print(f"🗑️ Removed {removed} outdated PDFs")
+            removed = prune_pdf_exports()
+            if removed:
+                print(f"🗑️ Removed {removed} expired PDF exports")
+            if render:
+                rendered = prerender_property_pdfs()
+                print(f"📄 Pre-rendered {rendered} property PDFs")
+
+    def process_page(self, name, records, property_ids):
+        """Turn one page of Airtable records into rows for sync_page"""
+        if name == 'properties':
+            return list(self.process_properties(records).values())
+        if name == 'configurations':
+            return self.process_configurations(records, property_ids)
+        if name == 'images':
+            return self.process_images(records, property_ids)
+        return self.process_amenities(records, property_ids)
+
+    def sync_page(self, name, rows, dry_run=False, no_files=False):
+        """Write one page of processed rows in its own transaction"""
+        with transaction.atomic():
+            if name == 'properties':
+                self.sync_properties(rows, dry_run=dry_run, no_files=no_files)
                 if dry_run:
-                    print(f"🔍 Would sync property: {prop_data['name']}")
-                    continue
+                    # Nothing was saved, so later child pages look these up here
+                    self.unsaved_properties.update(
+                        (airtable_id, obj) for airtable_id, obj in self.synced_properties.items() if not obj.pk
+                    )
+            else:
+                self.synced_properties = {}
+                self.load_linked_properties({name: rows})
+                if name == 'configurations':
+                    self.sync_configurations(rows, dry_run=dry_run)
+                elif name == 'images':
+                    self.sync_images(rows, dry_run=dry_run, no_files=no_files)
+                else:
+                    self.sync_amenities(rows, dry_run=dry_run)
+
+            if not dry_run:
+                synced_pks = [obj.pk for obj in self.synced_properties.values() if obj.pk]
+                refresh_property_summaries(synced_pks)
+                if name in ('properties', 'amenities'):
+                    index_properties(synced_pks)
+
+    def delete_missing_properties(self, airtable_ids):
+        """Delete properties whose airtable_id is not in airtable_ids"""
+        print("🔍 Checking for properties missing from Airtable...")
+        missing = [
+            pk for pk, airtable_id in Property.objects.values_list('pk', 'airtable_id')
+            if airtable_id not in airtable_ids
+        ]
+        if not missing:
+            return
+        print(f"🗑️ Deleting {len(missing)} properties missing from Airtable...")
+        for start in range(0, len(missing), SYNC_BATCH_SIZE):
+            Property.objects.filter(pk__in=missing[start:start + SYNC_BATCH_SIZE]).delete()
+        print(f"✅ Deleted {len(missing)} missing properties")
+
+    def save_sync_state(self, marks, reconciled=False):
+        """
+        Advance each table's high-water mark after a committed sync.
+        marks maps a table to the 'latest' Last Modified seen and its record 'count'.
+        """
+        now = timezone.now()
+        for name, mark in marks.items():
+            state, _ = AirtableSyncState.objects.get_or_create(table=name)
+            latest = mark['latest']
+            if latest and (state.last_modified_at is None or latest > state.last_modified_at):
+                state.last_modified_at = latest
+            state.last_synced_at = now
+            state.records_synced = mark['count']
+            if reconciled and name == 'properties':
+                state.last_reconciled_at = now
+            state.save()
+
+    def reconcile(self, tables, dry_run=False):
+        """
+        Delete rows whose Airtable records no longer exist.
+        Only record ids are fetched, so this is much cheaper than a full sync.
+        Rows without an airtable_id (created by hand) are left alone.
+        """
+        print("\n" + "=" * 50)
+        print("RECONCILING DELETED AIRTABLE RECORDS")
+        print("=" * 50)
+        self.set_phase('reconciling')
+        started = time.monotonic()
+
+        last_modified_field = config("AIRTABLE_LAST_MODIFIED_FIELD", "Last Modified")
+        records = self.fetch_all_records(tables, {name: {'fields': [last_modified_field]} for name in tables})
+        live_ids = {
+            name: {rec['id'] for rec in table_records if isinstance(rec, dict) and 'id' in rec}
+            for name, table_records in records.items()
+        }
+
+        models = {
+            'properties': Property,
+            'configurations': PropertyConfiguration,
+            'images': PropertyImage,
+            'amenities': PropertyAmenity,
+        }
+        stale = {}
+        for name, model in models.items():
+            rows = model.objects.filter(airtable_id__isnull=False).values_list('pk', 'airtable_id')
+            if not live_ids[name]:
+                # An empty answer is far more likely a failed fetch than an empty table
+                print(f"⚠️ No {name} records returned from Airtable, skipping")
+                continue
+            stale[name] = [pk for pk, airtable_id in rows if record_id(airtable_id) not in live_ids[name]]
 
-                try:
-                    property_obj = Property.objects.get(airtable_id=airtable_id)
-                    changed = False
-                    for field, value in property_fields.items():
-                        if getattr(property_obj, field) != value:
-                            setattr(property_obj, field, value)
-                            changed = True
-                    if changed:
-                        property_obj.last_synced_at = timezone.now()
-                        property_obj.save()
-                        action = "🔄 Updated"
-                    else:
-                        action = "✅ No changes"
-                except Property.DoesNotExist:
-                    property_obj = Property(airtable_id=airtable_id, **property_fields)
-                    property_obj.last_synced_at = timezone.now()
-                    property_obj.save()
-                    action = "✅ Created"
+        if dry_run:
+            for name, pks in stale.items():
+                print(f"🔍 Would delete {len(pks)} {name}")
+            return
 
-                print(f"{action} property: {property_obj.name}")
+        with transaction.atomic():
+            for name, pks in stale.items():
+                if pks:
+                    models[name].objects.filter(pk__in=pks).delete()
+                    print(f"🗑️ Deleted {len(pks)} {name} missing from Airtable")
+
+        now = timezone.now()
+        for name in stale:
+            AirtableSyncState.objects.update_or_create(table=name, defaults={'last_reconciled_at': now})
+
+        if any(stale.values()):
+            snapshot = rebuild_properties_snapshot()
+            print(f"✅ Properties API snapshot rebuilt (version {snapshot['version']})")
+        self.phase_timings['reconcile'] = round(time.monotonic() - started, 3)
+
+    def apply_changes(self, model, to_create, to_update, fields, unchanged=0, dry_run=False):
+        """
+        Write new and changed rows in batches. New rows are upserted on
+        airtable_id so a row inserted since the diff was taken is updated
+        rather than failing the whole batch.
+        """
+        label = str(model._meta.verbose_name_plural).lower()
+        if dry_run:
+            print(f"🔍 Would create {len(to_create)}, update {len(to_update)} {label} ({unchanged} unchanged)")
+            return
 
-                # Download and save files
-                if not no_files:
-                    self.handle_property_files(property_obj, prop_data)
+        now = timezone.now()
+        for obj in to_create + to_update:
+            obj.last_synced_at = now
+            obj.updated_at = now
+        update_fields = fields + ['updated_at', 'last_synced_at']
+
+        if to_create:
+            model.objects.bulk_create(
+                to_create,
+                batch_size=SYNC_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['airtable_id'],
+                update_fields=update_fields,
+            )
+        if to_update:
+            model.objects.bulk_update(to_update, update_fields, batch_size=SYNC_BATCH_SIZE)
+        print(f"✅ Created {len(to_create)}, updated {len(to_update)} {label} ({unchanged} unchanged)")
+
+    def diff_fields(self, obj, fields):
+        """Copy changed values onto obj and return whether anything changed"""
+        changed = False
+        for field, value in fields.items():
+            if getattr(obj, field) != value:
+                setattr(obj, field, value)
+                changed = True
+        return changed
 
-            except Exception as e:
-                print(f"❌ Error syncing property {prop_data.get('name', 'Unknown')}: {str(e)}")
-                continue
+    def sync_properties(self, properties_data, dry_run=False, no_files=False):
+        """Sync properties to Django Property model"""
+        existing = Property.objects.in_bulk(
+            [prop_data['airtable_id'] for prop_data in properties_data], field_name='airtable_id'
+        )
+        # slug is unique, so remember which Airtable record holds each one
+        slug_owners = dict(Property.objects.values_list('slug', 'airtable_id'))
+
+        to_create, to_update = [], []
+        synced = {}
+        for prop_data in properties_data:
+            airtable_id = prop_data['airtable_id']
+            property_fields = {field: prop_data[field] for field in PROPERTY_SYNC_FIELDS}
+            property_fields['luxury_status'] = LUXURY_MAPPING.get(prop_data['luxury_status'], 'non_luxurious')
+            property_fields['slug'] = unique_slug(property_fields['slug'] or slugify(prop_data['name']),
+                                                  airtable_id, slug_owners)
+
+            property_obj = existing.get(airtable_id)
+            if property_obj is None:
+                property_obj = Property(airtable_id=airtable_id, **property_fields)
+                property_obj.geohash = property_obj.compute_geohash()
+                to_create.append(property_obj)
+            elif self.diff_fields(property_obj, property_fields):
+                property_obj.geohash = property_obj.compute_geohash()
+                to_update.append(property_obj)
+            synced[airtable_id] = property_obj
+
+        unchanged = len(synced) - len(to_create) - len(to_update)
+        self.apply_changes(Property, to_create, to_update, PROPERTY_SYNC_FIELDS + ['geohash'],
+                           unchanged=unchanged, dry_run=dry_run)
+
+        if not dry_run and to_create:
+            pks = dict(Property.objects.filter(
+                airtable_id__in=[obj.airtable_id for obj in to_create]
+            ).values_list('airtable_id', 'pk'))
+            for property_obj in to_create:
+                property_obj.pk = pks[property_obj.airtable_id]
+
+        # Child tables resolve their linked property from this map
+        self.synced_properties = synced
+
+        if not dry_run and not no_files:
+            for prop_data in properties_data:
+                self.queue_property_files(synced[prop_data['airtable_id']], prop_data)
+
+    def load_linked_properties(self, data):
+        """Add properties that child rows link to but that were not synced this run"""
+        linked = {
+            row['property_id']
+            for table in ('configurations', 'images', 'amenities')
+            for row in data.get(table, ())
+        }
+        missing = linked - set(self.synced_properties)
+        if missing:
+            self.synced_properties.update(Property.objects.in_bulk(missing, field_name='airtable_id'))
+        # Dry runs save nothing; properties "created" on earlier pages live here
+        unsaved = getattr(self, 'unsaved_properties', {})
+        for airtable_id in missing - set(self.synced_properties):
+            if airtable_id in unsaved:
+                self.synced_properties[airtable_id] = unsaved[airtable_id]
+
+    def property_key(self, property_obj):
+        # Unsaved properties only exist in dry runs; key them by Airtable id
+        return property_obj.pk or property_obj.airtable_id
 
     def sync_configurations(self, configurations_data, dry_run=False):
         """Sync configurations to Django PropertyConfiguration model"""
+        existing = PropertyConfiguration.objects.in_bulk(
+            [config_data['airtable_id'] for config_data in configurations_data], field_name='airtable_id'
+        )
+        # (property, type) is unique, so remember which record holds each pair
+        property_pks = [obj.pk for obj in self.synced_properties.values() if obj.pk]
+        owners = {
+            (property_id, config_type): airtable_id
+            for property_id, config_type, airtable_id in PropertyConfiguration.objects.filter(
+                property_id__in=property_pks
+            ).values_list('property_id', 'type', 'airtable_id')
+        }
+
+        to_create, to_update = [], []
+        unchanged = 0
         for config_data in configurations_data:
-            try:
-                if dry_run:
-                    print(f"🔍 Would sync configuration: {config_data['type']}")
-                    continue
-
-                # Find the property
-                property_obj = self.get_property_by_airtable_id(config_data['property_id'])
-                if not property_obj:
-                    print(f"❌ Property not found for configuration: {config_data['property_id']}")
-                    continue
-
-                config_fields = {
-                    'type': config_data['type'],
-                    'bedrooms': config_data['bedrooms'],
-                    'bathrooms': config_data['bathrooms'],
-                    'square_footage': config_data['square_footage'],
-                    'price': config_data['price'],
-                    'is_available': config_data['is_available']
-                }
-
-                try:
-                    config_obj = PropertyConfiguration.objects.get(airtable_id=config_data['airtable_id'])
-                    changed = False
-                    for field, value in config_fields.items():
-                        if getattr(config_obj, field) != value:
-                            setattr(config_obj, field, value)
-                            changed = True
-                    if changed:
-                        config_obj.last_synced_at = timezone.now()
-                        config_obj.save()
-                        action = "🔄 Updated"
-                    else:
-                        action = "✅ No changes"
-                except PropertyConfiguration.DoesNotExist:
-                    config_obj = PropertyConfiguration(
-                        airtable_id=config_data['airtable_id'],
-                        property=property_obj,
-                        **config_fields
-                    )
-                    config_obj.last_synced_at = timezone.now()
-                    config_obj.save()
-                    action = "✅ Created"
+            airtable_id = config_data['airtable_id']
+            property_obj = self.synced_properties.get(config_data['property_id'])
+            if not property_obj:
+                self.record_error('configurations', airtable_id, f"❌ Property not found for configuration: {config_data['property_id']}")
+                continue
 
-                print(f"{action} configuration: {property_obj.name} - {config_data['type']}")
+            config_fields = {field: config_data[field] for field in CONFIGURATION_SYNC_FIELDS}
+            config_obj = existing.get(airtable_id)
+            property_key = config_obj.property_id if config_obj else self.property_key(property_obj)
 
-            except Exception as e:
-                print(f"❌ Error syncing configuration: {str(e)}")
+            key = (property_key, config_fields['type'])
+            if owners.get(key, airtable_id) != airtable_id:
+                self.record_error('configurations', airtable_id, f"⚠️ Skipping duplicate configuration: {property_obj.name} - {config_fields['type']}")
                 continue
+            if config_obj and config_obj.type != config_fields['type']:
+                owners.pop((property_key, config_obj.type), None)
+            owners[key] = airtable_id
+
+            if config_obj is None:
+                to_create.append(PropertyConfiguration(
+                    airtable_id=airtable_id, property_id=property_obj.pk, **config_fields
+                ))
+            elif self.diff_fields(config_obj, config_fields):
+                to_update.append(config_obj)
+            else:
+                unchanged += 1
+
+        self.apply_changes(PropertyConfiguration, to_create, to_update, CONFIGURATION_SYNC_FIELDS,
+                           unchanged=unchanged, dry_run=dry_run)
 
     def sync_images(self, images_data, dry_run=False, no_files=False):
         """Sync images to Django PropertyImage model"""
-        for image_data in images_data:
-            try:
-                if dry_run:
-                    print(f"🔍 Would sync image: {image_data['alt_text']}")
-                    continue
-
-                property_obj = self.get_property_by_airtable_id(image_data['property_id'])
-                if not property_obj:
-                    print(f"❌ Property not found for image: {image_data['property_id']}")
-                    continue
+        existing = PropertyImage.objects.in_bulk(
+            [image_data['airtable_id'] for image_data in images_data], field_name='airtable_id'
+        )
 
-                existing_image = PropertyImage.objects.filter(airtable_id=image_data['airtable_id']).first()
-
-                if existing_image:
-                    changed = False
-                    if existing_image.alt_text != image_data['alt_text']:
-                        existing_image.alt_text = image_data['alt_text']
-                        changed = True
-                    if existing_image.order != image_data['order']:
-                        existing_image.order = image_data['order']
-                        changed = True
-                    file_changed = False
-                    if not no_files and not existing_image.image and image_data.get('image_url'):
-                        success = self.download_and_save_image(existing_image, image_data['image_url'])
-                        if success:
-                            file_changed = True
-
-                    if changed or file_changed:
-                        existing_image.last_synced_at = timezone.now()
-                        existing_image.save()
-                        action = "🔄 Updated"
-                    else:
-                        action = "✅ No changes"
-                    print(f"{action} image for: {property_obj.name} (Order: {image_data['order']})")
-                else:
-                    image_fields = {
-                        'airtable_id': image_data['airtable_id'],
-                        'property': property_obj,
-                        'alt_text': image_data['alt_text'],
-                        'order': image_data['order'],
-                        'attachment_index': image_data['attachment_index'],
-                        'original_record_id': image_data['original_record_id']
-                    }
+        to_create, to_update = [], []
+        downloads = []
+        unchanged = 0
+        for image_data in images_data:
+            property_obj = self.synced_properties.get(image_data['property_id'])
+            if not property_obj:
+                self.record_error('images', image_data['airtable_id'], f"❌ Property not found for image: {image_data['property_id']}")
+                continue
 
-                    image_obj = PropertyImage(**image_fields)
-                    image_obj.last_synced_at = timezone.now()
+            image_fields = {'alt_text': image_data['alt_text'], 'order': image_data['order']}
+            image_obj = existing.get(image_data['airtable_id'])
+            if image_obj is None:
+                image_obj = PropertyImage(
+                    airtable_id=image_data['airtable_id'],
+                    property_id=property_obj.pk,
+                    attachment_index=image_data['attachment_index'],
+                    original_record_id=image_data['original_record_id'],
+                    **image_fields
+                )
+                to_create.append(image_obj)
+            elif self.diff_fields(image_obj, image_fields):
+                to_update.append(image_obj)
+            else:
+                unchanged += 1
 
-                    if not no_files and image_data.get('image_url'):
-                        success = self.download_and_save_image(image_obj, image_data['image_url'])
-                        if success:
-                            print(f"✅ Downloaded image for: {property_obj.name} (Order: {image_data['order']})")
-                        else:
-                            print(f"⚠️ Created image record but failed to download file for: {property_obj.name}")
-                    else:
-                        print(f"✅ Created image record for: {property_obj.name} (Order: {image_data['order']})")
+            if not no_files and needs_download(image_obj, 'image', image_data.get('image_url'),
+                                               image_data.get('image_fingerprint', '')):
+                downloads.append((image_obj, property_obj, image_data))
 
-                    image_obj.save()
-                    print(f"✅ Created image for: {property_obj.name} (Order: {image_data['order']})")
+        self.apply_changes(PropertyImage, to_create, to_update, ['alt_text', 'order'],
+                           unchanged=unchanged, dry_run=dry_run)
+        if dry_run:
+            return
 
-            except Exception as e:
-                print(f"❌ Error syncing image: {str(e)}")
-                continue
+        if to_create:
+            pks = dict(PropertyImage.objects.filter(
+                airtable_id__in=[obj.airtable_id for obj in to_create]
+            ).values_list('airtable_id', 'pk'))
+            for image_obj in to_create:
+                image_obj.pk = pks[image_obj.airtable_id]
+        for image_obj, property_obj, image_data in downloads:
+            self.queue_image_file(image_obj, property_obj, image_data)
 
     def sync_amenities(self, amenities_data, dry_run=False):
         """Sync amenities to Django PropertyAmenity model"""
+        existing = PropertyAmenity.objects.in_bulk(
+            [amenity_data['airtable_id'] for amenity_data in amenities_data], field_name='airtable_id'
+        )
+        # (property, name) is unique, so remember which record holds each pair
+        property_pks = [obj.pk for obj in self.synced_properties.values() if obj.pk]
+        owners = {
+            (property_id, name): airtable_id
+            for property_id, name, airtable_id in PropertyAmenity.objects.filter(
+                property_id__in=property_pks
+            ).values_list('property_id', 'name', 'airtable_id')
+        }
+
+        to_create, to_update = [], []
+        seen = set()
+        unchanged = 0
         for amenity_data in amenities_data:
-            try:
-                if dry_run:
-                    print(f"🔍 Would sync amenity: {amenity_data['name']}")
-                    continue
-
-                property_obj = self.get_property_by_airtable_id(amenity_data['property_id'])
-                if not property_obj:
-                    print(f"❌ Property not found for amenity: {amenity_data['property_id']}")
-                    continue
-
-                amenity_fields = {
-                    'name': amenity_data['name']
-                }
-
-                amenity_obj, created = PropertyAmenity.objects.get_or_create(
-                    airtable_id=amenity_data['airtable_id'],
-                    property=property_obj,
-                    defaults=amenity_fields
-                )
-
-                if created:
-                    amenity_obj.last_synced_at = timezone.now()
-                    amenity_obj.save()
-                    action = "✅ Created"
-                else:
-                    changed = False
-                    if amenity_obj.name != amenity_data['name']:
-                        amenity_obj.name = amenity_data['name']
-                        changed = True
-                    if changed:
-                        amenity_obj.last_synced_at = timezone.now()
-                        amenity_obj.save()
-                        action = "🔄 Updated"
-                    else:
-                        action = "✅ No changes"
-
-                print(f"{action} amenity: {property_obj.name} - {amenity_data['name']}")
-
-            except Exception as e:
-                print(f"❌ Error syncing amenity: {str(e)}")
+            airtable_id = amenity_data['airtable_id']
+            property_obj = self.synced_properties.get(amenity_data['property_id'])
+            if not property_obj:
+                self.record_error('amenities', airtable_id, f"❌ Property not found for amenity: {amenity_data['property_id']}")
                 continue
 
-    def get_property_by_airtable_id(self, airtable_id):
-        """Helper to get Property by Airtable ID"""
-        try:
-            return Property.objects.get(airtable_id=airtable_id)
-        except Property.DoesNotExist:
-            cached_data = cache.get('airtable_data', {})
-            properties = cached_data.get('properties', [])
-            for prop in properties:
-                if prop['airtable_id'] == airtable_id:
-                    try:
-                        return Property.objects.get(slug=prop['slug'])
-                    except Property.DoesNotExist:
-                        return None
-            return None
-
-    def handle_property_files(self, property_obj, prop_data):
-        """Download and save brochure and thumbnail files if not present"""
-        if prop_data.get('brochure_url') and not property_obj.brochure:
-            try:
-                file_content = self.download_file(prop_data['brochure_url'])
-                if file_content:
-                    filename = f"brochure_{property_obj.slug}.pdf"
-                    property_obj.brochure.save(
-                        filename,
-                        ContentFile(file_content),
-                        save=True
-                    )
-                    print(f"📎 Downloaded brochure for: {property_obj.name}")
-            except Exception as e:
-                print(f"⚠️ Failed to download brochure for {property_obj.name}: {str(e)}")
-
-        if prop_data.get('thumbnail_url') and not property_obj.thumbnail:
-            try:
-                file_content = self.download_file(prop_data['thumbnail_url'])
-                if file_content:
-                    filename = f"thumbnail_{property_obj.slug}.jpg"
-                    property_obj.thumbnail.save(
-                        filename,
-                        ContentFile(file_content),
-                        save=True
-                    )
-                    print(f"🖼️ Downloaded thumbnail for: {property_obj.name}")
-            except Exception as e:
-                print(f"⚠️ Failed to download thumbnail for {property_obj.name}: {str(e)}")
-
-    def download_and_save_image(self, image_obj, image_url):
-        """Download and save a PropertyImage"""
-        try:
-            file_content = self.download_file(image_url)
-            if file_content:
-                filename = f"image_{image_obj.property.slug}_{image_obj.order}.jpg"
-                image_obj.image.save(
-                    filename,
-                    ContentFile(file_content),
-                    save=False
-                )
-                return True
-        except Exception as e:
-            print(f"⚠️ Failed to download image: {str(e)}")
-        return False
+            amenity_obj = existing.get(airtable_id)
+            property_key = amenity_obj.property_id if amenity_obj else self.property_key(property_obj)
 
-    def download_file(self, url, timeout=30):
-        """Download file from URL"""
+            key = (property_key, amenity_data['name'])
+            if airtable_id in seen or owners.get(key, airtable_id) != airtable_id:
+                self.record_error('amenities', airtable_id, f"⚠️ Skipping duplicate amenity: {property_obj.name} - {amenity_data['name']}")
+                continue
+            seen.add(airtable_id)
+            if amenity_obj and amenity_obj.name != amenity_data['name']:
+                owners.pop((property_key, amenity_obj.name), None)
+            owners[key] = airtable_id
+
+            if amenity_obj is None:
+                to_create.append(PropertyAmenity(
+                    airtable_id=airtable_id, property_id=property_obj.pk, name=amenity_data['name']
+                ))
+            elif self.diff_fields(amenity_obj, {'name': amenity_data['name']}):
+                to_update.append(amenity_obj)
+            else:
+                unchanged += 1
+
+        self.apply_changes(PropertyAmenity, to_create, to_update, ['name'],
+                           unchanged=unchanged, dry_run=dry_run)
+
+    def queue_property_files(self, property_obj, prop_data):
+        """Queue brochure and thumbnail downloads if missing or changed in Airtable"""
+        for field, filename in (('brochure', 'brochure.pdf'), ('thumbnail', 'thumbnail.jpg')):
+            url = prop_data.get(f'{field}_url')
+            fingerprint = prop_data.get(f'{field}_fingerprint', '')
+            if needs_download(property_obj, field, url, fingerprint):
+                self.pending_downloads.append(DownloadTask(
+                    Property, property_obj.pk, field, filename, url,
+                    label=f"{field} for {property_obj.name}", fingerprint=fingerprint,
+                ))
+
+    def queue_image_file(self, image_obj, property_obj, image_data):
+        """Queue a PropertyImage file download"""
+        self.pending_downloads.append(DownloadTask(
+            PropertyImage, image_obj.pk, 'image', 'image.jpg', image_data['image_url'],
+            label=f"image for {property_obj.name} (Order: {image_obj.order})",
+            fingerprint=image_data.get('image_fingerprint', ''),
+        ))
+
+    def download_media(self, tasks):
+        """
+        Download queued files concurrently and attach each one to its row.
+        Files go into the content-addressed blob store, so a file that is
+        already stored (for any row) is not written again. Rows are updated
+        with queryset.update() so every save is a short, independent write.
+        """
+        instances = {}
+        for model in {task.model for task in tasks}:
+            pks = [task.pk for task in tasks if task.model is model]
+            instances.update({(model, obj.pk): obj for obj in model.objects.filter(pk__in=pks)})
+
+        touched_properties = set()
+        downloader = MediaDownloader()
         try:
-            response = requests.get(url, timeout=timeout)
-            response.raise_for_status()
-            return response.content
-        except requests.RequestException as e:
-            print(f"⚠️ Download failed for {url}: {str(e)}")
-            return None
-
-    def fetch_properties(self, props_table):
+            for task, content in downloader.download_all(tasks):
+                obj = instances.get((task.model, task.pk))
+                if content is None or obj is None:
+                    self.record_error('media', task.url, f"⚠️ Failed to download {task.label}")
+                    continue
+                try:
+                    name, digest = store_blob(content, os.path.splitext(task.filename)[1])
+                    task.model.objects.filter(pk=task.pk).update(**{
+                        task.field: name,
+                        f'{task.field}_fingerprint': task.fingerprint,
+                        f'{task.field}_hash': digest,
+                        'updated_at': timezone.now(),
+                    })
+                    touched_properties.add(obj.pk if task.model is Property else obj.property_id)
+                    if task.field in ('image', 'thumbnail'):
+                        setattr(obj, task.field, name)
+                        refresh_renditions(obj, task.field)
+                    print(f"📎 Downloaded {task.label}")
+                except Exception as e:
+                    self.record_error('media', task.url, f"⚠️ Failed to save {task.label}: {str(e)}")
+        finally:
+            downloader.close()
+            self.bytes_downloaded += downloader.bytes_downloaded
+            self.http_requests += downloader.requests
+            self.http_retries += downloader.retries
+
+        # queryset.update() skips signals, so refresh the image-derived summaries here
+        if touched_properties:
+            refresh_property_summaries(touched_properties)
+
+    def fetch_all_records(self, tables, fetch_options=None):
+        """
+        Fetch every table's records concurrently. Page requests from all
+        workers share one rate limiter, since Airtable's limit is per base.
+        fetch_options maps a table name to extra iterate() arguments.
+        """
+        fetch_options = fetch_options or {}
+        max_workers = config("AIRTABLE_FETCH_WORKERS", default=4, cast=int)
+        rate_limiter = RateLimiter(config("AIRTABLE_REQUESTS_PER_SECOND", default=5, cast=float))
+
+        def fetch_table(name, table):
+            stats = {}
+            table_started = time.monotonic()
+            records = extract_records_from_response(table, rate_limiter, stats, **fetch_options.get(name, {}))
+            return records, stats, time.monotonic() - table_started
+
+        started = time.monotonic()
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='airtable') as executor:
+            futures = {executor.submit(fetch_table, name, table): name for name, table in tables.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                results[name], stats, elapsed = future.result()
+                self.http_requests += stats['requests']
+                self.http_retries += stats['retries']
+                self.phase_timings[f'fetch:{name}'] = round(self.phase_timings.get(f'fetch:{name}', 0) + elapsed, 3)
+                print(f"Retrieved {len(results[name])} {name} records from Airtable in {elapsed:.1f}s")
+
+        print(f"⏱️ Fetched {len(tables)} tables in {time.monotonic() - started:.1f}s")
+        return results
+
+    def process_properties(self, records):
         prop_map = {}
         seen_ids = set()
         processed_count = 0
 
-        records = extract_records_from_response(props_table)
-        print(f"Retrieved {len(records)} property records from Airtable")
-
         if not records:
             print("No property records found!")
             return {}
@@ -549,7 +1131,9 @@ class Command(BaseCommand):
                     'luxury_status': luxury_status,
                     'is_active': is_active,
                     'brochure_url': brochure_att.get("url") if brochure_att else None,
+                    'brochure_fingerprint': attachment_fingerprint(brochure_att),
                     'thumbnail_url': thumb_att.get("url") if thumb_att else None,
+                    'thumbnail_fingerprint': attachment_fingerprint(thumb_att),
                     'completion_date': completion_date
                 }
 
@@ -557,19 +1141,16 @@ class Command(BaseCommand):
                 processed_count += 1
 
             except Exception as e:
-                print(f"Error processing property record {i}: {e}")
+                self.record_error('properties', rec.get('id') if isinstance(rec, dict) else i, f"Error processing property record {i}: {e}")
                 continue
 
         print(f"Successfully processed {processed_count} properties")
         return prop_map
 
-    def fetch_configurations(self, cfgs_table, prop_map):
+    def process_configurations(self, records, property_ids):
         seen_ids = set()
         config_data = []
 
-        records = extract_records_from_response(cfgs_table)
-        print(f"Retrieved {len(records)} configuration records")
-
         for rec in records:
             try:
                 if not isinstance(rec, dict) or 'id' not in rec:
@@ -585,8 +1166,8 @@ class Command(BaseCommand):
                     print(f"Configuration {rid} has no linked property")
                     continue
                 prop_id = linked[0]
-                if prop_id not in prop_map:
-                    print(f"Configuration {rid} links to unknown property {prop_id}")
+                if property_ids is not None and prop_id not in property_ids:
+                    self.record_error('configurations', rid, f"Configuration {rid} links to unknown property {prop_id}")
                     continue
 
                 config = {
@@ -604,18 +1185,15 @@ class Command(BaseCommand):
                 print(f"Processed configuration for property {prop_id}")
 
             except Exception as e:
-                print(f"Error processing configuration {rid}: {e}")
+                self.record_error('configurations', rid, f"Error processing configuration {rid}: {e}")
                 continue
 
         return config_data
 
-    def fetch_images(self, imgs_table, prop_map):
+    def process_images(self, records, property_ids):
         seen_ids = set()
         image_data = []
 
-        records = extract_records_from_response(imgs_table)
-        print(f"Retrieved {len(records)} image records")
-
         for rec in records:
             try:
                 if not isinstance(rec, dict) or 'id' not in rec:
@@ -631,8 +1209,8 @@ class Command(BaseCommand):
                     print(f"Image {rid} has no linked property")
                     continue
                 prop_id = linked[0]
-                if prop_id not in prop_map:
-                    print(f"Image {rid} links to unknown property {prop_id}")
+                if property_ids is not None and prop_id not in property_ids:
+                    self.record_error('images', rid, f"Image {rid} links to unknown property {prop_id}")
                     continue
 
                 attachments = f.get("Image") or []
@@ -650,6 +1228,7 @@ class Command(BaseCommand):
                                 'airtable_id': unique_image_id,
                                 'property_id': prop_id,
                                 'image_url': attachment.get("url"),
+                                'image_fingerprint': attachment_fingerprint(attachment),
                                 'alt_text': f"{alt_text} (Image {i+1})" if len(attachments) > 1 and alt_text else alt_text,
                                 'order': order + i,
                                 'attachment_index': i,
@@ -660,7 +1239,7 @@ class Command(BaseCommand):
                             print(f"Added image {i+1}/{len(attachments)} for property {prop_id}: {attachment.get('url')}")
 
             except Exception as e:
-                print(f"Error processing image {rid}: {e}")
+                self.record_error('images', rid, f"Error processing image {rid}: {e}")
                 import traceback
                 traceback.print_exc()
                 continue
@@ -668,13 +1247,10 @@ class Command(BaseCommand):
         print(f"Total images processed: {len(image_data)}")
         return image_data
 
-    def fetch_amenities(self, amen_table, prop_map):
+    def process_amenities(self, records, property_ids):
         seen_ids = set()
         amenity_data = []
 
-        records = extract_records_from_response(amen_table)
-        print(f"Retrieved {len(records)} amenity records")
-
         for rec in records:
             try:
                 if not isinstance(rec, dict) or 'id' not in rec:
@@ -690,8 +1266,8 @@ class Command(BaseCommand):
                     print(f"Amenity {rid} has no linked property")
                     continue
                 prop_id = linked[0]
-                if prop_id not in prop_map:
-                    print(f"Amenity {rid} links to unknown property {prop_id}")
+                if property_ids is not None and prop_id not in property_ids:
+                    self.record_error('amenities', rid, f"Amenity {rid} links to unknown property {prop_id}")
                     continue
 
                 amenities_text = f.get("Amenities") or f.get("Name") or ""
@@ -711,7 +1287,7 @@ class Command(BaseCommand):
                     print(f"Processed amenity: {amenity_name} for property {prop_id}")
 
             except Exception as e:
-                print(f"Error processing amenity {rid}: {e}")
+                self.record_error('amenities', rid, f"Error processing amenity {rid}: {e}")
                 continue
 
         return amenity_data
\ No newline at end of file
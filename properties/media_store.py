@@ -0,0 +1,77 @@
+import hashlib
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+BLOB_PREFIX = 'blobs'
+
+# Directories that hold media managed by sync and the admin, scanned by gc_media
+MANAGED_PREFIXES = (BLOB_PREFIX, 'property_images', 'property_thumbnails', 'brochures')
+
+
+def attachment_fingerprint(attachment):
+    """Identify an Airtable attachment by id and size ('' when unknown)"""
+    if not attachment or not attachment.get('id'):
+        return ''
+    return f"{attachment['id']}:{attachment.get('size', '')}"
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def blob_name(digest, ext=''):
+    """Storage path for a blob, fanned out so no directory gets too large"""
+    return f"{BLOB_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}"
+
+
+def store_blob(content, ext='', storage=None):
+    """
+    Store content once under its sha256 and return (name, digest).
+    Identical files, from any property or field, share a single blob.
+    """
+    storage = storage or default_storage
+    digest = content_hash(content)
+    name = blob_name(digest, ext)
+    if not storage.exists(name):
+        saved = storage.save(name, ContentFile(content))
+        if saved != name:
+            # Lost a race with another writer; keep the canonical copy
+            storage.delete(saved)
+    return name, digest
+
+
+def walk_storage(prefix, storage=None):
+    """Yield every file name stored under prefix"""
+    storage = storage or default_storage
+    try:
+        directories, files = storage.listdir(prefix)
+    except FileNotFoundError:
+        return
+    for filename in files:
+        yield f"{prefix}/{filename}"
+    for directory in directories:
+        yield from walk_storage(f"{prefix}/{directory}", storage)
+
+
+def referenced_media():
+    """Every storage name currently referenced by a model field"""
+    from .models import Property, PropertyImage
+
+    names = set()
+    for brochure, thumbnail, renditions in Property.objects.values_list('brochure', 'thumbnail', 'thumbnail_renditions'):
+        names.update(name for name in (brochure, thumbnail) if name)
+        names.update(rendition_names(renditions))
+    for image, renditions in PropertyImage.objects.values_list('image', 'renditions'):
+        if image:
+            names.add(image)
+        names.update(rendition_names(renditions))
+    return {os.path.normpath(name) for name in names}
+
+
+def rendition_names(renditions):
+    """Storage names of every rendition in a renditions dict"""
+    for value in (renditions or {}).values():
+        if isinstance(value, dict):
+            yield from value.values()
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:10
+
+from django.db import migrations, models
+
+from properties.geo import encode_geohash
+
+
+def populate_geohash(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    properties = list(Property.objects.filter(latitude__isnull=False, longitude__isnull=False))
+    for prop in properties:
+        prop.geohash = encode_geohash(prop.latitude, prop.longitude)
+    Property.objects.bulk_update(properties, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0017_alter_property_completion_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='geohash',
+            field=models.CharField(blank=True, editable=False, help_text='Geohash of latitude/longitude, kept up to date on save', max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['geohash'], name='properties__geohash_260a12_idx'),
+        ),
+        migrations.RunPython(populate_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:12
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def populate_summaries(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    PropertyConfiguration = apps.get_model('properties', 'PropertyConfiguration')
+    PropertyImage = apps.get_model('properties', 'PropertyImage')
+    PropertyAmenity = apps.get_model('properties', 'PropertyAmenity')
+
+    stats = {
+        row['property']: row
+        for row in PropertyConfiguration.objects.filter(is_available=True).order_by().values('property').annotate(
+            min_price=Min('price'), max_price=Max('price'),
+            min_bedrooms=Min('bedrooms'), max_bedrooms=Max('bedrooms'),
+            min_bathrooms=Min('bathrooms'), max_bathrooms=Max('bathrooms'),
+        )
+    }
+    config_counts = dict(PropertyConfiguration.objects.order_by().values('property')
+                         .annotate(n=Count('id')).values_list('property', 'n'))
+    amenity_counts = dict(PropertyAmenity.objects.order_by().values('property')
+                          .annotate(n=Count('id')).values_list('property', 'n'))
+    image_counts, primary_images = {}, {}
+    for property_id, image in PropertyImage.objects.order_by('property', 'order', 'id').values_list('property', 'image'):
+        image_counts[property_id] = image_counts.get(property_id, 0) + 1
+        primary_images.setdefault(property_id, image or '')
+
+    fields = ['min_price', 'max_price', 'min_bedrooms', 'max_bedrooms', 'min_bathrooms', 'max_bathrooms']
+    properties = list(Property.objects.all())
+    for prop in properties:
+        row = stats.get(prop.pk, {})
+        for field in fields:
+            setattr(prop, field, row.get(field))
+        prop.configuration_count = config_counts.get(prop.pk, 0)
+        prop.image_count = image_counts.get(prop.pk, 0)
+        prop.amenity_count = amenity_counts.get(prop.pk, 0)
+        prop.primary_image = primary_images.get(prop.pk, '')
+    Property.objects.bulk_update(
+        properties,
+        fields + ['configuration_count', 'image_count', 'amenity_count', 'primary_image'],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0018_property_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='amenity_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='configuration_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='image_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='max_bathrooms',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='max_bedrooms',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='max_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, help_text='Highest price among available configurations', max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='min_bathrooms',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='min_bedrooms',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='min_price',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, help_text='Lowest price among available configurations', max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='primary_image',
+            field=models.CharField(blank=True, editable=False, help_text='Storage path of the first image by order', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['min_price'], name='properties__min_pri_7e23e8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['max_price'], name='properties__max_pri_49a83e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['min_bedrooms'], name='properties__min_bed_38c45c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['max_bedrooms'], name='properties__max_bed_912f8e_idx'),
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
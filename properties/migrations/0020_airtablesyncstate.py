@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0019_property_summary_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AirtableSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(choices=[('properties', 'Properties'), ('configurations', 'Configurations'), ('images', 'Images'), ('amenities', 'Amenities')], max_length=20, unique=True)),
+                ('last_modified_at', models.DateTimeField(blank=True, help_text='Latest Airtable Last Modified value applied', null=True)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+                ('last_reconciled_at', models.DateTimeField(blank=True, help_text='Last time deleted Airtable records were removed', null=True)),
+                ('records_synced', models.PositiveIntegerField(default=0, help_text='Records fetched by the last sync')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['table'],
+            },
+        ),
+    ]
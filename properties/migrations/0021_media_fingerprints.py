@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0020_airtablesyncstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='brochure_fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='Airtable attachment id and size of the brochure', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='brochure_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='thumbnail_fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='Airtable attachment id and size of the thumbnail', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='thumbnail_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='image_fingerprint',
+            field=models.CharField(blank=True, editable=False, help_text='Airtable attachment id and size of the image', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='image_hash',
+            field=models.CharField(blank=True, editable=False, help_text='sha256 of the stored file', max_length=64),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0021_media_fingerprints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='thumbnail_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized WebP/AVIF copies of the thumbnail'),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized WebP/AVIF copies of the image'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0023_background_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='airtablesynclog',
+            name='bytes_downloaded',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='airtablesynclog',
+            name='http_requests',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='airtablesynclog',
+            name='http_retries',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='airtablesynclog',
+            name='phase_timings',
+            field=models.JSONField(blank=True, default=dict, help_text='Wall time in seconds per phase'),
+        ),
+        migrations.AddField(
+            model_name='airtablesynclog',
+            name='records_per_second',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
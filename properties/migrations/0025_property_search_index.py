@@ -0,0 +1,64 @@
+from django.db import DatabaseError, migrations
+
+# The DDL is inlined rather than imported from properties.search, so later
+# changes there do not change what this migration does.
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS properties_search USING fts5("
+    "name, address, description, amenities, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS properties_search_vocab USING fts5vocab(properties_search, 'row')",
+    "INSERT INTO properties_search (rowid, name, address, description, amenities) "
+    "SELECT p.id, p.name, p.address, p.description, COALESCE("
+    "(SELECT group_concat(a.name, ' ') FROM properties_propertyamenity a WHERE a.property_id = p.id), '') "
+    "FROM properties_property p",
+]
+POSTGRESQL_CREATE = [
+    "CREATE TABLE IF NOT EXISTS properties_search ("
+    "property_id bigint PRIMARY KEY REFERENCES properties_property(id) ON DELETE CASCADE, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS properties_search_document ON properties_search USING GIN (document)",
+    "INSERT INTO properties_search (property_id, document) "
+    "SELECT p.id, "
+    "setweight(to_tsvector('simple', coalesce(p.name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(p.address, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce("
+    "(SELECT string_agg(a.name, ' ') FROM properties_propertyamenity a WHERE a.property_id = p.id), '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(p.description, '')), 'D') "
+    "FROM properties_property p",
+]
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        statements = SQLITE_CREATE
+    elif connection.vendor == 'postgresql':
+        statements = POSTGRESQL_CREATE
+    else:
+        # Other databases fall back to icontains
+        return
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(statements[0])
+        except DatabaseError:
+            # SQLite built without FTS5; search falls back to icontains
+            return
+        for statement in statements[1:]:
+            cursor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS properties_search_vocab")
+        cursor.execute("DROP TABLE IF EXISTS properties_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0024_sync_log_metrics'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
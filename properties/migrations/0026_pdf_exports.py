@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0025_property_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyPDFExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('property_ids', models.JSONField(default=list, help_text='Properties to export, in document order')),
+                ('format', models.CharField(choices=[('zip', 'ZIP of PDFs'), ('pdf', 'Single PDF')], default='zip', max_length=10)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('rendered', models.PositiveIntegerField(default=0)),
+                ('file_path', models.CharField(blank=True, help_text='Finished export on disk', max_length=500)),
+                ('file_size', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pdf_exports', to=settings.AUTH_USER_MODEL)),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pdf_exports', to='properties.backgroundjob')),
+                ('shared_list', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pdf_exports', to='properties.sharedpropertylist')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
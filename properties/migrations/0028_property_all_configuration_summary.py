@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-17 05:40
+
+from django.db import migrations, models
+from django.db.models import Max, Min, Q
+
+
+def populate_all_configuration_summaries(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    PropertyConfiguration = apps.get_model('properties', 'PropertyConfiguration')
+
+    stats = {
+        row['property']: row
+        for row in PropertyConfiguration.objects.order_by().values('property').annotate(
+            min_price=Min('price', filter=Q(price__gt=0)), max_bedrooms=Max('bedrooms'),
+        )
+    }
+    properties = list(Property.objects.all())
+    for prop in properties:
+        row = stats.get(prop.pk, {})
+        prop.min_price_all = row.get('min_price')
+        prop.max_bedrooms_all = row.get('max_bedrooms')
+    Property.objects.bulk_update(properties, ['min_price_all', 'max_bedrooms_all'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0027_background_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='max_bedrooms_all',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='min_price_all',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, help_text='Lowest price among all configurations', max_digits=12, null=True),
+        ),
+        migrations.RunPython(populate_all_configuration_summaries, migrations.RunPython.noop),
+    ]
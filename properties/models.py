@@ -3,10 +3,15 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import User
 from django.utils.crypto import get_random_string
 from django.utils import timezone
+from django.utils.text import slugify
+from django.core.files.storage import default_storage
 from datetime import timedelta
 import uuid
 import os
 import os
+
+from .geo import encode_geohash
+
 def property_image_path(instance, filename):
     """Generate upload path for property images"""
     ext = filename.split('.')[-1]
@@ -53,10 +58,22 @@ class Property(models.Model):
         validators=[MinValueValidator(-180), MaxValueValidator(180)],
         null=True, blank=True
     )
+    geohash = models.CharField(max_length=12, blank=True, editable=False,
+                               help_text="Geohash of latitude/longitude, kept up to date on save")
     contact_name = models.CharField(max_length=100, blank=True)
     contact_phone = models.CharField(max_length=20, blank=True)
     brochure = models.FileField(upload_to=brochure_path, blank=True, null=True)
     thumbnail = models.ImageField(upload_to=property_thumbnail_path, blank=True, null=True)
+
+    # Source of the synced files, used to skip downloads that have not changed
+    brochure_fingerprint = models.CharField(max_length=100, blank=True, editable=False,
+                                            help_text="Airtable attachment id and size of the brochure")
+    brochure_hash = models.CharField(max_length=64, blank=True, editable=False)
+    thumbnail_fingerprint = models.CharField(max_length=100, blank=True, editable=False,
+                                             help_text="Airtable attachment id and size of the thumbnail")
+    thumbnail_hash = models.CharField(max_length=64, blank=True, editable=False)
+    thumbnail_renditions = models.JSONField(default=dict, blank=True, editable=False,
+                                            help_text="Resized WebP/AVIF copies of the thumbnail")
     
     # Status fields
     is_active = models.BooleanField(default=True)
@@ -73,6 +90,25 @@ class Property(models.Model):
                                           help_text="Last time this was synced from Airtable")
     completion_date = models.DateField(null=True, blank=True, db_index=True)  # New field
 
+    # Denormalized summary of related rows, maintained by refresh_property_summaries()
+    min_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True, editable=False,
+                                    help_text="Lowest price among available configurations")
+    max_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True, editable=False,
+                                    help_text="Highest price among available configurations")
+    min_bedrooms = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    max_bedrooms = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    min_bathrooms = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    max_bathrooms = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # Over every configuration, sold or not, for the compare table and PDFs
+    min_price_all = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True, editable=False,
+                                        help_text="Lowest price among all configurations")
+    max_bedrooms_all = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    configuration_count = models.PositiveIntegerField(default=0, editable=False)
+    image_count = models.PositiveIntegerField(default=0, editable=False)
+    amenity_count = models.PositiveIntegerField(default=0, editable=False)
+    primary_image = models.CharField(max_length=255, blank=True, editable=False,
+                                     help_text="Storage path of the first image by order")
+
     class Meta:
         verbose_name_plural = "Properties"
         ordering = ['-created_at']
@@ -81,35 +117,62 @@ class Property(models.Model):
             models.Index(fields=['slug']),
             models.Index(fields=['is_active']),
             models.Index(fields=['luxury_status']),
+            models.Index(fields=['geohash']),
+            models.Index(fields=['min_price']),
+            models.Index(fields=['max_price']),
+            models.Index(fields=['min_bedrooms']),
+            models.Index(fields=['max_bedrooms']),
         ]
 
+    SUMMARY_FIELDS = [
+        'min_price', 'max_price', 'min_bedrooms', 'max_bedrooms',
+        'min_bathrooms', 'max_bathrooms', 'min_price_all', 'max_bedrooms_all', 'configuration_count',
+        'image_count', 'amenity_count', 'primary_image',
+    ]
+
     def __str__(self):
         return self.name
 
+    def compute_geohash(self):
+        """Geohash for the current coordinates (empty when unknown)"""
+        if self.latitude is None or self.longitude is None:
+            return ''
+        return encode_geohash(self.latitude, self.longitude)
+
     def save(self, *args, **kwargs):
         if not self.slug:
             from django.utils.text import slugify
             self.slug = slugify(self.name)
+        self.geohash = self.compute_geohash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
         super().save(*args, **kwargs)
 
     def get_min_price(self):
         """Get minimum price from configurations"""
-        configs = self.configurations.filter(price__isnull=False)
-        if configs:
-            return min(config.price for config in configs if config.price)
-        return None
+        return self.min_price_all
 
     def get_max_bedrooms(self):
         """Get maximum bedrooms from configurations"""
-        configs = self.configurations.all()
-        if configs:
-            return max(config.bedrooms for config in configs)
-        return 0
+        return self.max_bedrooms_all or 0
 
     def get_primary_image(self):
         """Get the first image (order 0) or first available image"""
         return self.images.order_by('order').first()
 
+    @property
+    def primary_image_url(self):
+        """URL of the primary image from the summary column"""
+        if self.primary_image:
+            return default_storage.url(self.primary_image)
+        return None
+
+    def refresh_summary(self):
+        """Recompute the summary columns for this property"""
+        refresh_property_summaries([self.pk])
+        self.refresh_from_db(fields=Property.SUMMARY_FIELDS)
+
     def get_available_configurations(self):
         """Get only available configurations"""
         return self.configurations.filter(is_available=True)
@@ -169,6 +232,12 @@ class PropertyImage(models.Model):
     
     # Core fields
     image = models.ImageField(upload_to=property_image_path)
+    image_fingerprint = models.CharField(max_length=100, blank=True, editable=False,
+                                         help_text="Airtable attachment id and size of the image")
+    image_hash = models.CharField(max_length=64, blank=True, editable=False,
+                                  help_text="sha256 of the stored file")
+    renditions = models.JSONField(default=dict, blank=True, editable=False,
+                                  help_text="Resized WebP/AVIF copies of the image")
     alt_text = models.CharField(max_length=200, blank=True)
     order = models.PositiveIntegerField(default=0)
     
@@ -231,10 +300,85 @@ class PropertyAmenity(models.Model):
         return f"{self.property.name} - {self.name}"
 
 
+def refresh_property_summaries(property_ids=None):
+    """
+    Recompute the denormalized summary columns on Property.
+    Pass property_ids to limit the refresh; None refreshes every property.
+    Returns the number of properties whose summary changed.
+    """
+    properties = Property.objects.all()
+    configurations = PropertyConfiguration.objects.all()
+    images = PropertyImage.objects.all()
+    amenities = PropertyAmenity.objects.all()
+    if property_ids is not None:
+        property_ids = list(property_ids)
+        properties = properties.filter(pk__in=property_ids)
+        configurations = configurations.filter(property_id__in=property_ids)
+        images = images.filter(property_id__in=property_ids)
+        amenities = amenities.filter(property_id__in=property_ids)
+
+    available_stats = {
+        row['property']: row
+        for row in configurations.filter(is_available=True).order_by().values('property').annotate(
+            min_price=models.Min('price'),
+            max_price=models.Max('price'),
+            min_bedrooms=models.Min('bedrooms'),
+            max_bedrooms=models.Max('bedrooms'),
+            min_bathrooms=models.Min('bathrooms'),
+            max_bathrooms=models.Max('bathrooms'),
+        )
+    }
+    all_stats = {
+        row['property']: row
+        for row in configurations.order_by().values('property').annotate(
+            n=models.Count('id'),
+            # Unpriced (null or zero) configurations have no price to show
+            min_price=models.Min('price', filter=models.Q(price__gt=0)),
+            max_bedrooms=models.Max('bedrooms'),
+        )
+    }
+    amenity_counts = dict(
+        amenities.order_by().values('property').annotate(n=models.Count('id')).values_list('property', 'n')
+    )
+    image_counts = {}
+    primary_images = {}
+    for property_id, image in images.order_by('property', 'order', 'id').values_list('property', 'image'):
+        image_counts[property_id] = image_counts.get(property_id, 0) + 1
+        primary_images.setdefault(property_id, image or '')
+
+    changed = []
+    for prop in properties.only('id', *Property.SUMMARY_FIELDS):
+        stats = available_stats.get(prop.pk, {})
+        totals = all_stats.get(prop.pk, {})
+        summary = {
+            'min_price': stats.get('min_price'),
+            'max_price': stats.get('max_price'),
+            'min_bedrooms': stats.get('min_bedrooms'),
+            'max_bedrooms': stats.get('max_bedrooms'),
+            'min_bathrooms': stats.get('min_bathrooms'),
+            'max_bathrooms': stats.get('max_bathrooms'),
+            'min_price_all': totals.get('min_price'),
+            'max_bedrooms_all': totals.get('max_bedrooms'),
+            'configuration_count': totals.get('n', 0),
+            'image_count': image_counts.get(prop.pk, 0),
+            'amenity_count': amenity_counts.get(prop.pk, 0),
+            'primary_image': primary_images.get(prop.pk, ''),
+        }
+        if any(getattr(prop, field) != value for field, value in summary.items()):
+            for field, value in summary.items():
+                setattr(prop, field, value)
+            changed.append(prop)
+
+    Property.objects.bulk_update(changed, Property.SUMMARY_FIELDS, batch_size=500)
+    return len(changed)
+
+
 # Additional model for tracking sync status
 class AirtableSyncLog(models.Model):
     SYNC_TYPES = (
         ('full', 'Full Sync'),
+        ('incremental', 'Incremental Sync'),
+        ('reconcile', 'Reconcile Deletions'),
         ('properties', 'Properties Only'),
         ('configurations', 'Configurations Only'),
         ('images', 'Images Only'),
@@ -252,6 +396,9 @@ class AirtableSyncLog(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='started')
     started_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    phase = models.CharField(max_length=50, blank=True, help_text="Current step of a running sync")
+    job = models.ForeignKey('BackgroundJob', on_delete=models.SET_NULL, null=True, blank=True,
+                            related_name='sync_logs')
     
     # Statistics
     properties_processed = models.PositiveIntegerField(default=0)
@@ -262,6 +409,13 @@ class AirtableSyncLog(models.Model):
     # Error tracking
     errors_count = models.PositiveIntegerField(default=0)
     error_details = models.JSONField(default=list, blank=True)
+
+    # Performance
+    phase_timings = models.JSONField(default=dict, blank=True, help_text="Wall time in seconds per phase")
+    records_per_second = models.FloatField(null=True, blank=True)
+    bytes_downloaded = models.BigIntegerField(default=0)
+    http_requests = models.PositiveIntegerField(default=0)
+    http_retries = models.PositiveIntegerField(default=0)
     
     # Additional info
     notes = models.TextField(blank=True)
@@ -289,7 +443,91 @@ class AirtableSyncLog(models.Model):
         """Get total records processed across all types"""
         return (self.properties_processed + self.configurations_processed + 
                 self.images_processed + self.amenities_processed)
-    
+
+
+class BackgroundJob(models.Model):
+    """
+    A unit of work queued by a request and run by the run_jobs worker.
+    Jobs sharing a dedupe_key cannot be queued or running at the same time.
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+    ACTIVE_STATUSES = ('queued', 'running')
+
+    name = models.CharField(max_length=100, help_text="Registered job handler, e.g. sync_airtable")
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    dedupe_key = models.CharField(max_length=100, blank=True, null=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='background_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True,
+                                        help_text="Last time the worker running this job reported in")
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='unique_active_job_dedupe_key',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    def duration(self):
+        """Get run duration"""
+        if self.started_at and self.finished_at:
+            return self.finished_at - self.started_at
+        return None
+
+    def error_summary(self):
+        """Last line of the error (the exception message of a traceback), or None"""
+        lines = self.error.strip().splitlines()
+        return lines[-1] if lines else None
+
+
+class AirtableSyncState(models.Model):
+    """Per-table high-water mark used by incremental Airtable syncs"""
+    TABLE_CHOICES = (
+        ('properties', 'Properties'),
+        ('configurations', 'Configurations'),
+        ('images', 'Images'),
+        ('amenities', 'Amenities'),
+    )
+
+    table = models.CharField(max_length=20, choices=TABLE_CHOICES, unique=True)
+    last_modified_at = models.DateTimeField(null=True, blank=True,
+                                            help_text="Latest Airtable Last Modified value applied")
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    last_reconciled_at = models.DateTimeField(null=True, blank=True,
+                                              help_text="Last time deleted Airtable records were removed")
+    records_synced = models.PositiveIntegerField(default=0, help_text="Records fetched by the last sync")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['table']
+
+    def __str__(self):
+        return f"{self.get_table_display()} sync state"
+
+
 class SharedPropertyList(models.Model):
     """Model for sharing selected properties with temporary links"""
     name = models.CharField(max_length=200, help_text="Name for this shared list")
@@ -319,6 +557,55 @@ class SharedPropertyList(models.Model):
     def __str__(self):
         return f"{self.name} - {self.token[:8]}..."
 
+
+class PropertyPDFExport(models.Model):
+    """
+    PDFs of many properties (a shared list or any selection) rendered by the
+    export_pdfs background job into one ZIP or merged PDF.
+    """
+    FORMAT_CHOICES = (
+        ('zip', 'ZIP of PDFs'),
+        ('pdf', 'Single PDF'),
+    )
+
+    job = models.ForeignKey('BackgroundJob', on_delete=models.SET_NULL, null=True, blank=True,
+                            related_name='pdf_exports')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='pdf_exports')
+    shared_list = models.ForeignKey(SharedPropertyList, on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='pdf_exports')
+    property_ids = models.JSONField(default=list, help_text="Properties to export, in document order")
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='zip')
+
+    # Progress
+    total = models.PositiveIntegerField(default=0)
+    rendered = models.PositiveIntegerField(default=0)
+
+    # Result
+    file_path = models.CharField(max_length=500, blank=True, help_text="Finished export on disk")
+    file_size = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"PDF export #{self.pk} ({len(self.property_ids)} properties)"
+
+    @property
+    def status(self):
+        if self.completed_at:
+            # prune_pdf_exports deletes old files
+            return 'completed' if self.file_path else 'expired'
+        return self.job.status if self.job else 'failed'
+
+    @property
+    def download_name(self):
+        name = slugify(self.shared_list.name) if self.shared_list else 'properties'
+        return f"{name or 'properties'}-{self.pk}.{self.format}"
+
+
 class UserProfile(models.Model):
     """Extended user profile for employee management"""
     ROLE_CHOICES = (
@@ -0,0 +1,110 @@
+import base64
+import datetime
+import json
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+DEFAULT_ORDERING = ('-created_at', '-id')
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def get_page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Parse a requested page size, clamped to 1..MAX_PAGE_SIZE"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _encode_value(value):
+    # Full isoformat keeps microseconds, which keyset comparisons rely on
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f'Cannot encode {type(value).__name__} in a cursor')
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=_encode_value).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, model, ordering):
+    """Decode a cursor into python values matching the ordering fields"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f'Invalid cursor: {e}')
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise InvalidCursor('Cursor does not match ordering')
+
+    decoded = []
+    for name, value in zip(ordering, values):
+        # Ordering values are never null, and a cursor only ever holds scalars
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise InvalidCursor(f'Invalid cursor value for {name}')
+        try:
+            field = model._meta.get_field(name.lstrip('-'))
+        except FieldDoesNotExist:
+            decoded.append(value)
+            continue
+        try:
+            decoded.append(field.to_python(value))
+        except (ValidationError, TypeError, ValueError) as e:
+            raise InvalidCursor(f'Invalid cursor value for {name}: {e}')
+    return decoded
+
+
+def _keyset_filter(ordering, values):
+    """
+    Build the "comes after" condition for a keyset position, e.g. for
+    ('-created_at', '-id'): created_at < v0 OR (created_at = v0 AND id < v1)
+    """
+    condition = Q()
+    for i, name in enumerate(ordering):
+        field = name.lstrip('-')
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        branch = Q(**{f'{field}__{lookup}': values[i]})
+        for prev_name, prev_value in zip(ordering[:i], values[:i]):
+            branch &= Q(**{prev_name.lstrip('-'): prev_value})
+        condition |= branch
+    return condition
+
+
+def keyset_paginate(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, ordering=DEFAULT_ORDERING):
+    """
+    Return (items, next_cursor) for one page of a queryset ordered by
+    `ordering`. The last field must be unique so positions are stable.
+    next_cursor is None on the last page. Raises InvalidCursor.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, queryset.model, ordering)
+        queryset = queryset.filter(_keyset_filter(ordering, values))
+
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, name.lstrip('-')) for name in ordering])
+    return items, next_cursor
+
+
+def next_page_query(request, next_cursor):
+    """Current query string with the cursor replaced, for "load more" links"""
+    if not next_cursor:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = next_cursor
+    return params.urlencode()
@@ -0,0 +1,726 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import requests
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max
+from PIL import Image as PILImage, ImageOps
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Image, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from .models import Property, PropertyAmenity, PropertyConfiguration, PropertyImage
+
+logger = logging.getLogger(__name__)
+
+# Width and height of the per-property image in comparison PDFs
+COMPARISON_IMAGE_SIZE = (240, 160)
+# Bump when the PDF layout changes so cached documents are rendered again
+PDF_LAYOUT_VERSION = 1
+# Longer id lists are hashed in the document name, which must fit NAME_MAX
+MAX_DOCUMENT_NAME_IDS = 120
+# Lists the property ids of a document whose name is hashed
+DOCUMENT_IDS_FILENAME = 'ids.json'
+
+_image_caches = {}
+_image_caches_lock = threading.Lock()
+
+
+def pdf_settings():
+    options = {
+        'MAX_IMAGE_WIDTH': 400,
+        'MAX_IMAGE_HEIGHT': 300,
+        'IMAGE_QUALITY': 85,
+        'REQUEST_TIMEOUT': 10,
+        'IMAGE_CACHE_ROOT': os.path.join(settings.VAR_DIR, 'pdf_images'),
+        'MEMORY_CACHE_SIZE': 64,
+        'FETCH_WORKERS': 4,
+        'ARTIFACT_ROOT': os.path.join(settings.VAR_DIR, 'pdfs'),
+        'EXPORT_ROOT': os.path.join(settings.VAR_DIR, 'exports'),
+        'EXPORT_WORKERS': min(os.cpu_count() or 1, 4),
+        'EXPORT_MAX_PROPERTIES': 500,
+        'EXPORT_MAX_AGE': 7 * 24 * 60 * 60,
+        'SPOOL_MAX_SIZE': 1024 * 1024,
+    }
+    options.update(getattr(settings, 'PDF_SETTINGS', {}))
+    return options
+
+
+class PDFImageCache:
+    """
+    PDF-ready JPEGs kept in a small in-process LRU in front of a directory
+    shared by every worker. Entries never change for a given key, so the
+    disk copy needs no invalidation; delete the directory to reclaim space.
+    """
+
+    def __init__(self, root, max_entries):
+        self.root = root
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], f'{key}.jpg')
+
+    def _remember(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """(jpeg bytes, width, height) or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+            width, height = PILImage.open(BytesIO(data)).size
+        except (OSError, PILImage.UnidentifiedImageError):
+            return None
+        entry = (data, width, height)
+        self._remember(key, entry)
+        return entry
+
+    def set(self, key, entry):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(entry[0])
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache PDF image {key}: {e}")
+        self._remember(key, entry)
+
+
+def get_image_cache():
+    options = pdf_settings()
+    root = options['IMAGE_CACHE_ROOT']
+    with _image_caches_lock:
+        if root not in _image_caches:
+            _image_caches[root] = PDFImageCache(root, options['MEMORY_CACHE_SIZE'])
+        return _image_caches[root]
+
+
+def _image_key(source, digest, max_width, max_height, quality):
+    """Cache key from the image's content hash (or storage name) and target size"""
+    identity = digest or source
+    return hashlib.sha256(f'{identity}:{max_width}x{max_height}:q{quality}'.encode()).hexdigest()
+
+
+@contextmanager
+def _open_source(source, timeout):
+    """
+    Readable file for a storage name, or for an absolute URL for images kept
+    elsewhere. Downloads are spooled to disk past SPOOL_MAX_SIZE so a large
+    original is never held in memory whole.
+    """
+    if not source.startswith(('http://', 'https://')):
+        with default_storage.open(source, 'rb') as f:
+            yield f
+        return
+    with requests.get(source, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        with tempfile.SpooledTemporaryFile(max_size=pdf_settings()['SPOOL_MAX_SIZE']) as f:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                f.write(chunk)
+            f.seek(0)
+            yield f
+
+
+def render_pdf_image(fp, max_width, max_height, quality):
+    """Downscale an image file to fit the box and encode it as RGB JPEG"""
+    img = PILImage.open(fp)
+    # Lets the JPEG decoder skip detail we would throw away anyway
+    img.draft('RGB', (max_width, max_height))
+    img = ImageOps.exif_transpose(img)
+    img.thumbnail((max_width, max_height), PILImage.Resampling.LANCZOS)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue(), img.width, img.height
+
+
+def load_pdf_image(source, digest='', max_width=None, max_height=None):
+    """
+    PDF-ready (jpeg bytes, width, height) for a storage name or URL, resized
+    once and then served from the cache. None if the image can't be read.
+    """
+    if not source:
+        return None
+    options = pdf_settings()
+    max_width = max_width or options['MAX_IMAGE_WIDTH']
+    max_height = max_height or options['MAX_IMAGE_HEIGHT']
+    cache = get_image_cache()
+    key = _image_key(source, digest, max_width, max_height, options['IMAGE_QUALITY'])
+    entry = cache.get(key)
+    if entry is None:
+        try:
+            with _open_source(source, options['REQUEST_TIMEOUT']) as f:
+                entry = render_pdf_image(f, max_width, max_height, options['IMAGE_QUALITY'])
+        except Exception as e:
+            logger.warning(f"Error processing image {source}: {e}")
+            return None
+        cache.set(key, entry)
+    return entry
+
+
+def load_pdf_images(sources, max_width=None, max_height=None):
+    """load_pdf_image for many (source, digest) pairs at once, fetched concurrently"""
+    sources = list(sources)
+    workers = min(pdf_settings()['FETCH_WORKERS'], len(sources))
+    if workers <= 1:
+        return [load_pdf_image(source, digest, max_width, max_height) for source, digest in sources]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda pair: load_pdf_image(pair[0], pair[1], max_width, max_height), sources))
+
+
+def pdf_image(entry):
+    """ReportLab flowable for a load_pdf_image result"""
+    data, width, height = entry
+    return Image(BytesIO(data), width=width, height=height)
+
+
+def _custom_styles(sheet):
+    """The custom paragraph styles, derived from the sample style sheet"""
+    return [
+        ParagraphStyle(
+            name='PropertyTitle',
+            parent=sheet['Heading1'],
+            fontSize=24,
+            spaceAfter=20,
+            textColor=colors.HexColor('#1f2937'),
+            alignment=TA_CENTER
+        ),
+        ParagraphStyle(
+            name='SectionHeader',
+            parent=sheet['Heading2'],
+            fontSize=16,
+            spaceBefore=20,
+            spaceAfter=12,
+            textColor=colors.HexColor('#374151'),
+            borderWidth=1,
+            borderColor=colors.HexColor('#e5e7eb'),
+            borderPadding=8,
+            backColor=colors.HexColor('#f9fafb')
+        ),
+        ParagraphStyle(
+            name='PropertyInfo',
+            parent=sheet['Normal'],
+            fontSize=11,
+            spaceAfter=6,
+            textColor=colors.HexColor('#4b5563')
+        ),
+    ]
+
+
+def build_pdf_styles():
+    """A fresh read-only name -> ParagraphStyle mapping (see get_pdf_styles)"""
+    sheet = getSampleStyleSheet()
+    for style in _custom_styles(sheet):
+        sheet.add(style)
+    return MappingProxyType(dict(sheet.byName))
+
+
+@lru_cache(maxsize=None)
+def get_pdf_styles():
+    """Paragraph styles shared by every PDF, built once per process"""
+    return build_pdf_styles()
+
+
+# Table templates shared by every PDF; TableStyle only holds commands, so
+# one instance can style any number of tables
+_GRID = ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb'))
+_STRIPES = [colors.white, colors.HexColor('#f9fafb')]
+
+
+def _padding(horizontal, vertical):
+    return [
+        ('LEFTPADDING', (0, 0), (-1, -1), horizontal),
+        ('RIGHTPADDING', (0, 0), (-1, -1), horizontal),
+        ('TOPPADDING', (0, 0), (-1, -1), vertical),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), vertical),
+    ]
+
+
+INFO_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('ROWBACKGROUNDS', (0, 0), (-1, -1), _STRIPES),
+    _GRID,
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    *_padding(8, 8),
+])
+
+
+def _header_table_style(align):
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#374151')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), align),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), _STRIPES),
+        _GRID,
+        *_padding(6, 8),
+    ])
+
+
+CONFIGURATION_TABLE_STYLE = _header_table_style('CENTER')
+COMPARISON_TABLE_STYLE = _header_table_style('LEFT')
+
+DETAILS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    _GRID,
+    *_padding(6, 6),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+COMPACT_CONFIGURATION_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4b5563')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    _GRID,
+    *_padding(4, 6),
+])
+
+
+def styled_table(rows, col_widths, style):
+    table = Table(rows, colWidths=col_widths)
+    table.setStyle(style)
+    return table
+
+
+def _price(price):
+    return f"₦{price:,.0f}" if price else "On Request"
+
+
+def info_table(rows):
+    """Two-column label/value table"""
+    return styled_table(rows, [2*inch, 4*inch], INFO_TABLE_STYLE)
+
+
+def details_table(rows):
+    """Narrower label/value table used in comparisons"""
+    return styled_table(rows, [1.5*inch, 5*inch], DETAILS_TABLE_STYLE)
+
+
+def configuration_table(configurations):
+    """Every configuration of a property with its price and availability"""
+    rows = [['Type', 'Bedrooms', 'Bathrooms', 'Sq. Ft.', 'Price', 'Available']]
+    for config in configurations:
+        rows.append([
+            config.type,
+            str(config.bedrooms),
+            str(config.bathrooms),
+            f"{config.square_footage:,}",
+            _price(config.price),
+            "Yes" if config.is_available else "No"
+        ])
+    return styled_table(rows, [1.2*inch, 0.8*inch, 0.8*inch, 0.8*inch, 1.2*inch, 0.8*inch],
+                        CONFIGURATION_TABLE_STYLE)
+
+
+def compact_configuration_table(configurations):
+    """Configurations without availability, for comparison pages"""
+    rows = [['Type', 'Bed', 'Bath', 'Sq.Ft', 'Price']]
+    for config in configurations:
+        rows.append([
+            config.type,
+            str(config.bedrooms),
+            str(config.bathrooms),
+            f"{config.square_footage:,}",
+            _price(config.price)
+        ])
+    return styled_table(rows, [1.3*inch, 0.6*inch, 0.6*inch, 0.8*inch, 1.2*inch],
+                        COMPACT_CONFIGURATION_TABLE_STYLE)
+
+
+def comparison_table(properties):
+    """One overview row per property"""
+    rows = [['Property', 'Address', 'Luxury', 'Min Price', 'Max Bedrooms']]
+    for prop in properties:
+        rows.append([
+            prop.name[:25] + ('...' if len(prop.name) > 25 else ''),
+            prop.address[:30] + ('...' if len(prop.address) > 30 else ''),
+            '★ Luxury' if prop.luxury_status == 'luxurious' else 'Standard',
+            _price(prop.get_min_price()),
+            str(prop.get_max_bedrooms())
+        ])
+    return styled_table(rows, [1.5*inch, 2*inch, 1*inch, 1.2*inch, 1*inch], COMPARISON_TABLE_STYLE)
+
+
+class PropertyPDFGenerator:
+    """Utility class for generating property PDFs with professional styling"""
+
+    def __init__(self):
+        self.styles = get_pdf_styles()
+
+    def _property_story(self, property_obj):
+        """Flowables describing one property"""
+        story = []
+        
+        # Header with company info
+        story.append(Paragraph("Real Estate Properties", self.styles['PropertyTitle']))
+        story.append(Spacer(1, 0.2*inch))
+        
+        # Property name and luxury status
+        title_text = property_obj.name
+        if property_obj.luxury_status == 'luxurious':
+            title_text += " ★ LUXURY PROPERTY"
+        story.append(Paragraph(title_text, self.styles['Heading1']))
+        story.append(Spacer(1, 0.2*inch))
+        
+        # Property images
+        if property_obj.images.exists():
+            story.append(Paragraph("Property Images", self.styles['SectionHeader']))
+            
+            # Add main image
+            main_image = property_obj.get_primary_image()
+            if main_image:
+                img = load_pdf_image(main_image.image.name, main_image.image_hash)
+                if img:
+                    story.append(pdf_image(img))
+                    story.append(Spacer(1, 0.1*inch))
+        
+        # Basic information table
+        story.append(Paragraph("Property Information", self.styles['SectionHeader']))
+        
+        basic_info = [
+            ['Property Name:', property_obj.name],
+            ['Address:', property_obj.address],
+            ['Luxury Status:', 'Luxurious' if property_obj.luxury_status == 'luxurious' else 'Standard'],
+            ['Contact:', property_obj.contact_name or 'Available on request'],
+            ['Phone:', property_obj.contact_phone or 'Available on request'],
+        ]
+        
+        story.append(info_table(basic_info))
+        story.append(Spacer(1, 0.2*inch))
+        
+        # Description
+        if property_obj.description:
+            story.append(Paragraph("Description", self.styles['SectionHeader']))
+            story.append(Paragraph(property_obj.description, self.styles['PropertyInfo']))
+            story.append(Spacer(1, 0.2*inch))
+        
+        # Configurations
+        if property_obj.configurations.exists():
+            story.append(Paragraph("Available Configurations", self.styles['SectionHeader']))
+            
+            story.append(configuration_table(property_obj.configurations.all()))
+            story.append(Spacer(1, 0.2*inch))
+        
+        # Amenities
+        if property_obj.amenities.exists():
+            story.append(Paragraph("Amenities & Features", self.styles['SectionHeader']))
+            
+            amenities_text = ", ".join([amenity.name for amenity in property_obj.amenities.all()])
+            story.append(Paragraph(amenities_text, self.styles['PropertyInfo']))
+            story.append(Spacer(1, 0.2*inch))
+        
+        # Footer
+        story.append(Spacer(1, 0.5*inch))
+        story.append(Paragraph("Contact us for more information or to schedule a viewing.", 
+                              self.styles['PropertyInfo']))
+        return story
+
+    @staticmethod
+    def _build(story, output=None, margin=inch):
+        """
+        Lay out story and write the PDF to output, a binary file. Without
+        output the PDF is returned as bytes.
+        """
+        target = output if output is not None else BytesIO()
+        doc = SimpleDocTemplate(
+            target,
+            pagesize=A4,
+            rightMargin=margin,
+            leftMargin=margin,
+            topMargin=inch,
+            bottomMargin=inch
+        )
+        doc.build(story)
+        if output is not None:
+            return output
+        pdf = target.getvalue()
+        target.close()
+        return pdf
+
+    def generate_property_pdf(self, property_obj, request=None, output=None):
+        """Generate PDF for a single property"""
+        return self._build(self._property_story(property_obj), output)
+
+    def generate_properties_pdf(self, properties, on_property=None, output=None):
+        """
+        One PDF with the pages of every property, each starting on a new page.
+        on_property(count) is called after each property is laid out.
+        """
+        story = []
+        for count, property_obj in enumerate(properties, start=1):
+            if story:
+                story.append(PageBreak())
+            story.extend(self._property_story(property_obj))
+            if on_property:
+                on_property(count)
+        return self._build(story, output)
+    
+    def generate_comparison_pdf(self, properties, request=None, output=None):
+        """Generate PDF comparing multiple properties"""
+        story = []
+        
+        # Header
+        story.append(Paragraph("Property Comparison Report", self.styles['PropertyTitle']))
+        story.append(Spacer(1, 0.3*inch))
+        
+        # Summary table
+        story.append(Paragraph("Properties Overview", self.styles['SectionHeader']))
+        
+        story.append(comparison_table(properties))
+        story.append(PageBreak())
+        
+        # Fetch every property's image up front, concurrently
+        images = load_pdf_images(
+            [(prop.primary_image, '') for prop in properties], *COMPARISON_IMAGE_SIZE
+        )
+
+        # Detailed comparison for each property
+        for i, (prop, img) in enumerate(zip(properties, images)):
+            story.append(Paragraph(f"{i+1}. {prop.name}", self.styles['Heading2']))
+            story.append(Spacer(1, 0.1*inch))
+            if img:
+                story.append(pdf_image(img))
+                story.append(Spacer(1, 0.1*inch))
+            
+            # Property details
+            details = [
+                ['Address:', prop.address],
+                ['Description:', prop.description[:200] + ('...' if len(prop.description) > 200 else '') if prop.description else 'Not provided'],
+                ['Contact:', f"{prop.contact_name} - {prop.contact_phone}" if prop.contact_name and prop.contact_phone else 'Available on request'],
+            ]
+            
+            story.append(details_table(details))
+            story.append(Spacer(1, 0.15*inch))
+            
+            # Configurations
+            if prop.configurations.exists():
+                # Limit to 5 configs
+                story.append(compact_configuration_table(prop.configurations.all()[:5]))
+            
+            # Amenities
+            if prop.amenities.exists():
+                story.append(Spacer(1, 0.1*inch))
+                amenities = ", ".join([a.name for a in prop.amenities.all()[:10]])  # Limit amenities
+                if prop.amenities.count() > 10:
+                    amenities += f" and {prop.amenities.count() - 10} more..."
+                story.append(Paragraph(f"<b>Amenities:</b> {amenities}", self.styles['PropertyInfo']))
+            
+            if i < len(properties) - 1:  # Don't add page break after last property
+                story.append(PageBreak())
+
+        return self._build(story, output, margin=0.5*inch)
+
+
+def _data_stats(property_ids=None):
+    """
+    {property id: [latest updated_at and row count of the property and of
+    its configurations, images and amenities]} in four queries. Row counts
+    catch deleted children, which leave no updated_at behind.
+    """
+    properties = Property.objects.all()
+    if property_ids is not None:
+        properties = properties.filter(pk__in=property_ids)
+    stats = {pk: [[updated_at, 1]] for pk, updated_at in properties.values_list('pk', 'updated_at')}
+    for model in (PropertyConfiguration, PropertyImage, PropertyAmenity):
+        children = {
+            row['property_id']: [row['latest'], row['count']]
+            for row in model.objects.filter(property_id__in=stats).order_by()
+            .values('property_id').annotate(latest=Max('updated_at'), count=Count('pk'))
+        }
+        for pk, rows in stats.items():
+            rows.append(children.get(pk, [None, 0]))
+    return stats
+
+
+def _version(property_ids, stats):
+    """(version, last_modified) of a PDF of property_ids, or (None, None) if one is gone"""
+    parts = [PDF_LAYOUT_VERSION]
+    last_modified = None
+    for pk in sorted(property_ids):
+        if pk not in stats:
+            return None, None
+        parts.append([pk, [[latest.isoformat() if latest else None, count] for latest, count in stats[pk]]])
+        for latest, _ in stats[pk]:
+            if latest and (last_modified is None or latest > last_modified):
+                last_modified = latest
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()[:20], last_modified
+
+
+def pdf_data_version(property_ids):
+    """
+    (version, last_modified) of the data a PDF of these properties is built
+    from. The version changes whenever any of their rows change.
+    """
+    return _version(property_ids, _data_stats(property_ids))
+
+
+def _document_name(kind, property_ids):
+    ids = '-'.join(str(pk) for pk in sorted(property_ids))
+    if len(ids) > MAX_DOCUMENT_NAME_IDS:
+        ids = 'h' + hashlib.sha256(ids.encode()).hexdigest()[:20]
+    return f"{kind}-{ids}"
+
+
+def _is_hashed(name):
+    return name.partition('-')[2].startswith('h')
+
+
+def _document_dir(name):
+    """Each document keeps its rendered versions in a directory of its own"""
+    return os.path.join(pdf_settings()['ARTIFACT_ROOT'], name)
+
+
+def _artifact_path(name, version):
+    return os.path.join(_document_dir(name), f'{version}.pdf')
+
+
+def _write_atomic(path, write):
+    """Call write(f) on a temporary file in path's directory, then move it to path"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def cached_pdf(kind, property_ids, version, render):
+    """
+    Path of the rendered PDF for this version of the data. When it isn't on
+    disk yet, render(f) writes the document straight into the file f, so the
+    PDF is never copied through an in-memory buffer. Older versions of the
+    same document are removed.
+    """
+    name = _document_name(kind, property_ids)
+    path = _artifact_path(name, version)
+    if os.path.exists(path):
+        return path
+
+    root = _document_dir(name)
+    os.makedirs(root, exist_ok=True)
+    ids_path = os.path.join(root, DOCUMENT_IDS_FILENAME)
+    if _is_hashed(name) and not os.path.exists(ids_path):
+        _write_atomic(ids_path, lambda f: f.write(json.dumps(sorted(property_ids)).encode()))
+    _write_atomic(path, render)
+
+    for filename in os.listdir(root):
+        if filename.endswith('.pdf') and filename != os.path.basename(path):
+            try:
+                os.remove(os.path.join(root, filename))
+            except FileNotFoundError:
+                pass
+    return path
+
+
+def _document_ids(root, name):
+    """Property ids of a document directory, or [] if they cannot be told"""
+    try:
+        if _is_hashed(name):
+            with open(os.path.join(root, name, DOCUMENT_IDS_FILENAME)) as f:
+                return [int(pk) for pk in json.load(f)]
+        return [int(pk) for pk in name.partition('-')[2].split('-')]
+    except (OSError, ValueError, TypeError):
+        return []
+
+
+def _artifacts():
+    """(path, kind, property ids, version) of every cached PDF"""
+    root = pdf_settings()['ARTIFACT_ROOT']
+    if not os.path.isdir(root):
+        return
+    for entry in os.scandir(root):
+        if not entry.is_dir():
+            continue
+        kind = entry.name.partition('-')[0]
+        property_ids = _document_ids(root, entry.name)
+        for filename in os.listdir(entry.path):
+            if filename.endswith('.pdf'):
+                yield os.path.join(entry.path, filename), kind, property_ids, filename[:-len('.pdf')]
+
+
+def prune_pdf_cache():
+    """Delete cached PDFs whose properties changed or were deleted. Returns the count."""
+    root = pdf_settings()['ARTIFACT_ROOT']
+    if not os.path.isdir(root):
+        return 0
+    artifacts = list(_artifacts())
+    stats = _data_stats() if artifacts else {}
+    removed = 0
+    for path, kind, property_ids, version in artifacts:
+        if not property_ids or _version(property_ids, stats)[0] != version:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    # Drop directories left with no version; one holding a .tmp file is mid-render
+    for entry in os.scandir(root):
+        if entry.is_dir() and set(os.listdir(entry.path)) <= {DOCUMENT_IDS_FILENAME}:
+            shutil.rmtree(entry.path, ignore_errors=True)
+        elif entry.is_file() and entry.name.endswith('.pdf'):
+            # Left over from when every version sat directly under the root
+            os.remove(entry.path)
+    return removed
+
+
+def prerender_property_pdfs():
+    """Render the PDF of every active property that isn't cached yet. Returns the count."""
+    stats = _data_stats()
+    generator = PropertyPDFGenerator()
+    rendered = 0
+    properties = Property.objects.filter(is_active=True).prefetch_related('configurations', 'amenities')
+    for prop in properties.iterator(chunk_size=100):
+        version, _ = _version([prop.pk], stats)
+        if version is None or os.path.exists(_artifact_path(_document_name('property', [prop.pk]), version)):
+            continue
+        try:
+            cached_pdf('property', [prop.pk], version, lambda f: generator.generate_property_pdf(prop, output=f))
+            rendered += 1
+        except Exception as e:
+            logger.warning(f"Could not pre-render the PDF of {prop}: {e}")
+    return rendered
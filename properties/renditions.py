@@ -0,0 +1,117 @@
+import io
+import logging
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from .media_store import store_blob
+
+logger = logging.getLogger(__name__)
+
+Image.init()
+
+# Pillow format name and file extension for each rendition format
+_FORMATS = {
+    'avif': ('AVIF', '.avif'),
+    'webp': ('WEBP', '.webp'),
+}
+
+
+def _options():
+    options = {'WIDTHS': [320, 640, 1024], 'FORMATS': ['avif', 'webp'], 'QUALITY': 75}
+    options.update(getattr(settings, 'IMAGE_RENDITIONS', {}))
+    return options
+
+
+def available_formats():
+    """
+    Configured rendition formats this Pillow build can encode. AVIF needs
+    Pillow 11.2+ built with libavif (the PyPI wheels are).
+    """
+    return [
+        fmt for fmt in _options()['FORMATS']
+        if fmt in _FORMATS and _FORMATS[fmt][0] in Image.SAVE and (fmt != 'avif' or features.check('avif'))
+    ]
+
+
+def build_renditions(source_name, storage=None):
+    """
+    Generate resized copies of a stored image in each modern format.
+    Returns a dict recorded on the model, e.g.
+    {'source': name, 'width': 2400, 'height': 1600, 'webp': {'320': name, ...}}
+    Widths larger than the original are skipped.
+    """
+    storage = storage or default_storage
+    options = _options()
+    with storage.open(source_name, 'rb') as f:
+        original = Image.open(f)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+
+    renditions = {'source': source_name, 'width': original.width, 'height': original.height}
+    widths = sorted({min(width, original.width) for width in options['WIDTHS']})
+    for fmt in available_formats():
+        pil_format, ext = _FORMATS[fmt]
+        renditions[fmt] = {}
+        for width in widths:
+            height = max(1, round(original.height * width / original.width))
+            resized = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, quality=options['QUALITY'])
+            name, _ = store_blob(buffer.getvalue(), ext, storage)
+            renditions[fmt][str(width)] = name
+    return renditions
+
+
+def refresh_renditions(instance, field):
+    """
+    Rebuild renditions for instance.<field> when they are missing or were
+    made from a different file. Saves with update() so no signals fire.
+    Returns True if renditions were written.
+    """
+    renditions_field = 'renditions' if field == 'image' else f'{field}_renditions'
+    file = getattr(instance, field)
+    current = getattr(instance, renditions_field) or {}
+    if not file:
+        renditions = {}
+    elif current.get('source') == file.name:
+        return False
+    elif not default_storage.exists(file.name):
+        return False
+    else:
+        try:
+            renditions = build_renditions(file.name)
+        except Exception as e:
+            logger.warning(f"Could not build renditions for {file.name}: {e}")
+            return False
+
+    if renditions == current:
+        return False
+    setattr(instance, renditions_field, renditions)
+    type(instance).objects.filter(pk=instance.pk).update(**{renditions_field: renditions})
+    return True
+
+
+def srcset(renditions, fmt):
+    """'url 320w, url 640w' for one format of a renditions dict ('' if none)"""
+    sizes = (renditions or {}).get(fmt) or {}
+    return ', '.join(
+        f"{default_storage.url(name)} {width}w"
+        for width, name in sorted(sizes.items(), key=lambda item: int(item[0]))
+    )
+
+
+def smallest_rendition(renditions, min_width=0):
+    """URL of the smallest rendition at least min_width wide, preferring WebP"""
+    renditions = renditions or {}
+    for fmt in ('webp', 'avif'):
+        sizes = renditions.get(fmt) or {}
+        candidates = sorted((int(width), name) for width, name in sizes.items())
+        for width, name in candidates:
+            if width >= min_width or width == candidates[-1][0]:
+                return default_storage.url(name)
+    return None
@@ -0,0 +1,251 @@
+import bisect
+import difflib
+import logging
+import re
+
+from django.db import DatabaseError, connection as default_connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .cache import persistent_cache
+from .models import Property, PropertyAmenity
+from .pagination import DEFAULT_ORDERING
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = 'properties_search'
+VOCAB_TABLE = 'properties_search_vocab'
+VOCAB_CACHE_KEY = 'properties_search:vocab'
+MAX_TERMS = 8
+BATCH_SIZE = 500
+# Terms shorter than this are only prefix-matched, never spell-corrected
+MIN_CORRECTION_LENGTH = 3
+CORRECTION_CUTOFF = 0.75
+
+TERM_RE = re.compile(r'\w+')
+
+# Column weights for bm25 on SQLite: name, address, description, amenities
+SQLITE_WEIGHTS = (10.0, 4.0, 1.0, 2.0)
+
+_AMENITIES_SQL = (
+    f"(SELECT {{agg}} FROM {PropertyAmenity._meta.db_table} a WHERE a.property_id = p.id)"
+)
+
+# Databases known to have the search tables, so searches skip the catalog query
+_indexed_databases = set()
+
+
+def _vendor(connection):
+    return connection.vendor if connection.vendor in ('sqlite', 'postgresql') else None
+
+
+def _database_key(connection):
+    return connection.alias, connection.settings_dict['NAME']
+
+
+def create_index(connection=default_connection):
+    """
+    Create the search tables: an FTS5 table on SQLite, a tsvector table with
+    a GIN index on PostgreSQL. Other databases fall back to icontains.
+    """
+    vendor = _vendor(connection)
+    _indexed_databases.discard(_database_key(connection))
+    with connection.cursor() as cursor:
+        if vendor == 'sqlite':
+            try:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+                    "name, address, description, amenities, "
+                    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+                )
+                cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {VOCAB_TABLE} USING fts5vocab({SEARCH_TABLE}, 'row')")
+            except DatabaseError as e:
+                logger.warning(f"SQLite has no FTS5, property search will use icontains: {e}")
+        elif vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+                f"property_id bigint PRIMARY KEY REFERENCES {Property._meta.db_table}(id) ON DELETE CASCADE, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)")
+
+
+def drop_index(connection=default_connection):
+    _indexed_databases.discard(_database_key(connection))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {VOCAB_TABLE}")
+        cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+def index_available(connection=default_connection):
+    """
+    Whether the search tables exist. Only a positive answer is remembered
+    (until create_index/drop_index), so a later migrate is still noticed.
+    """
+    if _vendor(connection) is None:
+        return False
+    key = _database_key(connection)
+    if key not in _indexed_databases:
+        if SEARCH_TABLE not in connection.introspection.table_names():
+            return False
+        _indexed_databases.add(key)
+    return True
+
+
+def _documents_sql(vendor):
+    """INSERT ... SELECT statement writing the search document of properties"""
+    table = Property._meta.db_table
+    if vendor == 'sqlite':
+        amenities = _AMENITIES_SQL.format(agg="group_concat(a.name, ' ')")
+        return (
+            f"INSERT INTO {SEARCH_TABLE} (rowid, name, address, description, amenities) "
+            f"SELECT p.id, p.name, p.address, p.description, COALESCE({amenities}, '') FROM {table} p"
+        )
+    amenities = _AMENITIES_SQL.format(agg="string_agg(a.name, ' ')")
+    return (
+        f"INSERT INTO {SEARCH_TABLE} (property_id, document) "
+        "SELECT p.id, "
+        "setweight(to_tsvector('simple', coalesce(p.name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(p.address, '')), 'B') || "
+        f"setweight(to_tsvector('simple', coalesce({amenities}, '')), 'C') || "
+        "setweight(to_tsvector('simple', coalesce(p.description, '')), 'D') "
+        f"FROM {table} p"
+    )
+
+
+def _key_column(vendor):
+    return 'rowid' if vendor == 'sqlite' else 'property_id'
+
+
+def index_properties(property_ids=None, connection=default_connection):
+    """
+    Rewrite the search documents of the given properties (all when None).
+    Ids of deleted properties are dropped from the index.
+    """
+    if not index_available(connection):
+        return
+    vendor = _vendor(connection)
+    key = _key_column(vendor)
+    insert = _documents_sql(vendor)
+    with connection.cursor() as cursor:
+        if property_ids is None:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+            cursor.execute(insert)
+        else:
+            property_ids = list(property_ids)
+            for start in range(0, len(property_ids), BATCH_SIZE):
+                batch = property_ids[start:start + BATCH_SIZE]
+                placeholders = ', '.join(['%s'] * len(batch))
+                cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE {key} IN ({placeholders})", batch)
+                cursor.execute(f"{insert} WHERE p.id IN ({placeholders})", batch)
+    persistent_cache.delete(VOCAB_CACHE_KEY)
+
+
+def vocabulary(connection=default_connection):
+    """Sorted list of the indexed terms, used for spelling correction"""
+    terms = persistent_cache.get(VOCAB_CACHE_KEY)
+    if terms is None:
+        with connection.cursor() as cursor:
+            if _vendor(connection) == 'sqlite':
+                cursor.execute(f"SELECT term FROM {VOCAB_TABLE} WHERE length(term) >= %s", [MIN_CORRECTION_LENGTH])
+            else:
+                cursor.execute(
+                    f"SELECT word FROM ts_stat('SELECT document FROM {SEARCH_TABLE}') WHERE length(word) >= %s",
+                    [MIN_CORRECTION_LENGTH],
+                )
+            terms = sorted(row[0] for row in cursor.fetchall())
+        persistent_cache.set(VOCAB_CACHE_KEY, terms, timeout=None)
+    return terms
+
+
+def correct_terms(terms, vocab):
+    """
+    Replace terms that match nothing, even as a prefix, with the closest
+    indexed term, so "lekky" finds Lekki and "ikoy" still prefix-matches Ikoyi.
+    """
+    corrected = []
+    for term in terms:
+        position = bisect.bisect_left(vocab, term)
+        if len(term) < MIN_CORRECTION_LENGTH or (position < len(vocab) and vocab[position].startswith(term)):
+            corrected.append(term)
+            continue
+        candidates = [word for word in vocab if abs(len(word) - len(term)) <= 2]
+        matches = difflib.get_close_matches(term, candidates, n=1, cutoff=CORRECTION_CUTOFF)
+        corrected.append(matches[0] if matches else term)
+    return corrected
+
+
+def search_terms(query, connection=default_connection):
+    """Terms of query, spell-corrected against the index, used for matching"""
+    terms = TERM_RE.findall(query.lower())[:MAX_TERMS]
+    return correct_terms(terms, vocabulary(connection)) if terms else []
+
+
+def _match_sql(vendor, terms):
+    """
+    (sql, params) of the ids matching every term as a prefix, and of a
+    correlated subquery ranking the outer property row, lower is better
+    """
+    table = Property._meta.db_table
+    if vendor == 'sqlite':
+        weights = ', '.join(str(weight) for weight in SQLITE_WEIGHTS)
+        params = [' '.join(f'"{term}"*' for term in terms)]
+        match = f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s"
+        rank = (
+            f"SELECT bm25({SEARCH_TABLE}, {weights}) FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH %s AND rowid = {table}.id"
+        )
+    else:
+        params = [' & '.join(f'{term}:*' for term in terms)]
+        match = f"SELECT property_id FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('simple', %s)"
+        # float8 so the rank survives a round trip through a pagination cursor
+        rank = (
+            f"SELECT -ts_rank(document, to_tsquery('simple', %s))::float8 FROM {SEARCH_TABLE} "
+            f"WHERE property_id = {table}.id"
+        )
+    return (match, params), (rank, params)
+
+
+def search_ids(query, limit=None, connection=default_connection):
+    """
+    Ids of all properties matching every term of query (as a prefix, after
+    spelling correction), best match first. None if there is no index.
+    """
+    if not index_available(connection):
+        return None
+    terms = search_terms(query, connection)
+    if not terms:
+        return []
+    (match, params), (rank, _) = _match_sql(_vendor(connection), terms)
+    table = Property._meta.db_table
+    sql = f"SELECT id FROM {table} WHERE id IN ({match}) ORDER BY ({rank}), id"
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params * 2)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_properties(queryset, query):
+    """
+    Filter a Property queryset to matches for query and return it with the
+    ordering to paginate by: best match first when the search index is
+    available, otherwise a substring match ordered newest first.
+    The match runs inside the queryset's own SQL, so its other filters
+    apply before any page limit.
+    """
+    if not index_available():
+        return queryset.filter(
+            Q(name__icontains=query) |
+            Q(address__icontains=query) |
+            Q(description__icontains=query) |
+            Q(pk__in=PropertyAmenity.objects.filter(name__icontains=query).values('property_id'))
+        ), DEFAULT_ORDERING
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none(), DEFAULT_ORDERING
+    (match, match_params), (rank, rank_params) = _match_sql(_vendor(default_connection), terms)
+    queryset = queryset.filter(pk__in=RawSQL(match, match_params)).annotate(
+        search_rank=RawSQL(rank, rank_params, output_field=FloatField())
+    )
+    return queryset, ('search_rank', 'id')
@@ -0,0 +1,69 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (
+    Property, PropertyAmenity, PropertyConfiguration, PropertyImage, refresh_property_summaries
+)
+from .jobs import enqueue
+from .search import index_properties
+from .snapshots import invalidate_properties_snapshot
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+@receiver(post_save, sender=PropertyConfiguration)
+@receiver(post_delete, sender=PropertyConfiguration)
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_delete, sender=PropertyImage)
+@receiver(post_save, sender=PropertyAmenity)
+@receiver(post_delete, sender=PropertyAmenity)
+def invalidate_snapshot_on_change(sender, **kwargs):
+    """Drop the properties_api snapshot once the surrounding transaction commits"""
+    if kwargs.get('raw'):
+        return
+    transaction.on_commit(invalidate_properties_snapshot)
+
+
+@receiver(post_save, sender=PropertyConfiguration)
+@receiver(post_delete, sender=PropertyConfiguration)
+@receiver(post_save, sender=PropertyImage)
+@receiver(post_delete, sender=PropertyImage)
+@receiver(post_save, sender=PropertyAmenity)
+@receiver(post_delete, sender=PropertyAmenity)
+def refresh_summary_on_change(sender, instance, **kwargs):
+    """Keep the Property summary columns current after a child row changes"""
+    if kwargs.get('raw'):
+        return
+    property_id = instance.property_id
+    transaction.on_commit(lambda: refresh_property_summaries([property_id]))
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_save, sender=PropertyImage)
+def refresh_renditions_on_save(sender, instance, **kwargs):
+    """Queue responsive renditions for a newly uploaded image or thumbnail, off the request"""
+    if kwargs.get('raw'):
+        return
+    field = 'image' if sender is PropertyImage else 'thumbnail'
+    renditions = (instance.renditions if sender is PropertyImage else instance.thumbnail_renditions) or {}
+    file = getattr(instance, field)
+    if (file.name or '') == (renditions.get('source') or ''):
+        return
+
+    model, pk = sender._meta.model_name, instance.pk
+    transaction.on_commit(lambda: enqueue(
+        'build_renditions', dedupe_key=f'renditions:{model}:{pk}', model=model, pk=pk, field=field,
+    ))
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+@receiver(post_save, sender=PropertyAmenity)
+@receiver(post_delete, sender=PropertyAmenity)
+def refresh_search_index_on_change(sender, instance, **kwargs):
+    """Rewrite the search document of a property whose text or amenities changed"""
+    if kwargs.get('raw'):
+        return
+    property_id = instance.pk if sender is Property else instance.property_id
+    transaction.on_commit(lambda: index_properties([property_id]))
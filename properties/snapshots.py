@@ -0,0 +1,247 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import persistent_cache
+from .models import Property, PropertyAmenity, PropertyConfiguration, PropertyImage
+from .renditions import smallest_rendition
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_CACHE_KEY = 'properties_api:snapshot'
+SNAPSHOT_BODY_CACHE_KEY = 'properties_api:body:{origin}'
+# Bodies of origins that stop sending requests expire after this many seconds
+SNAPSHOT_BODY_TIMEOUT = 24 * 60 * 60
+SNAPSHOT_FILENAME = 'properties_api.json'
+MARKER_IMAGE_WIDTH = 80
+
+# 'schema' of the airtable_data payload. 1: rows straight from the Airtable
+# API (sync_airtable --cache-only), media URLs are Airtable attachment URLs.
+# 2: rows read back from the synced tables, media URLs point at the synced
+# copies under MEDIA_URL, which unlike attachment URLs do not expire.
+AIRTABLE_RECORDS_SCHEMA = 1
+AIRTABLE_DATA_SCHEMA = 2
+
+# Airtable's value for each stored luxury_status, as process_properties reads it
+AIRTABLE_LUXURY_VALUES = {'luxurious': 'Luxurious', 'non_luxurious': 'Non Luxurious'}
+
+
+def _snapshot_path():
+    """Location of the on-disk copy of the properties_api snapshot"""
+    return os.path.join(settings.SNAPSHOT_ROOT, SNAPSHOT_FILENAME)
+
+
+def _format_price(price):
+    return f"₦{float(price):,.2f}" if price is not None else "TBD"
+
+
+def _marker_image(prop):
+    """Small rendition for map markers, falling back to the first image"""
+    images = [img for img in prop.images.all() if img.image]
+    url = smallest_rendition(prop.thumbnail_renditions, MARKER_IMAGE_WIDTH)
+    if not url and images:
+        url = smallest_rendition(images[0].renditions, MARKER_IMAGE_WIDTH)
+    return url
+
+
+def serialize_property(prop):
+    """
+    Serialize a Property for the map payload.
+    Media URLs are kept relative so the payload can be shared across hosts.
+    """
+    return {
+        'id': prop.id,
+        'name': prop.name,
+        'latitude': float(prop.latitude) if prop.latitude is not None else None,
+        'longitude': float(prop.longitude) if prop.longitude is not None else None,
+        'address': prop.address,
+        'description': prop.description,
+        'configurations': [
+            {
+                'type': config.type,
+                'bedrooms': config.bedrooms,
+                'bathrooms': config.bathrooms,
+                'square_footage': config.square_footage,
+                'price': _format_price(config.price)
+            }
+            for config in prop.configurations.all()
+        ],
+        'amenities': [amenity.name for amenity in prop.amenities.all()],
+        'thumbnail': prop.thumbnail.url if prop.thumbnail else None,
+        'marker_image': _marker_image(prop),
+        'images': [img.image.url for img in prop.images.all() if img.image],
+        'contact': f"{prop.contact_name} - {prop.contact_phone}",
+        'brochure': prop.brochure.url if prop.brochure else "",
+        'luxury_status': prop.get_luxury_status_display(),
+        'completion_date': prop.completion_date
+    }
+
+
+def build_properties_payload():
+    """Build the full map payload for every active property"""
+    properties = Property.objects.filter(is_active=True).prefetch_related(
+        'configurations', 'images', 'amenities'
+    )
+    return [serialize_property(prop) for prop in properties]
+
+
+def _media_url(name):
+    return default_storage.url(name) if name else None
+
+
+def _linked_rows(rows):
+    """Synced child rows with property_id set to the parent's Airtable id"""
+    result = []
+    for row in rows.filter(airtable_id__isnull=False).iterator():
+        row['property_id'] = row.pop('property__airtable_id')
+        result.append(row)
+    return result
+
+
+def build_airtable_data():
+    """
+    The 'airtable_data' cache payload, in the shape sync_airtable's process_*
+    methods produce, read back from the synced tables. Rows link to their
+    property by Airtable id and media points at the synced copies
+    (AIRTABLE_DATA_SCHEMA).
+    """
+    properties = []
+    for row in Property.objects.filter(airtable_id__isnull=False).values(
+        'airtable_id', 'name', 'slug', 'address', 'description', 'latitude', 'longitude',
+        'contact_name', 'contact_phone', 'luxury_status', 'is_active', 'brochure', 'thumbnail',
+        'completion_date',
+    ).iterator():
+        row['luxury_status'] = AIRTABLE_LUXURY_VALUES.get(row['luxury_status'], row['luxury_status'])
+        row['brochure_url'] = _media_url(row.pop('brochure'))
+        row['thumbnail_url'] = _media_url(row.pop('thumbnail'))
+        properties.append(row)
+
+    configurations = _linked_rows(PropertyConfiguration.objects.values(
+        'airtable_id', 'type', 'bedrooms', 'bathrooms', 'square_footage', 'price', 'is_available',
+        'property__airtable_id',
+    ))
+    images = _linked_rows(PropertyImage.objects.values(
+        'airtable_id', 'image', 'alt_text', 'order', 'attachment_index', 'original_record_id',
+        'property__airtable_id',
+    ))
+    for row in images:
+        row['image_url'] = _media_url(row.pop('image'))
+    amenities = _linked_rows(PropertyAmenity.objects.values('airtable_id', 'name', 'property__airtable_id'))
+    return {
+        'schema': AIRTABLE_DATA_SCHEMA,
+        'properties': properties, 'configurations': configurations, 'images': images, 'amenities': amenities,
+    }
+
+
+def _write_snapshot_file(document):
+    """Atomically replace the on-disk snapshot and return its mtime"""
+    os.makedirs(settings.SNAPSHOT_ROOT, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=settings.SNAPSHOT_ROOT, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(document, f, cls=DjangoJSONEncoder)
+        os.replace(tmp_path, _snapshot_path())
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return os.stat(_snapshot_path()).st_mtime
+
+
+def rebuild_properties_snapshot():
+    """
+    Rebuild the properties_api snapshot, persist it to disk and cache it.
+    Called after sync_airtable and lazily after an admin edit invalidated it.
+    """
+    payload = build_properties_payload()
+    encoded = json.dumps(payload, cls=DjangoJSONEncoder).encode('utf-8')
+    document = {
+        'version': hashlib.sha1(encoded).hexdigest()[:16],
+        'built_at': timezone.now(),
+        'properties': json.loads(encoded),
+    }
+    mtime = _write_snapshot_file(document)
+    snapshot = dict(document, mtime=mtime)
+    persistent_cache.set(SNAPSHOT_CACHE_KEY, snapshot, timeout=None)
+    logger.info(f"Rebuilt properties snapshot {snapshot['version']} ({len(payload)} properties)")
+    return snapshot
+
+
+def _load_snapshot_file(mtime):
+    try:
+        with open(_snapshot_path(), encoding='utf-8') as f:
+            document = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read properties snapshot: {e}")
+        return None
+    document['built_at'] = parse_datetime(document['built_at'])
+    document['mtime'] = mtime
+    persistent_cache.set(SNAPSHOT_CACHE_KEY, document, timeout=None)
+    return document
+
+
+def get_properties_snapshot():
+    """
+    Return the current snapshot, rebuilding it only when it is missing.
+    The file mtime is compared so workers notice a rebuild done elsewhere.
+    """
+    try:
+        mtime = os.stat(_snapshot_path()).st_mtime
+    except FileNotFoundError:
+        mtime = None
+
+    snapshot = persistent_cache.get(SNAPSHOT_CACHE_KEY)
+    if mtime is not None:
+        if snapshot and snapshot.get('mtime') == mtime:
+            return snapshot
+        snapshot = _load_snapshot_file(mtime)
+        if snapshot:
+            return snapshot
+    return rebuild_properties_snapshot()
+
+
+def invalidate_properties_snapshot():
+    """Drop the snapshot so the next request rebuilds it"""
+    persistent_cache.delete(SNAPSHOT_CACHE_KEY)
+    try:
+        os.remove(_snapshot_path())
+    except FileNotFoundError:
+        pass
+
+
+def _absolute(origin, url):
+    return f"{origin}{url}" if url and url.startswith('/') else url
+
+
+def absolutize_property(prop, origin):
+    """Copy of a serialized property with media URLs made absolute"""
+    prop = dict(prop)
+    prop['thumbnail'] = _absolute(origin, prop['thumbnail'])
+    prop['marker_image'] = _absolute(origin, prop.get('marker_image'))
+    prop['brochure'] = _absolute(origin, prop['brochure'])
+    prop['images'] = [_absolute(origin, url) for url in prop['images']]
+    return prop
+
+
+def get_snapshot_body(snapshot, origin):
+    """
+    Return the JSON body for a snapshot with media URLs made absolute for
+    the requesting origin. Rendered once per snapshot version and origin;
+    each origin keeps only the body of the latest version.
+    """
+    key = SNAPSHOT_BODY_CACHE_KEY.format(origin=origin)
+    cached = persistent_cache.get(key)
+    if cached and cached[0] == snapshot['version']:
+        return cached[1]
+    properties = [absolutize_property(prop, origin) for prop in snapshot['properties']]
+    body = json.dumps(properties, cls=DjangoJSONEncoder).encode('utf-8')
+    persistent_cache.set(key, (snapshot['version'], body), timeout=SNAPSHOT_BODY_TIMEOUT)
+    return body
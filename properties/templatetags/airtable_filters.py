@@ -125,7 +125,11 @@ def get_property_by_id(properties, property_id):
     """
     Get a property by its airtable_id
     Usage: {% get_property_by_id properties property_id as property %}
+    properties may be a list, an airtable_id -> property dict, or the whole
+    airtable_data dict, whose property_index makes this a dict lookup.
     """
+    if isinstance(properties, dict):
+        return properties.get('property_index', properties).get(property_id)
     for prop in properties:
         if prop.get('airtable_id') == property_id:
             return prop
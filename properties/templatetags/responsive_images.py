@@ -0,0 +1,31 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from properties.renditions import srcset as rendition_srcset
+
+register = template.Library()
+
+SOURCE_FORMATS = ('avif', 'webp')
+CARD_SIZES = "(min-width: 1280px) 33vw, (min-width: 768px) 50vw, 100vw"
+
+
+@register.simple_tag
+def picture_sources(renditions, sizes=CARD_SIZES):
+    """
+    <source> elements for a <picture>, best format first.
+    Formats without renditions are left out, so the <img> is used instead.
+    Usage: <picture>{% picture_sources image.renditions %}<img src="..."></picture>
+    """
+    sources = ((fmt, rendition_srcset(renditions, fmt)) for fmt in SOURCE_FORMATS)
+    return format_html_join('', '<source type="image/{}" srcset="{}" sizes="{}">', (
+        (fmt, value, sizes) for fmt, value in sources if value
+    ))
+
+
+@register.filter
+def srcset(renditions, fmt):
+    """
+    srcset string for one rendition format
+    Usage: {{ image.renditions|srcset:"webp" }}
+    """
+    return rendition_srcset(renditions, fmt)
@@ -1,3 +1,1307 @@
-from django.test import TestCase
+import io
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import time
+import zipfile
+from contextlib import redirect_stdout
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import requests
+from PIL import Image
+from pypdf import PdfReader
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import airtable_cache, exports, filter_index, pdf, views
+from .cache import persistent_cache
+from .downloads import DownloadTask, MediaDownloader
+from .jobs import JOB_HANDLERS, Heartbeat, claim_next_job, enqueue, fail_stale_jobs, run_job
+from .filter_index import FilterIndex
+from .locks import FileLock
+from .models import (
+    AirtableSyncLog, AirtableSyncState, BackgroundJob, Property, PropertyAmenity, PropertyConfiguration, PropertyImage,
+    PropertyPDFExport, SharedPropertyList, UserProfile, refresh_property_summaries,
+)
+from .management.commands.sync_airtable import (
+    PAGE_QUEUE_SIZE, SYNC_ORDER, Command as SyncCommand, PageSpool, PageStream, needs_download
+)
+from .media_store import BLOB_PREFIX, store_blob, walk_storage
+from .renditions import srcset
+from .snapshots import (
+    AIRTABLE_DATA_SCHEMA, SNAPSHOT_BODY_CACHE_KEY, get_properties_snapshot, get_snapshot_body
+)
+from .views import apply_summary_filters
+from .search import correct_terms, create_index, index_available, index_properties, search_ids, search_properties
+from .pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, decode_cursor, encode_cursor, get_page_size, keyset_paginate
+)
+
+
+def create_property(index):
+    """Create a property with a few configurations, images and amenities"""
+    prop = Property.objects.create(
+        name=f"Property {index}",
+        slug=f"property-{index}",
+        address=f"{index} Admiralty Way, Lekki",
+        description="Waterfront apartments",
+        latitude=6.43 + index * 0.001,
+        longitude=3.45 + index * 0.001,
+    )
+    for bedrooms in range(1, 5):
+        PropertyConfiguration.objects.create(
+            property=prop, type=f"{bedrooms}BR", bedrooms=bedrooms, bathrooms=bedrooms,
+            square_footage=800 * bedrooms, price=50_000_000 * bedrooms,
+        )
+    for order in range(3):
+        PropertyImage.objects.create(property=prop, image=f"property_images/{prop.slug}/{order}.jpg", order=order)
+    for name in ("Pool", "Gym", "Parking", "Security"):
+        PropertyAmenity.objects.create(property=prop, name=name)
+    return prop
+
+
+class PropertySummaryTests(TestCase):
+    """Summary columns follow configuration changes made through the ORM"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.prop = create_property(1)
+
+    def assert_summary_matches_rows(self):
+        self.prop.refresh_from_db()
+        available = self.prop.configurations.filter(is_available=True)
+        self.assertEqual(self.prop.min_price, min((c.price for c in available), default=None))
+        self.assertEqual(self.prop.max_price, max((c.price for c in available), default=None))
+        self.assertEqual(self.prop.min_bedrooms, min((c.bedrooms for c in available), default=None))
+        self.assertEqual(self.prop.max_bedrooms, max((c.bedrooms for c in available), default=None))
+        self.assertEqual(self.prop.configuration_count, self.prop.configurations.count())
+        self.assertEqual(self.prop.amenity_count, self.prop.amenities.count())
+        self.assertEqual(self.prop.image_count, self.prop.images.count())
+
+    def test_summary_follows_created_and_deleted_configurations(self):
+        self.assert_summary_matches_rows()
+        self.assertEqual((self.prop.min_price, self.prop.max_bedrooms), (50_000_000, 4))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PropertyConfiguration.objects.create(
+                property=self.prop, type="Studio", bedrooms=0, bathrooms=1, square_footage=400, price=20_000_000,
+            )
+        self.assert_summary_matches_rows()
+        self.assertEqual((self.prop.min_price, self.prop.min_bedrooms, self.prop.configuration_count),
+                         (20_000_000, 0, 5))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.prop.configurations.get(type="Studio").delete()
+            self.prop.configurations.get(type="4BR").delete()
+        self.assert_summary_matches_rows()
+        self.assertEqual((self.prop.min_price, self.prop.max_price, self.prop.configuration_count),
+                         (50_000_000, 150_000_000, 3))
+
+    def test_min_price_only_counts_available_configurations(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            cheapest = self.prop.configurations.get(type="1BR")
+            cheapest.is_available = False
+            cheapest.save()
+        self.assert_summary_matches_rows()
+        self.assertEqual(self.prop.min_price, 100_000_000)
+        # Unavailable rows still count towards the total
+        self.assertEqual(self.prop.configuration_count, 4)
+
+        # Bulk updates bypass the signals, so sync refreshes the summaries itself
+        self.prop.configurations.update(is_available=False)
+        refresh_property_summaries([self.prop.pk])
+        self.prop.refresh_from_db()
+        self.assertIsNone(self.prop.min_price)
+
+    def test_compare_values_count_sold_configurations(self):
+        # As before the summary columns: sold units still show in compare tables and PDFs
+        with self.captureOnCommitCallbacks(execute=True):
+            for config in self.prop.configurations.filter(type__in=["1BR", "4BR"]):
+                config.is_available = False
+                config.save()
+            PropertyConfiguration.objects.create(
+                property=self.prop, type="Plot", bedrooms=0, bathrooms=0, square_footage=100, price=0, is_available=False,
+            )
+        self.prop.refresh_from_db()
+        self.assertEqual((self.prop.min_price, self.prop.max_bedrooms), (100_000_000, 3))
+        self.assertEqual((self.prop.get_min_price(), self.prop.get_max_bedrooms()), (50_000_000, 4))
+
+    def test_filters_use_the_summary_columns(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            other = create_property(2)
+            other.configurations.filter(bedrooms__gte=2).delete()
+        properties = Property.objects.all()
+        self.assertEqual(set(apply_summary_filters(properties, {'min_bedrooms': '3'})), {self.prop})
+        self.assertEqual(set(apply_summary_filters(properties, {'max_price': '60000000'})), {self.prop, other})
+        self.assertEqual(set(apply_summary_filters(properties, {'min_price': '60000000'})), {self.prop})
+        self.assertEqual(set(apply_summary_filters(properties, {'min_price': 'abc'})), {self.prop, other})
+
+
+class ListingQueryCountTests(TestCase):
+    """Property card pages must not issue queries per rendered card"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('agent', password='secret')
+        UserProfile.objects.create(user=self.user, role='admin', is_employee=True, can_share_properties=True)
+        self.client.force_login(self.user)
+        self.shared_list = SharedPropertyList.objects.create(
+            name="Lekki picks", created_by=self.user, expires_at=timezone.now() + timedelta(days=1)
+        )
+        self.add_properties(2)
+
+    def add_properties(self, count):
+        start = Property.objects.count()
+        with self.captureOnCommitCallbacks(execute=True):
+            properties = [create_property(start + i) for i in range(count)]
+        self.shared_list.properties.add(*properties)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_landing_query_count_is_constant(self):
+        url = reverse('landing')
+        baseline = self.count_queries(url)
+        self.add_properties(6)
+        self.assertEqual(self.count_queries(url), baseline)
+
+    def test_shared_list_query_count_is_constant(self):
+        url = reverse('shared_properties', kwargs={'token': self.shared_list.token})
+        baseline = self.count_queries(url)
+        self.add_properties(6)
+        self.assertEqual(self.count_queries(url), baseline)
+
+    def test_cards_render_summary_data(self):
+        response = self.client.get(reverse('landing'))
+        self.assertContains(response, "+2 more")  # 4 configurations, 2 shown
+        self.assertContains(response, "+1 more")  # 4 amenities, 3 shown
+        self.assertContains(response, "/media/property_images/property-0/0.jpg")
+
+
+class KeysetPaginationTests(TestCase):
+    """Listing pages and the properties API page by (created_at, id)"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.properties = [create_property(i) for i in range(5)]
+        # Same timestamp for all rows so the id tie-breaker is exercised
+        Property.objects.update(created_at=timezone.now())
+
+    def test_pages_cover_every_property_once(self):
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = keyset_paginate(Property.objects.all(), cursor, page_size=2)
+            seen.extend(prop.id for prop in page)
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), sorted(p.id for p in self.properties))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_invalid_cursor_is_rejected(self):
+        with self.assertRaises(InvalidCursor):
+            keyset_paginate(Property.objects.all(), 'not-a-cursor')
+        response = self.client.get(reverse('properties_api'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_round_trip(self):
+        ordering = ('-created_at', '-id')
+        page, cursor = keyset_paginate(Property.objects.all(), None, page_size=2)
+        last = page[-1]
+        self.assertEqual(decode_cursor(cursor, Property, ordering), [last.created_at, last.id])
+        self.assertEqual(encode_cursor(decode_cursor(cursor, Property, ordering)), cursor)
+
+    def test_ties_on_created_at_are_ordered_by_id(self):
+        expected = sorted((p.id for p in self.properties), reverse=True)
+        seen, cursor = [], None
+        for _ in range(3):
+            page, cursor = keyset_paginate(Property.objects.all(), cursor, page_size=2)
+            seen.extend(prop.id for prop in page)
+        self.assertEqual(seen, expected)
+        self.assertIsNone(cursor)
+
+        # A newer row sorts first and does not shift later pages
+        first, cursor = keyset_paginate(Property.objects.all(), None, page_size=2)
+        Property.objects.filter(pk=expected[-1]).update(created_at=timezone.now() + timedelta(days=1))
+        page, _ = keyset_paginate(Property.objects.all(), cursor, page_size=2)
+        self.assertEqual([prop.id for prop in page], expected[2:4])
+
+    def test_tampered_cursors_are_rejected(self):
+        created_at = self.properties[0].created_at.isoformat()
+        for cursor in ('not-a-cursor', 'é', 'AAAA', encode_cursor([created_at]), encode_cursor({'id': 1}),
+                       encode_cursor([None, None]), encode_cursor(['yesterday', 1]),
+                       encode_cursor([created_at, 'abc']), encode_cursor([[created_at], 1]),
+                       encode_cursor([True, 1])):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursor):
+                    keyset_paginate(Property.objects.all(), cursor)
+                response = self.client.get(reverse('properties_api'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+
+    def test_page_size_is_clamped(self):
+        self.assertEqual(get_page_size('500'), MAX_PAGE_SIZE)
+        self.assertEqual(get_page_size('0'), 1)
+        self.assertEqual(get_page_size('-3'), 1)
+        self.assertEqual(get_page_size('abc'), DEFAULT_PAGE_SIZE)
+        self.assertEqual(get_page_size(None), DEFAULT_PAGE_SIZE)
+        with mock.patch('properties.views.get_page_size', wraps=get_page_size) as clamp:
+            response = self.client.get(reverse('properties_api'), {'limit': 1000})
+        clamp.assert_called_once_with('1000')
+        self.assertEqual(len(response.json()['results']), 5)
+
+    def test_api_returns_next_link(self):
+        response = self.client.get(reverse('properties_api'), {'limit': 3})
+        data = response.json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertIsNotNone(data['next_cursor'])
+        response = self.client.get(reverse('properties_api'), {'limit': 3, 'cursor': data['next_cursor']})
+        data = response.json()
+        self.assertEqual(len(data['results']), 2)
+        self.assertIsNone(data['next'])
+
+
+class PropertiesApiSnapshotTests(TestCase):
+    """properties_api answers conditional requests from the snapshot version"""
+
+    def setUp(self):
+        snapshot_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, snapshot_root, ignore_errors=True)
+        settings_override = override_settings(SNAPSHOT_ROOT=snapshot_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        persistent_cache.clear()
+        self.addCleanup(persistent_cache.clear)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.prop = create_property(1)
+
+    def test_not_modified_until_data_changes(self):
+        url = reverse('properties_api')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([prop['name'] for prop in json.loads(response.content)], ["Property 1"])
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.prop.name = "Renamed"
+            self.prop.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([prop['name'] for prop in json.loads(response.content)], ["Renamed"])
+
+    def test_body_cache_keeps_only_the_latest_version(self):
+        snapshot = get_properties_snapshot()
+        get_snapshot_body(snapshot, "http://testserver")
+        key = SNAPSHOT_BODY_CACHE_KEY.format(origin="http://testserver")
+        self.assertEqual(persistent_cache.get(key)[0], snapshot['version'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.prop.name = "Renamed"
+            self.prop.save()
+        snapshot = get_properties_snapshot()
+        body = get_snapshot_body(snapshot, "http://testserver")
+        self.assertIn(b"Renamed", body)
+        self.assertEqual(persistent_cache.get(key)[0], snapshot['version'])
+
+    def test_paginated_requests_skip_the_snapshot(self):
+        with mock.patch('properties.views.get_properties_snapshot') as snapshot:
+            response = self.client.get(reverse('properties_api'), {'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        snapshot.assert_not_called()
+
+
+class GeoSearchTests(TestCase):
+    """Viewport clustering and nearby search over the geohash index"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.properties = [create_property(i) for i in range(5)]
+        Property.objects.filter(pk=self.properties[0].pk).update(luxury_status='luxurious')
+        self.viewport = {'south': 6.4, 'west': 3.4, 'north': 6.5, 'east': 3.5}
+
+    def test_map_clusters_at_low_zoom(self):
+        response = self.client.get(reverse('properties_map_api'), {**self.viewport, 'zoom': 10})
+        data = response.json()
+        self.assertEqual(data['mode'], 'clusters')
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(sum(cluster['count'] for cluster in data['clusters']), 5)
+
+    def test_map_markers_at_high_zoom_with_filters(self):
+        response = self.client.get(reverse('properties_map_api'), {**self.viewport, 'zoom': 16})
+        data = response.json()
+        self.assertEqual(data['mode'], 'markers')
+        self.assertEqual({marker['id'] for marker in data['markers']}, {p.id for p in self.properties})
+
+        response = self.client.get(reverse('properties_map_api'), {
+            **self.viewport, 'zoom': 16, 'luxury_status': 'luxurious',
+        })
+        self.assertEqual([marker['id'] for marker in response.json()['markers']], [self.properties[0].id])
+
+    def test_map_excludes_properties_outside_viewport(self):
+        response = self.client.get(reverse('properties_map_api'), {
+            'south': 6.4, 'west': 3.4, 'north': 6.4315, 'east': 3.4515, 'zoom': 16,
+        })
+        self.assertEqual(response.json()['count'], 2)
+
+    def test_invalid_viewports_are_rejected(self):
+        for override in ({'south': 'nan'}, {'north': 'inf'}, {'west': '-inf'}, {'north': '91'},
+                         {'east': '181'}, {'south': '7'}, {'east': 'abc'}):
+            with self.subTest(override=override):
+                response = self.client.get(reverse('properties_map_api'), {**self.viewport, **override})
+                self.assertEqual(response.status_code, 400)
+                response = self.client.get(reverse('properties_nearby_api'), {**self.viewport, **override})
+                self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('properties_map_api'), {'south': 6.4})
+        self.assertEqual(response.status_code, 400)
+
+    def test_nearby_within_radius(self):
+        response = self.client.get(reverse('properties_nearby_api'), {'lat': 6.43, 'lng': 3.45, 'radius_km': 0.2})
+        data = response.json()
+        self.assertEqual([row['id'] for row in data['results']], [self.properties[0].id, self.properties[1].id])
+        self.assertEqual(data['results'][0]['distance_km'], 0)
+
+    def test_nearby_k_nearest(self):
+        response = self.client.get(reverse('properties_nearby_api'), {'lat': 6.434, 'lng': 3.454, 'k': 2})
+        ids = [row['id'] for row in response.json()['results']]
+        self.assertEqual(ids[0], self.properties[4].id)
+        self.assertEqual(ids[1], self.properties[3].id)
+
+    def test_nearby_bbox(self):
+        response = self.client.get(reverse('properties_nearby_api'), self.viewport)
+        self.assertEqual(response.json()['count'], 5)
+
+    def test_nearby_rejects_invalid_points(self):
+        for params in ({'lat': 'nan', 'lng': 3.45}, {'lat': 6.43, 'lng': 'inf'}, {'lat': 95, 'lng': 3.45},
+                       {'lat': 6.43, 'lng': 3.45, 'radius_km': 'nan'}, {'lat': 6.43, 'lng': 3.45, 'k': 0}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(reverse('properties_nearby_api'), params).status_code, 400)
+
+
+def airtable_payload(count, price=50_000_000):
+    """Data in the shape sync_airtable's process_* methods produce"""
+    data = {'properties': [], 'configurations': [], 'images': [], 'amenities': []}
+    for i in range(count):
+        rid = f"recProp{i}"
+        data['properties'].append({
+            'airtable_id': rid, 'name': f"Tower {i}", 'slug': f"tower-{i}",
+            'address': f"{i} Ozumba Mbadiwe", 'description': "", 'latitude': Decimal('6.43'),
+            'longitude': Decimal('3.42'), 'contact_name': "", 'contact_phone': "",
+            'luxury_status': 'Luxurious', 'is_active': True, 'brochure_url': None,
+            'thumbnail_url': None, 'completion_date': None,
+        })
+        for bedrooms in (1, 2):
+            data['configurations'].append({
+                'airtable_id': f"recCfg{i}_{bedrooms}", 'property_id': rid, 'type': f"{bedrooms}BR",
+                'bedrooms': bedrooms, 'bathrooms': bedrooms, 'square_footage': 900,
+                'price': Decimal(price * bedrooms), 'is_available': True,
+            })
+        data['images'].append({
+            'airtable_id': f"recImg{i}", 'property_id': rid, 'image_url': None, 'alt_text': "",
+            'order': 0, 'attachment_index': 0, 'original_record_id': f"recImg{i}",
+        })
+        for name in ("Pool", "Gym"):
+            data['amenities'].append({
+                'airtable_id': f"recAmen{i}_{name.lower()}", 'property_id': rid, 'name': name,
+            })
+    return data
+
+
+class SyncPageTests(TestCase):
+    """sync_page writes each table in a fixed number of queries"""
+
+    def sync(self, data):
+        """Write data the way a full sync_tables run does, one page per table"""
+        command = SyncCommand()
+        command.pending_downloads = []
+        with self.captureOnCommitCallbacks(execute=True), redirect_stdout(io.StringIO()):
+            with CaptureQueriesContext(connection) as ctx:
+                for name in SYNC_ORDER:
+                    command.sync_page(name, data[name], no_files=True)
+                command.delete_missing_properties({prop['airtable_id'] for prop in data['properties']})
+        return len(ctx.captured_queries)
+
+    def test_creates_and_updates_rows(self):
+        self.sync(airtable_payload(3))
+        self.assertEqual(Property.objects.count(), 3)
+        self.assertEqual(PropertyConfiguration.objects.count(), 6)
+        self.assertEqual(PropertyImage.objects.count(), 3)
+        self.assertEqual(PropertyAmenity.objects.count(), 6)
+
+        prop = Property.objects.get(airtable_id="recProp0")
+        self.assertEqual(prop.luxury_status, 'luxurious')
+        self.assertTrue(prop.geohash)
+        self.assertEqual(prop.min_price, Decimal(50_000_000))
+
+        self.sync(airtable_payload(2, price=60_000_000))
+        self.assertFalse(Property.objects.filter(airtable_id="recProp2").exists())
+        prop.refresh_from_db()
+        self.assertEqual(prop.min_price, Decimal(60_000_000))
+
+    def test_query_count_does_not_grow_with_records(self):
+        small = self.sync(airtable_payload(2))
+        PropertyConfiguration.objects.all().delete()
+        Property.objects.all().delete()
+        self.assertEqual(self.sync(airtable_payload(20)), small)
+
+    def test_duplicate_slugs_are_suffixed(self):
+        data = airtable_payload(2)
+        data['properties'][1]['slug'] = data['properties'][0]['slug']
+        self.sync(data)
+        self.assertEqual(
+            sorted(Property.objects.values_list('slug', flat=True)), ['tower-0', 'tower-0-2']
+        )
+
+
+class FakeTable:
+    """Stands in for pyairtable.Table, serving records from memory"""
+
+    def __init__(self, records, page_size=100):
+        self.records = records
+        self.page_size = page_size
+        self.calls = []
+
+    def iterate(self, **options):
+        self.calls.append(options)
+        # Like Airtable, an empty table still answers with one empty page
+        for start in range(0, max(len(self.records), 1), self.page_size):
+            yield self.records[start:start + self.page_size]
+
+
+def airtable_record(rid, modified, **fields):
+    return {'id': rid, 'fields': {'Last Modified': modified, **fields}}
+
+
+class IncrementalSyncTests(TestCase):
+    """--incremental applies deltas only and --reconcile handles deletions"""
+
+    def setUp(self):
+        # No need to throttle in-memory tables
+        patcher = mock.patch.dict(os.environ, {'AIRTABLE_REQUESTS_PER_SECOND': '0'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tables = {
+            'properties': FakeTable([
+                airtable_record("recA", "2026-01-01T10:00:00.000Z", Name="Alpha", Slug="alpha"),
+                airtable_record("recB", "2026-01-02T10:00:00.000Z", Name="Beta", Slug="beta"),
+            ]),
+            'configurations': FakeTable([
+                airtable_record("recC", "2026-01-01T10:00:00.000Z", Property=["recA"], Type="2BR",
+                                Bedrooms=2, Price=90_000_000, **{"Is Available": True}),
+            ]),
+            'images': FakeTable([]),
+            'amenities': FakeTable([
+                airtable_record("recM", "2026-01-01T10:00:00.000Z", Property=["recB"], Amenities="Pool, Gym"),
+            ]),
+        }
+        self.run_sync(incremental=False)
+
+    def run_sync(self, **options):
+        command = SyncCommand()
+        with self.captureOnCommitCallbacks(execute=True), redirect_stdout(io.StringIO()):
+            command.sync_tables(self.tables, no_files=True, **options)
+
+    def test_full_sync_records_high_water_marks(self):
+        state = AirtableSyncState.objects.get(table='properties')
+        self.assertEqual(state.last_modified_at.isoformat(), "2026-01-02T10:00:00+00:00")
+        self.assertEqual(state.records_synced, 2)
+
+    def test_incremental_sync_filters_and_keeps_unchanged_rows(self):
+        self.tables['properties'].records = [
+            airtable_record("recA", "2026-01-03T10:00:00.000Z", Name="Alpha Renamed", Slug="alpha"),
+        ]
+        self.tables['configurations'].records = [
+            airtable_record("recC", "2026-01-03T10:00:00.000Z", Property=["recA"], Type="2BR",
+                            Bedrooms=2, Price=80_000_000, **{"Is Available": True}),
+        ]
+        self.tables['amenities'].records = []
+        self.run_sync(incremental=True)
+
+        self.assertIn("IS_AFTER({Last Modified}", self.tables['properties'].calls[-1]['formula'])
+        self.assertEqual(Property.objects.get(airtable_id="recA").name, "Alpha Renamed")
+        self.assertEqual(Property.objects.get(airtable_id="recA").min_price, Decimal(80_000_000))
+        # Missing from the delta is not the same as deleted
+        self.assertTrue(Property.objects.filter(airtable_id="recB").exists())
+        self.assertEqual(PropertyAmenity.objects.count(), 2)
+
+        # The cached airtable_data follows the incremental run
+        data = airtable_cache.get_airtable_data()
+        self.assertEqual(data['property_index']['recA']['name'], "Alpha Renamed")
+        self.assertIn("recB", data['property_index'])
+
+    def test_airtable_data_keeps_airtable_values(self):
+        self.tables['properties'].records[0]['fields']['Luxury Status'] = "Luxurious"
+        self.run_sync(incremental=False)
+        data = airtable_cache.get_airtable_data()
+        self.assertEqual(data['schema'], AIRTABLE_DATA_SCHEMA)
+        self.assertEqual(data['property_index']['recA']['luxury_status'], "Luxurious")
+        self.assertEqual(data['property_index']['recB']['luxury_status'], "Non Luxurious")
+
+    def test_reconcile_deletes_removed_records(self):
+        self.tables['properties'].records = self.tables['properties'].records[:1]
+        self.tables['amenities'].records = [
+            airtable_record("recOther", "2026-01-01T10:00:00.000Z", Property=["recA"], Amenities="Spa"),
+        ]
+        command = SyncCommand()
+        with self.captureOnCommitCallbacks(execute=True), redirect_stdout(io.StringIO()):
+            command.reconcile(self.tables)
+
+        self.assertEqual(list(Property.objects.values_list('airtable_id', flat=True)), ["recA"])
+        self.assertEqual(PropertyConfiguration.objects.count(), 1)
+        self.assertFalse(PropertyAmenity.objects.exists())
+        self.assertIsNotNone(AirtableSyncState.objects.get(table='amenities').last_reconciled_at)
+
+    def test_full_sync_writes_each_page_separately(self):
+        self.tables['properties'] = FakeTable([
+            airtable_record(f"recP{i}", "2026-01-01T10:00:00.000Z", Name=f"Tower {i}", Slug=f"tower-{i}")
+            for i in range(5)
+        ], page_size=2)
+        command = SyncCommand()
+        with mock.patch.object(command, 'sync_page', wraps=command.sync_page) as sync_page:
+            with self.captureOnCommitCallbacks(execute=True), redirect_stdout(io.StringIO()):
+                command.sync_tables(self.tables, no_files=True)
+
+        property_pages = [call for call in sync_page.call_args_list if call.args[0] == 'properties']
+        self.assertEqual([len(call.args[1]) for call in property_pages], [2, 2, 1])
+        # recA and recB are gone from Airtable, and so is the configuration linked to recA
+        self.assertEqual(Property.objects.filter(airtable_id__startswith="recP").count(), 5)
+        self.assertFalse(Property.objects.filter(airtable_id__in=["recA", "recB"]).exists())
+        self.assertEqual(AirtableSyncState.objects.get(table='properties').records_synced, 5)
+
+    def test_airtable_data_is_stored_after_files_are_downloaded(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.tables['properties'].records[0]['fields']['Thumbnail'] = [{'id': "attThumb", 'url': "https://cdn/t.jpg"}]
+        self.tables['images'].records = [
+            airtable_record("recI", "2026-01-01T10:00:00.000Z", Property=["recA"],
+                            Image=[{'id': "attImg", 'url': "https://cdn/i.jpg"}]),
+        ]
+        command = SyncCommand()
+        downloads = lambda downloader, tasks: ((task, b"jpeg bytes") for task in tasks)
+        with override_settings(MEDIA_ROOT=media_root), \
+                mock.patch.object(MediaDownloader, 'download_all', downloads), \
+                self.captureOnCommitCallbacks(execute=True), redirect_stdout(io.StringIO()), \
+                self.assertLogs('properties.renditions', 'WARNING'):  # not real JPEGs
+            command.sync_tables(self.tables)
+
+            data = airtable_cache.get_airtable_data()
+            self.assertTrue(data['property_index']['recA']['thumbnail_url'].startswith(settings.MEDIA_URL))
+            self.assertTrue(data['by_property']['recA']['images'][0]['image_url'].startswith(settings.MEDIA_URL))
+
+    def test_airtable_retries_are_counted(self):
+        class RetriedTable(FakeTable):
+            """The first page needed two urllib3 retries"""
+            api = SimpleNamespace(session=requests.Session())
+
+            def iterate(self, **options):
+                response = SimpleNamespace(raw=SimpleNamespace(retries=SimpleNamespace(history=[1, 2])))
+                for hook in self.api.session.hooks['response']:
+                    hook(response)
+                yield from super().iterate(**options)
+
+        class FailingTable(FakeTable):
+            """iterate() fails, so the records come from all()"""
+
+            def iterate(self, **options):
+                raise RuntimeError("502 Bad Gateway")
+                yield
+
+            def all(self, **options):
+                return self.records
+
+        self.tables['properties'] = RetriedTable(self.tables['properties'].records)
+        self.tables['amenities'] = FailingTable(self.tables['amenities'].records)
+        command = SyncCommand()
+        with self.captureOnCommitCallbacks(execute=True), redirect_stdout(io.StringIO()):
+            command.sync_tables(self.tables, no_files=True)
+        self.assertEqual(command.http_retries, 3)
+        self.assertEqual(PropertyAmenity.objects.count(), 2)
+        self.assertEqual(RetriedTable.api.session.hooks['response'], [])
+
+    def test_child_pages_are_spooled_while_properties_are_written(self):
+        pages = [[{'id': f"rec{i}"}] for i in range(PAGE_QUEUE_SIZE * 3)]
+        spool = PageSpool(PageStream(iter(pages)))
+        # The fetch runs to the end although nothing reads the spool yet
+        spool.thread.join(timeout=5)
+        self.assertEqual(spool.written, len(pages))
+        self.assertEqual(list(spool), pages)
+        spool.close()
+
+        def failing():
+            yield pages[0]
+            raise RuntimeError("Airtable is down")
+
+        spool = PageSpool(PageStream(failing()))
+        with self.assertRaisesMessage(RuntimeError, "Airtable is down"):
+            list(spool)
+        spool.close()
+
+    def test_sync_log_records_timings_and_record_errors(self):
+        self.tables['configurations'].records.append(
+            airtable_record("recOrphan", "2026-01-01T10:00:00.000Z", Property=["recGone"], Type="3BR"),
+        )
+        command = SyncCommand()
+        command.sync_log = AirtableSyncLog.objects.create()
+        with self.captureOnCommitCallbacks(execute=True), redirect_stdout(io.StringIO()):
+            command.sync_tables(self.tables, no_files=True)
+        command.finish_log('completed')
+
+        log = AirtableSyncLog.objects.get(pk=command.sync_log.pk)
+        self.assertEqual(log.status, 'partial')
+        for phase in ('fetch:properties', 'process', 'db:properties', 'db:cleanup', 'snapshot'):
+            self.assertIn(phase, log.phase_timings)
+        self.assertEqual(log.http_requests, 4)
+        self.assertIsNotNone(log.records_per_second)
+        self.assertEqual(log.errors_count, 1)
+        self.assertEqual(log.error_details[0]['record'], "recOrphan")
+
+
+class MediaStoreTests(TestCase):
+    """Synced media is stored once by content hash and orphans are collected"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_identical_content_is_stored_once(self):
+        first, digest = store_blob(b"jpeg bytes", '.jpg')
+        second, _ = store_blob(b"jpeg bytes", '.JPG')
+        self.assertEqual(first, second)
+        self.assertTrue(first.endswith(f"{digest}.jpg"))
+        self.assertEqual(len(list(walk_storage(BLOB_PREFIX))), 1)
+
+    def test_unchanged_attachment_is_not_downloaded(self):
+        prop = create_property(1)
+        image = prop.images.first()
+        image.image_fingerprint = "att1:100"
+        self.assertFalse(needs_download(image, 'image', "https://dl.airtable.com/a.jpg", "att1:100"))
+        self.assertTrue(needs_download(image, 'image', "https://dl.airtable.com/a.jpg", "att2:120"))
+        image.image = ''
+        self.assertTrue(needs_download(image, 'image', "https://dl.airtable.com/a.jpg", "att1:100"))
+
+    def test_gc_media_deletes_only_orphans(self):
+        prop = create_property(1)
+        kept, _ = store_blob(b"in use", '.jpg')
+        orphan, _ = store_blob(b"replaced", '.jpg')
+        PropertyImage.objects.filter(property=prop).update(image=kept)
+
+        call_command('gc_media', grace_hours=0, dry_run=True, stdout=io.StringIO())
+        self.assertTrue(default_storage.exists(orphan))
+
+        call_command('gc_media', grace_hours=0, stdout=io.StringIO())
+        self.assertTrue(default_storage.exists(kept))
+        self.assertFalse(default_storage.exists(orphan))
+
+    def test_renditions_are_built_and_rendered(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), 'navy').save(buffer, 'JPEG')
+        name, _ = store_blob(buffer.getvalue(), '.jpg')
+        prop = create_property(1)
+        image = prop.images.first()
+        image.image = name
+        with self.captureOnCommitCallbacks(execute=True):
+            image.save()
+            image.save()
+        # Built by the worker rather than in the saving request
+        job = BackgroundJob.objects.get()
+        self.assertEqual((job.name, job.kwargs['field']), ('build_renditions', 'image'))
+        image.refresh_from_db()
+        self.assertEqual(image.renditions, {})
+        run_job(claim_next_job())
+
+        image.refresh_from_db()
+        self.assertEqual(image.renditions['source'], name)
+        self.assertEqual(sorted(image.renditions['webp'], key=int), ['320', '640', '800'])
+        self.assertIn('320w', srcset(image.renditions, 'webp'))
+        # Renditions are referenced media too
+        call_command('gc_media', grace_hours=0, stdout=io.StringIO())
+        self.assertTrue(default_storage.exists(image.renditions['webp']['320']))
+
+        template = Template("{% load responsive_images %}{% picture_sources renditions %}")
+        html = template.render(Context({'renditions': image.renditions}))
+        self.assertIn('type="image/webp" srcset=', html)
+        # A format without renditions gets no <source>, which would need a srcset
+        html = template.render(Context({'renditions': {'webp': image.renditions['webp']}}))
+        self.assertEqual(html.count('<source'), 1)
+        self.assertEqual(template.render(Context({'renditions': {}})), '')
+
+
+class MediaDownloaderTests(TestCase):
+    """download_all keeps a bounded number of bodies in flight"""
+
+    def test_submissions_stay_bounded(self):
+        downloader = MediaDownloader(max_workers=2)
+        started = []
+        with mock.patch.object(downloader, 'fetch', side_effect=lambda url: started.append(url) or b'x' * 10):
+            tasks = [DownloadTask(Property, i, 'image', f'{i}.jpg', f'https://cdn.test/{i}.jpg') for i in range(20)]
+            with redirect_stdout(io.StringIO()):
+                for consumed, (task, content) in enumerate(downloader.download_all(tasks), start=1):
+                    self.assertLessEqual(len(started), consumed - 1 + downloader.max_in_flight)
+        self.assertEqual(len(started), 20)
+        self.assertEqual(downloader.completed, 20)
+        self.assertEqual(downloader.bytes_downloaded, 200)
+        downloader.close()
+
+
+class BackgroundJobTests(TestCase):
+    """Airtable syncs are queued for the run_jobs worker instead of running in the request"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('agent', password='secret')
+        UserProfile.objects.create(user=self.user, role='admin', is_employee=True)
+        self.client.force_login(self.user)
+        self.calls = []
+        patcher = mock.patch.dict(JOB_HANDLERS, {'sync_airtable': lambda job, **kwargs: self.calls.append(job.pk)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_sync_view_queues_a_single_job(self):
+        first = self.client.post(reverse('sync_airtable'))
+        second = self.client.post(reverse('sync_airtable'))
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(first.json()['job_id'], second.json()['job_id'])
+        self.assertEqual(BackgroundJob.objects.count(), 1)
+        self.assertEqual(self.calls, [])
+
+    def test_worker_runs_job_and_frees_dedupe_key(self):
+        job_id = self.client.post(reverse('sync_airtable')).json()['job_id']
+        call_command('run_jobs', once=True, stdout=io.StringIO())
+        self.assertEqual(self.calls, [job_id])
+
+        status = self.client.get(reverse('job_status', kwargs={'job_id': job_id})).json()
+        self.assertEqual(status['status'], 'completed')
+        job, created = enqueue('sync_airtable', dedupe_key='sync_airtable')
+        self.assertTrue(created)
+
+    def test_failed_job_records_error(self):
+        JOB_HANDLERS['sync_airtable'] = mock.Mock(side_effect=RuntimeError("Airtable is down"))
+        job, _ = enqueue('sync_airtable', dedupe_key='sync_airtable')
+        with self.assertLogs('properties.jobs', 'ERROR'):
+            run_job(claim_next_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIn("Airtable is down", job.error)
+        self.assertIsNone(claim_next_job())
+
+    def test_blank_error_has_no_summary(self):
+        job = BackgroundJob.objects.create(name='sync_airtable', status='failed', error=" \n\t")
+        response = self.client.get(reverse('job_status', kwargs={'job_id': job.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['error'])
+        job.error = "Traceback (most recent call last):\n  ...\nRuntimeError: Airtable is down\n"
+        self.assertEqual(job.error_summary(), "RuntimeError: Airtable is down")
+
+    @override_settings(JOB_SETTINGS={'STALE_AFTER': 10 * 60})
+    def test_only_jobs_without_a_recent_heartbeat_are_failed(self):
+        long_ago = timezone.now() - timedelta(hours=3)
+        slow, _ = enqueue('sync_airtable', dedupe_key='sync_airtable')
+        lost, _ = enqueue('export_pdfs', dedupe_key='export', export_id=1)
+        BackgroundJob.objects.filter(pk=slow.pk).update(
+            status='running', started_at=long_ago, heartbeat_at=timezone.now() - timedelta(minutes=1)
+        )
+        BackgroundJob.objects.filter(pk=lost.pk).update(
+            status='running', started_at=long_ago, heartbeat_at=timezone.now() - timedelta(minutes=11)
+        )
+        self.assertEqual(fail_stale_jobs(), 1)
+        self.assertEqual(BackgroundJob.objects.get(pk=slow.pk).status, 'running')
+        self.assertEqual(BackgroundJob.objects.get(pk=lost.pk).status, 'failed')
+        # The slow sync still holds its dedupe_key
+        self.assertEqual(enqueue('sync_airtable', dedupe_key='sync_airtable'), (slow, False))
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    """The heartbeat thread writes from its own connection, so this needs committed rows"""
+
+    def test_heartbeat_is_recorded_while_the_job_runs(self):
+        BackgroundJob.objects.create(name='sync_airtable')
+        job = claim_next_job()
+        claimed_at = job.heartbeat_at
+        with Heartbeat(job, interval=0.05):
+            time.sleep(0.3)
+        job.refresh_from_db()
+        self.assertGreater(job.heartbeat_at, claimed_at)
+
+
+
+class FilterIndexTests(TestCase):
+    """The columnar index keeps the semantics of the old per-dict filter loops"""
+
+    def setUp(self):
+        def config(bedrooms, price, is_available=True):
+            return {'bedrooms': bedrooms, 'bathrooms': bedrooms, 'price': price, 'is_available': is_available}
+
+        self.index = FilterIndex([
+            {'name': "Azure", 'address': "Ikoyi", 'description': "",
+             'configurations': [config(1, Decimal(50_000_000)), config(3, Decimal(150_000_000), False)]},
+            {'name': "Banana Island Villa", 'address': "Ikoyi", 'description': "",
+             'configurations': [config(2, "₦80,000,000")]},
+            {'name': "Coral", 'address': "Lekki Phase 1", 'description': "", 'configurations': []},
+        ])
+
+    def names(self, mask):
+        return [prop['name'] for prop in self.index.select(mask)]
+
+    def test_filters(self):
+        self.assertEqual(self.names(self.index.search("LEKKI")), ["Coral"])
+        self.assertEqual(self.names(self.index.search("ikoyi")), ["Azure", "Banana Island Villa"])
+        self.assertEqual(self.names(self.index.price_range("60000000", None)), ["Banana Island Villa"])
+        # An unparsable bound is ignored, but still drops properties without prices
+        self.assertEqual(self.names(self.index.price_range("abc", None)), ["Azure", "Banana Island Villa"])
+        self.assertEqual(self.names(self.index.rooms(min_bedrooms="2")), ["Banana Island Villa"])
+        self.assertEqual(self.names(self.index.rooms(min_bedrooms="3")), [])
+        self.assertEqual(len(self.index.filter()), 3)
+
+    def test_ranges(self):
+        ranges = self.index.ranges()
+        self.assertEqual(ranges['price_range'], {'min_price': 50_000_000.0, 'max_price': 80_000_000.0})
+        # Unavailable configurations still count towards room ranges
+        self.assertEqual(ranges['bedroom_range'], {'min_bedrooms': 1, 'max_bedrooms': 3})
+        subset = self.index.ranges(self.index.search("banana"))
+        self.assertEqual(subset['price_range'], {'min_price': 80_000_000.0, 'max_price': 80_000_000.0})
+
+
+class PurePythonFilterIndexTests(FilterIndexTests):
+    """The list columns used without numpy give the same results"""
+
+    def setUp(self):
+        patcher = mock.patch.object(filter_index, 'np', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+
+class PropertySearchTests(TestCase):
+    """The full-text index stays in sync through signals and ranks matches"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.towers = Property.objects.create(
+                name="Eko Towers", slug="eko-towers", address="Ikoyi", description="Serviced flats near Lekki"
+            )
+            self.pearl = Property.objects.create(
+                name="Lekki Pearl", slug="lekki-pearl", address="Lekki Phase 1", description="Duplexes"
+            )
+            PropertyAmenity.objects.create(property=self.towers, name="Swimming Pool")
+
+    def names(self, query):
+        properties, ordering = search_properties(Property.objects.all(), query)
+        return list(properties.order_by(*ordering).values_list('name', flat=True))
+
+    def test_prefix_ranking_and_amenities(self):
+        # A name match outranks a description match
+        self.assertEqual(self.names("lekk"), ["Lekki Pearl", "Eko Towers"])
+        self.assertEqual(self.names("swim"), ["Eko Towers"])
+        self.assertEqual(self.names("ikoyi duplex"), [])
+        self.assertEqual(self.names("!!"), [])
+
+    def test_typos_are_corrected_against_indexed_terms(self):
+        self.assertEqual(correct_terms(["lekky", "ikoy", "zz"], ["ikoyi", "lekki"]), ["lekki", "ikoy", "zz"])
+        self.assertEqual(self.names("lekky pearl"), ["Lekki Pearl"])
+
+    def test_index_follows_saves_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pearl.name = "Ocean Pearl"
+            self.pearl.save()
+            self.towers.amenities.all().delete()
+        self.assertEqual(self.names("ocean"), ["Ocean Pearl"])
+        self.assertEqual(self.names("swimming"), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            pk = self.pearl.pk
+            self.pearl.delete()
+        self.assertNotIn(pk, search_ids("pearl"))
+
+    def test_index_lookup_is_remembered(self):
+        self.assertTrue(index_available())
+        with self.assertNumQueries(0):
+            self.assertTrue(index_available())
+        # Re-creating the index checks the catalog again
+        create_index()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(index_available())
+        self.assertTrue(queries.captured_queries)
+
+    def test_landing_view_orders_by_rank(self):
+        user = User.objects.create_user("agent", password="x")
+        UserProfile.objects.create(user=user, role='admin', is_employee=True)
+        self.client.force_login(user)
+        response = self.client.get(reverse('landing'), {'search': "lekki"})
+        self.assertEqual([prop.name for prop in response.context['properties']], ["Lekki Pearl", "Eko Towers"])
+
+    def test_matches_outside_the_queryset_do_not_crowd_out_results(self):
+        # 600 better-ranked matches that are not on the shared list
+        Property.objects.bulk_create(
+            Property(name=f"Lekki Court {i}", slug=f"lekki-court-{i}", address="Lekki") for i in range(600)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            listed = [
+                Property.objects.create(name=f"Villa {i}", slug=f"villa-{i}", description="Close to Lekki")
+                for i in range(5)
+            ]
+        index_properties()
+        user = User.objects.create_user("agent", password="x")
+        shared_list = SharedPropertyList.objects.create(
+            name="Villas", created_by=user, expires_at=timezone.now() + timedelta(days=1)
+        )
+        shared_list.properties.add(*listed)
+
+        response = self.client.get(
+            reverse('shared_properties', kwargs={'token': shared_list.token}), {'search': "lekki"}
+        )
+        self.assertEqual(response.context['total_count'], 5)
+
+        # Cursors round-trip the rank so every match is paged exactly once
+        properties, ordering = search_properties(shared_list.properties.all(), "lekki")
+        seen, cursor = [], None
+        while True:
+            page, cursor = keyset_paginate(properties, cursor, page_size=2, ordering=ordering)
+            seen.extend(prop.pk for prop in page)
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), sorted(prop.pk for prop in listed))
+
+
+class AirtableCacheTests(TestCase):
+    """get_airtable_data serves stale data while a single refresh runs"""
+
+    def setUp(self):
+        persistent_cache.clear()
+        self.addCleanup(persistent_cache.clear)
+        prop = create_property(1)
+        Property.objects.filter(pk=prop.pk).update(airtable_id="recProp1")
+
+    def test_miss_rebuilds_from_database_once(self):
+        data = airtable_cache.get_airtable_data()
+        self.assertEqual([row['airtable_id'] for row in data['properties']], ["recProp1"])
+        with self.assertNumQueries(0):
+            airtable_cache.get_airtable_data()
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_stale_entry_is_served_while_one_refresh_runs(self):
+        airtable_cache.store_airtable_data({'properties': [{'airtable_id': "recStale"}]}, soft_ttl=-1)
+        with mock.patch.object(airtable_cache.threading, 'Thread') as thread:
+            self.assertIn("recStale", airtable_cache.get_airtable_data()['property_index'])
+            # The first refresh still holds the lock, so no second one starts
+            self.assertIn("recStale", airtable_cache.get_airtable_data()['property_index'])
+        self.assertEqual(thread.call_count, 1)
+
+        with mock.patch.object(airtable_cache, 'connection'):
+            thread.call_args.kwargs['target']()
+        self.assertEqual(airtable_cache.get_airtable_data()['properties'][0]['airtable_id'], "recProp1")
+        lock = FileLock(airtable_cache.REFRESH_LOCK_NAME)
+        self.assertTrue(lock.acquire(blocking=False))
+        lock.release()
+
+    def test_refresh_command_skips_fresh_data_unless_forced(self):
+        airtable_cache.store_airtable_data({'properties': [{'airtable_id': "recCached"}]})
+        out = io.StringIO()
+        call_command('refresh_airtable_cache', stdout=out)
+        self.assertIn("Skipping refresh", out.getvalue())
+        self.assertIn("recCached", airtable_cache.get_airtable_data()['property_index'])
+
+        call_command('refresh_airtable_cache', force=True, stdout=io.StringIO())
+        self.assertEqual(list(airtable_cache.get_airtable_data()['property_index']), ["recProp1"])
+
+    def test_empty_database_queues_a_sync_instead_of_crawling(self):
+        Property.objects.all().delete()
+        self.assertEqual(airtable_cache.get_airtable_data()['properties'], [])
+        self.assertEqual(BackgroundJob.objects.get().name, 'sync_airtable')
+
+    def test_cached_data_is_grouped_by_property(self):
+        data = airtable_payload(2)
+        data['images'].append({'airtable_id': "recCover", 'property_id': "recProp0", 'image_url': None,
+                               'alt_text': "", 'order': -1, 'attachment_index': 0, 'original_record_id': "recCover"})
+        airtable_cache.store_airtable_data(data)
+        data = airtable_cache.get_airtable_data()
+
+        related = data['by_property']['recProp0']
+        self.assertEqual([image['airtable_id'] for image in related['images']], ["recCover", "recImg0"])
+        self.assertEqual(len(related['configurations']), 2)
+        self.assertEqual(related['min_price'], 50_000_000)
+
+        html = Template(
+            "{% load airtable_filters %}{% get_property_by_id data 'recProp1' as prop %}{{ prop.name }}"
+        ).render(Context({'data': data}))
+        self.assertEqual(html, "Tower 1")
+
+
+class FileResponseRangeTests(TestCase):
+    """file_response answers single byte ranges for resumable downloads"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'0123456789')
+        self.addCleanup(os.remove, self.path)
+        self.factory = RequestFactory()
+
+    def get(self, etag='"v1"', **headers):
+        request = self.factory.get('/download', **headers)
+        return views.file_response(request, self.path, 'file.pdf', 'application/pdf', etag=etag)
+
+    def body(self, response):
+        content = b''.join(response.streaming_content)
+        response.close()
+        return content
+
+    def test_byte_range_parsing(self):
+        self.assertEqual(views._byte_range('bytes=2-5', 10), (2, 5))
+        self.assertEqual(views._byte_range('bytes=2-', 10), (2, 9))
+        self.assertEqual(views._byte_range('bytes=2-99', 10), (2, 9))
+        self.assertEqual(views._byte_range('bytes=-3', 10), (7, 9))
+        self.assertEqual(views._byte_range('bytes=-30', 10), (0, 9))
+        self.assertIs(views._byte_range('bytes=10-', 10), False)
+        self.assertIs(views._byte_range('bytes=-0', 10), False)
+        for header in ('bytes=5-2', 'bytes=-', 'bytes=0-1,4-5', 'items=0-1', 'bytes=a-b'):
+            with self.subTest(header=header):
+                self.assertIsNone(views._byte_range(header, 10))
+
+    def test_full_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(self.body(response), b'0123456789')
+
+    def test_ranges(self):
+        for header, content_range, content in (
+            ('bytes=2-5', 'bytes 2-5/10', b'2345'),
+            ('bytes=6-', 'bytes 6-9/10', b'6789'),
+            ('bytes=-3', 'bytes 7-9/10', b'789'),
+        ):
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(response['Content-Length'], str(len(content)))
+                self.assertEqual(self.body(response), content)
+
+    def test_unsatisfiable_range(self):
+        response = self.get(HTTP_RANGE='bytes=10-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_if_range_must_match(self):
+        self.assertEqual(self.get(HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"v1"').status_code, 206)
+        response = self.get(HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"v0"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), b'0123456789')
+
+    def test_if_none_match_is_answered_before_ranges(self):
+        request = self.factory.get('/download', HTTP_IF_NONE_MATCH='"v1"', HTTP_RANGE='bytes=2-5')
+        with mock.patch.object(views, 'pdf_data_version', return_value=('v1', None)), \
+                mock.patch.object(views, 'cached_pdf', return_value=self.path) as cached:
+            response = views.pdf_response(request, 'property', [1], 'file.pdf', render=None)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], '"v1"')
+            cached.assert_not_called()
+
+            request = self.factory.get('/download', HTTP_IF_NONE_MATCH='"v0"', HTTP_RANGE='bytes=2-5')
+            response = views.pdf_response(request, 'property', [1], 'file.pdf', render=None)
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(self.body(response), b'2345')
+
+
+class PropertyPDFTests(TestCase):
+    """PDFs read images from storage and are cached on disk per data version"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.cache_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.addCleanup(shutil.rmtree, self.cache_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, PDF_SETTINGS={
+            'IMAGE_CACHE_ROOT': self.cache_root, 'ARTIFACT_ROOT': os.path.join(self.cache_root, 'pdfs'),
+            'EXPORT_ROOT': os.path.join(self.cache_root, 'exports'), 'EXPORT_WORKERS': 1,
+        })
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        buffer = io.BytesIO()
+        Image.new('RGBA', (1600, 1200), 'teal').save(buffer, 'PNG')
+        self.image_name, _ = store_blob(buffer.getvalue(), '.png')
+
+    def test_images_are_resized_once_and_cached(self):
+        data, width, height = pdf.load_pdf_image(self.image_name)
+        self.assertEqual((width, height), (400, 300))
+        self.assertTrue(data.startswith(b'\xff\xd8'))
+
+        with mock.patch.object(pdf, '_open_source') as read:
+            self.assertEqual(pdf.load_pdf_image(self.image_name), (data, width, height))
+            # A fresh process finds the resized copy on disk
+            pdf._image_caches.clear()
+            self.assertEqual(pdf.load_pdf_image(self.image_name), (data, width, height))
+            read.assert_not_called()
+        self.assertIsNone(pdf.load_pdf_image("missing/image.jpg"))
+
+    def test_pdfs_read_images_without_http(self):
+        properties = [create_property(1), create_property(2)]
+        PropertyImage.objects.update(image=self.image_name)
+        refresh_property_summaries(prop.pk for prop in properties)
+        properties = list(Property.objects.filter(pk__in=[prop.pk for prop in properties]))
+
+        generator = pdf.PropertyPDFGenerator()
+        with mock.patch.object(pdf.requests, 'get') as get:
+            self.assertTrue(generator.generate_property_pdf(properties[0]).startswith(b'%PDF'))
+            self.assertTrue(generator.generate_comparison_pdf(properties).startswith(b'%PDF'))
+            get.assert_not_called()
+        self.assertEqual(len(list(pathlib.Path(self.cache_root).rglob('*.jpg'))), 2)
+
+    def test_pdf_downloads_are_cached_per_data_version(self):
+        user = User.objects.create_user("agent", password="x")
+        UserProfile.objects.create(user=user, role='admin', is_employee=True)
+        self.client.force_login(user)
+        prop = create_property(1)
+        url = reverse('property_pdf', args=[prop.pk])
+
+        def render_pdf(prop, request=None, output=None):
+            output.write(b'%PDF-1 document')
+
+        with mock.patch.object(pdf.PropertyPDFGenerator, 'generate_property_pdf', side_effect=render_pdf) as render:
+            response = self.client.get(url)
+            self.assertEqual(b''.join(response.streaming_content), b'%PDF-1 document')
+            self.assertEqual(response['Content-Length'], '15')
+            etag = response['ETag']
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.client.get(url)
+            self.assertEqual(render.call_count, 1)
+
+            # Resumed downloads get just the requested bytes
+            response = self.client.get(url, HTTP_RANGE='bytes=7-', HTTP_IF_RANGE=etag)
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response['Content-Range'], 'bytes 7-14/15')
+            self.assertEqual(b''.join(response.streaming_content), b'document')
+            self.assertEqual(b''.join(self.client.get(url, HTTP_RANGE='bytes=-3').streaming_content), b'ent')
+            self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=7-', HTTP_IF_RANGE='"old"').status_code, 200)
+            self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=99-').status_code, 416)
+
+            # An amenity removed at sync time changes the version
+            prop.amenities.first().delete()
+            self.assertEqual(pdf.prune_pdf_cache(), 1)
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+            self.assertEqual(render.call_count, 2)
+            response.close()
+
+            self.assertEqual(pdf.prerender_property_pdfs(), 0)
+            create_property(2)
+            self.assertEqual(pdf.prerender_property_pdfs(), 1)
+
+    def test_long_comparisons_get_hashed_document_names(self):
+        properties = [create_property(i) for i in range(3)]
+        property_ids = [prop.pk for prop in properties] + list(range(10_000, 10_100))
+        name = pdf._document_name('comparison', property_ids)
+        self.assertLessEqual(len(name), 40)
+        self.assertEqual(pdf._document_name('comparison', reversed(property_ids)), name)
+
+        stats = pdf._data_stats()
+        version, _ = pdf._version(property_ids[:3], stats)
+        path = pdf.cached_pdf('comparison', property_ids[:3], version, lambda f: f.write(b'%PDF'))
+        self.assertEqual(os.path.basename(os.path.dirname(path)), pdf._document_name('comparison', property_ids[:3]))
+        # Hashed documents list their ids, so pruning can still check them
+        with mock.patch.object(pdf, 'MAX_DOCUMENT_NAME_IDS', 1):
+            path = pdf.cached_pdf('comparison', property_ids[:3], version, lambda f: f.write(b'%PDF'))
+            self.assertEqual(pdf.prune_pdf_cache(), 0)
+            properties[0].amenities.first().delete()
+            self.assertEqual(pdf.prune_pdf_cache(), 2)
+        self.assertEqual(os.listdir(pdf.pdf_settings()['ARTIFACT_ROOT']), [])
+
+    def test_merged_exports_and_expiry(self):
+        agent = User.objects.create_user("agent", password="x")
+        UserProfile.objects.create(user=agent, role='admin', is_employee=True)
+        self.client.force_login(agent)
+        property_ids = [create_property(1).pk, create_property(2).pk]
+        response = self.client.post(reverse('create_pdf_export'), {'property_ids': property_ids, 'format': 'pdf'},
+                                    content_type='application/json')
+        status_url = response.json()['status_url']
+        run_job(claim_next_job())
+        export = PropertyPDFExport.objects.get()
+        # pypdf appends the cached per-property PDFs
+        pages = sum(len(PdfReader(exports.render_property_pdf(pk)).pages) for pk in property_ids)
+        self.assertEqual(len(PdfReader(export.file_path).pages), pages)
+
+        # A stray temp file from a killed worker is old enough to go as well
+        stray = os.path.join(pdf.pdf_settings()['EXPORT_ROOT'], 'stray.tmp')
+        open(stray, 'wb').close()
+        self.assertEqual(exports.prune_pdf_exports(), 0)
+        self.assertEqual(self.client.get(status_url).json()['status'], 'completed')
+        for path in (export.file_path, stray):
+            os.utime(path, (0, 0))
+        PropertyPDFExport.objects.update(completed_at=timezone.now() - timedelta(days=8))
+        self.assertEqual(exports.prune_pdf_exports(), 2)
+        self.assertEqual(os.listdir(pdf.pdf_settings()['EXPORT_ROOT']), [])
+        self.assertEqual(self.client.get(status_url).json()['status'], 'expired')
+        download_url = reverse('download_pdf_export', kwargs={'export_id': export.pk})
+        self.assertEqual(self.client.get(download_url).status_code, 410)
+
+    def test_shared_list_export_runs_as_a_job(self):
+        agent = User.objects.create_user("agent", password="x")
+        UserProfile.objects.create(user=agent, role='agent', can_share_properties=True)
+        shared_list = SharedPropertyList.objects.create(
+            name="Client pack", created_by=agent, expires_at=timezone.now() + timedelta(days=1)
+        )
+        shared_list.properties.set([create_property(1), create_property(2)])
+        PropertyImage.objects.update(image=self.image_name)
+        self.client.force_login(agent)
+
+        response = self.client.post(reverse('create_pdf_export'), {'shared_list_id': shared_list.pk},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()['status_url']
+        self.assertEqual(self.client.get(status_url).json()['status'], 'queued')
+
+        run_job(claim_next_job())
+        status = self.client.get(status_url).json()
+        self.assertEqual((status['status'], status['rendered'], status['total']), ('completed', 2, 2))
+        response = self.client.get(status['download_url'])
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="client-pack-{status["id"]}.zip"')
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(archive.namelist(), ["property-1-details.pdf", "property-2-details.pdf"])
+
+        # Merged PDFs are laid out in one document when pypdf is missing
+        self.client.post(reverse('create_pdf_export'), {'shared_list_id': shared_list.pk, 'format': 'pdf'},
+                         content_type='application/json')
+        with mock.patch.object(exports, 'PdfWriter', None):
+            run_job(claim_next_job())
+        export = PropertyPDFExport.objects.get(format='pdf')
+        with open(export.file_path, 'rb') as f:
+            self.assertTrue(f.read().startswith(b'%PDF'))
+
+        other = User.objects.create_user("other", password="x")
+        UserProfile.objects.create(user=other, role='agent')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(status_url).status_code, 404)
+        response = self.client.post(reverse('create_pdf_export'), {'shared_list_id': shared_list.pk},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 404)
+
+    def test_generators_share_one_style_registry(self):
+        styles = pdf.PropertyPDFGenerator().styles
+        self.assertIs(pdf.PropertyPDFGenerator().styles, styles)
+        self.assertEqual(styles['PropertyTitle'].fontSize, 24)
+        with self.assertRaises(TypeError):
+            styles['PropertyTitle'] = styles['Normal']
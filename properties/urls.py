@@ -5,6 +5,8 @@ urlpatterns = [
     path("", views.landing_view, name='landing'),
     path('dashboard/', views.dashboard_view, name='dashboard'),
     path('api/properties/', views.properties_api, name='properties_api'),
+    path('api/properties/map/', views.properties_map_api, name='properties_map_api'),
+    path('api/properties/nearby/', views.properties_nearby_api, name='properties_nearby_api'),
     path('api/properties/<int:property_id>/', views.property_detail_api, name='property_detail_api'),
     # path('login', views.login, name='login'),
     path('api/create-shared-list/', views.create_shared_list, name='create_shared_list'),
@@ -15,11 +17,15 @@ urlpatterns = [
     path('manage-shares/toggle/<int:list_id>/', views.toggle_shared_link, name='toggle_shared_list'),
     path('admins/create-employee/', views.create_employee_view, name='create_employee'),
     path('api/sync-airtable/', views.sync_airtable, name='sync_airtable'),
+    path('api/jobs/<int:job_id>/', views.job_status, name='job_status'),
     path('property/<int:property_id>/pdf/', views.download_property_pdf, name='property_pdf'),
     
     # Property Comparison URLs
     path('api/compare-properties/', views.compare_properties, name='compare_properties'),
     path('comparison/<str:property_ids>/pdf/', views.download_comparison_pdf, name='comparison_pdf'),
+    path('api/pdf-exports/', views.create_pdf_export, name='create_pdf_export'),
+    path('api/pdf-exports/<int:export_id>/', views.pdf_export_status, name='pdf_export_status'),
+    path('pdf-exports/<int:export_id>/download/', views.download_pdf_export, name='download_pdf_export'),
     # path('api/airtable/property/<str:property_id>/', views.airtable_property_detail_api, name='airtable_property_detail_api'),
     # path('api/airtable/properties/', views.airtable_all_properties_api, name='airtable_all_properties_api'),
     
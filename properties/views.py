@@ -1,13 +1,14 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse, Http404
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, condition
 from django.contrib.auth.decorators import login_required
 from django.views.generic import CreateView, UpdateView
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils.decorators import method_decorator
-from django.db.models import Q, Min, Max
+from django.db.models import Q, Min, Max, Avg, Count
+from django.db.models.functions import Substr
 from django.contrib import messages
-from .models import SharedPropertyList, UserProfile, Property, PropertyConfiguration, PropertyImage, PropertyAmenity
+from .models import SharedPropertyList, UserProfile, Property, PropertyConfiguration, PropertyImage, PropertyAmenity, BackgroundJob, PropertyPDFExport
 from django.utils import timezone
 from django.db.models.functions import ExtractMonth, ExtractYear
 from datetime import timedelta
@@ -15,27 +16,32 @@ from django.contrib.auth import login
 from datetime import datetime, timedelta
 from decouple import config
 from .forms import CustomUserCreationForm
+from .snapshots import (
+    AIRTABLE_RECORDS_SCHEMA, absolutize_property, get_properties_snapshot, get_snapshot_body, serialize_property
+)
+from .pagination import DEFAULT_ORDERING, InvalidCursor, get_page_size, keyset_paginate, next_page_query
+from .listings import with_card_data
+from .jobs import enqueue
+from .airtable_cache import get_airtable_data, group_by_property, no_related
+from .filter_index import get_filter_index
+from .search import search_properties
+from .pdf import PropertyPDFGenerator, cached_pdf, pdf_data_version, pdf_settings
+from .geo import geohash_cover, haversine_km, radius_bbox, zoom_to_precision
 import json
 import logging
+import math
+import os
+import re
 from django.urls import reverse, reverse_lazy
-from io import BytesIO
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
 from django.shortcuts import get_object_or_404
 from django.template.loader import get_template
 from django.conf import settings
 from django.core.files.storage import default_storage
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, PageBreak
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from PIL import Image as PILImage
 from calendar import month_name
-import os
-import requests
 from decimal import Decimal
-import requests
 logger = logging.getLogger(__name__)
 
 from django.shortcuts import render
@@ -50,229 +56,88 @@ logger = logging.getLogger(__name__)
 
 
 
-def get_property_min_price(configurations):
-    """
-    Get the minimum price from property configurations
-    """
-    if not configurations:
-        return None
-    
-    prices = []
-    for config in configurations:
-        if config.get('price') and config.get('is_available', True):
-            try:
-                # Handle Decimal objects
-                if isinstance(config['price'], Decimal):
-                    prices.append(float(config['price']))
-                elif isinstance(config['price'], (int, float)):
-                    prices.append(float(config['price']))
-                elif isinstance(config['price'], str):
-                    # Try to convert string to float, removing any currency symbols
-                    clean_price = config['price'].replace('₦', '').replace(',', '').strip()
-                    if clean_price and clean_price.replace('.', '').isdigit():
-                        prices.append(float(clean_price))
-            except (ValueError, TypeError):
-                continue
-    
-    return min(prices) if prices else None
+AIRTABLE_FILTER_PARAMS = (
+    'search', 'min_price', 'max_price', 'min_bedrooms', 'max_bedrooms', 'min_bathrooms', 'max_bathrooms',
+)
 
-def apply_search_filter(properties, search_query):
-    """
-    Apply search filter to properties
-    """
-    if not search_query:
-        return properties
-    
-    search_query = search_query.lower()
-    filtered_properties = []
-    
-    for prop in properties:
-        # Search in name, address, and description
-        searchable_text = ' '.join([
-            prop.get('name', '').lower(),
-            prop.get('address', '').lower(),
-            prop.get('description', '').lower()
-        ])
-        
-        if search_query in searchable_text:
-            filtered_properties.append(prop)
-    
-    return filtered_properties
 
-def apply_price_filter(properties, min_price, max_price):
+def apply_summary_filters(properties, filters):
     """
-    Apply price range filter to properties
+    Filter a Property queryset by price/bedroom/bathroom ranges using the
+    denormalized summary columns. A property matches when any available
+    configuration could satisfy each bound. Invalid values are ignored.
     """
-    filtered_properties = []
-    
-    for prop in properties:
-        prop_prices = []
-        
-        # Get all prices from configurations
-        for config in prop.get('configurations', []):
-            if config.get('price') and config.get('is_available', True):
-                try:
-                    if isinstance(config['price'], Decimal):
-                        prop_prices.append(float(config['price']))
-                    elif isinstance(config['price'], (int, float)):
-                        prop_prices.append(float(config['price']))
-                    elif isinstance(config['price'], str):
-                        clean_price = config['price'].replace('₦', '').replace(',', '').strip()
-                        if clean_price and clean_price.replace('.', '').isdigit():
-                            prop_prices.append(float(clean_price))
-                except (ValueError, TypeError):
-                    continue
-        
-        if not prop_prices:
-            # If no valid prices, include property only if no price filter is applied
-            if not min_price and not max_price:
-                filtered_properties.append(prop)
+    bounds = [
+        ('min_price', 'max_price__gte', float),
+        ('max_price', 'min_price__lte', float),
+        ('min_bedrooms', 'max_bedrooms__gte', int),
+        ('max_bedrooms', 'min_bedrooms__lte', int),
+        ('min_bathrooms', 'max_bathrooms__gte', int),
+        ('max_bathrooms', 'min_bathrooms__lte', int),
+    ]
+    for key, lookup, cast in bounds:
+        value = filters.get(key)
+        if not value:
             continue
-        
-        # Check if any price falls within the range
-        min_prop_price = min(prop_prices)
-        max_prop_price = max(prop_prices)
-        
-        include_property = True
-        
-        if min_price:
-            try:
-                min_price_float = float(min_price)
-                if max_prop_price < min_price_float:
-                    include_property = False
-            except (ValueError, TypeError):
-                pass
-        
-        if max_price and include_property:
-            try:
-                max_price_float = float(max_price)
-                if min_prop_price > max_price_float:
-                    include_property = False
-            except (ValueError, TypeError):
-                pass
-        
-        if include_property:
-            filtered_properties.append(prop)
-    
-    return filtered_properties
+        try:
+            properties = properties.filter(**{lookup: cast(value)})
+        except (TypeError, ValueError):
+            pass
+    return properties
+
+
+LISTING_FILTERS = (
+    'search', 'luxury_status', 'min_price', 'max_price', 'min_bedrooms', 'max_bedrooms',
+    'min_bathrooms', 'max_bathrooms', 'completion_date', 'near_lat', 'near_lng', 'radius_km',
+)
+
+
+def listing_filters(params):
+    """The listing filter values of a query dict, blank when missing"""
+    return {key: params.get(key, '').strip() for key in LISTING_FILTERS}
 
-def apply_bedroom_bathroom_filter(properties, min_bedrooms, max_bedrooms, min_bathrooms, max_bathrooms):
-    """
-    Apply bedroom and bathroom filters to properties
-    """
-    filtered_properties = []
-    
-    for prop in properties:
-        configurations = prop.get('configurations', [])
-        
-        if not configurations:
-            # If no configurations, include property only if no bedroom/bathroom filter is applied
-            if not any([min_bedrooms, max_bedrooms, min_bathrooms, max_bathrooms]):
-                filtered_properties.append(prop)
-            continue
-        
-        # Check if any configuration matches the criteria
-        matches_criteria = False
-        
-        for config in configurations:
-            if not config.get('is_available', True):
-                continue
-                
-            bedrooms = config.get('bedrooms', 0)
-            bathrooms = config.get('bathrooms', 0)
-            
-            bedroom_match = True
-            bathroom_match = True
-            
-            # Check bedroom criteria
-            if min_bedrooms:
-                try:
-                    if bedrooms < int(min_bedrooms):
-                        bedroom_match = False
-                except (ValueError, TypeError):
-                    pass
-            
-            if max_bedrooms and bedroom_match:
-                try:
-                    if bedrooms > int(max_bedrooms):
-                        bedroom_match = False
-                except (ValueError, TypeError):
-                    pass
-            
-            # Check bathroom criteria
-            if min_bathrooms:
-                try:
-                    if bathrooms < int(min_bathrooms):
-                        bathroom_match = False
-                except (ValueError, TypeError):
-                    pass
-            
-            if max_bathrooms and bathroom_match:
-                try:
-                    if bathrooms > int(max_bathrooms):
-                        bathroom_match = False
-                except (ValueError, TypeError):
-                    pass
-            
-            if bedroom_match and bathroom_match:
-                matches_criteria = True
-                break
-        
-        if matches_criteria:
-            filtered_properties.append(prop)
-    
-    return filtered_properties
 
-def get_filter_ranges(properties):
+def apply_listing_filters(properties, filters):
     """
-    Calculate filter ranges from the current properties data
+    Apply the landing page / dashboard filters to a Property queryset and
+    return it with the ordering to paginate by. Invalid values are ignored.
     """
-    all_prices = []
-    all_bedrooms = []
-    all_bathrooms = []
-    
-    for prop in properties:
-        for config in prop.get('configurations', []):
-            # Collect prices
-            if config.get('price') and config.get('is_available', True):
-                try:
-                    if isinstance(config['price'], Decimal):
-                        all_prices.append(float(config['price']))
-                    elif isinstance(config['price'], (int, float)):
-                        all_prices.append(float(config['price']))
-                    elif isinstance(config['price'], str):
-                        clean_price = config['price'].replace('₦', '').replace(',', '').strip()
-                        if clean_price and clean_price.replace('.', '').isdigit():
-                            all_prices.append(float(clean_price))
-                except (ValueError, TypeError):
-                    continue
-            
-            # Collect bedrooms and bathrooms
-            if isinstance(config.get('bedrooms'), (int, str)):
-                try:
-                    all_bedrooms.append(int(config['bedrooms']))
-                except (ValueError, TypeError):
-                    pass
-            
-            if isinstance(config.get('bathrooms'), (int, str)):
-                try:
-                    all_bathrooms.append(int(config['bathrooms']))
-                except (ValueError, TypeError):
-                    pass
-    
+    ordering = DEFAULT_ORDERING
+    if filters['search']:
+        properties, ordering = search_properties(properties, filters['search'])
+
+    if filters['luxury_status']:
+        properties = properties.filter(luxury_status=filters['luxury_status'])
+
+    # Filter by configuration summary columns (price, bedrooms, bathrooms)
+    properties = apply_summary_filters(properties, filters)
+
+    # Filter by completion date
+    if filters['completion_date']:
+        try:
+            completion_date = datetime.strptime(filters['completion_date'], '%Y-%m-%d').date()
+            properties = properties.filter(completion_date__lte=completion_date)
+        except ValueError:
+            pass
+
+    # Filter by distance from a point
+    properties = apply_location_filter(
+        properties, filters['near_lat'], filters['near_lng'], filters['radius_km']
+    )
+    return properties, ordering
+
+
+def get_summary_ranges(properties):
+    """Price/bedroom/bathroom ranges for the filter form, from summary columns"""
+    ranges = properties.aggregate(
+        min_price=Min('min_price'), max_price=Max('max_price'),
+        min_bedrooms=Min('min_bedrooms'), max_bedrooms=Max('max_bedrooms'),
+        min_bathrooms=Min('min_bathrooms'), max_bathrooms=Max('max_bathrooms'),
+    )
     return {
-        'price_range': {
-            'min_price': min(all_prices) if all_prices else None,
-            'max_price': max(all_prices) if all_prices else None
-        },
-        'bedroom_range': {
-            'min_bedrooms': min(all_bedrooms) if all_bedrooms else None,
-            'max_bedrooms': max(all_bedrooms) if all_bedrooms else None
-        },
-        'bathroom_range': {
-            'min_bathrooms': min(all_bathrooms) if all_bathrooms else None,
-            'max_bathrooms': max(all_bathrooms) if all_bathrooms else None
-        }
+        'price_range': {'min_price': ranges['min_price'], 'max_price': ranges['max_price']},
+        'bedroom_range': {'min_bedrooms': ranges['min_bedrooms'], 'max_bedrooms': ranges['max_bedrooms']},
+        'bathroom_range': {'min_bathrooms': ranges['min_bathrooms'], 'max_bathrooms': ranges['max_bathrooms']},
     }
 
 
@@ -289,17 +154,17 @@ def sync_airtable(request):
         return JsonResponse({'error': 'Permission denied'}, status=403)
     
     if request.method == 'POST':
-        try:
-            # Run the sync_airtable_to_models command
-            call_command('sync_airtable')
-            logger.info(f"User {request.user.username} successfully triggered Airtable sync")
-            return JsonResponse({
-                'success': True,
-                'message': 'Airtable sync completed successfully'
-            })
-        except Exception as e:
-            logger.error(f"Airtable sync failed: {str(e)}")
-            return JsonResponse({'error': f'Sync failed: {str(e)}'}, status=500)
+        # The sync takes minutes, so it runs on the job worker (run_jobs)
+        job, created = enqueue('sync_airtable', dedupe_key='sync_airtable', created_by=request.user)
+        if created:
+            logger.info(f"User {request.user.username} queued Airtable sync job {job.pk}")
+        return JsonResponse({
+            'success': True,
+            'job_id': job.pk,
+            'status': job.status,
+            'status_url': reverse('job_status', kwargs={'job_id': job.pk}),
+            'message': 'Airtable sync queued' if created else 'An Airtable sync is already in progress'
+        }, status=202)
     
     logger.warning(f"Invalid request method: {request.method}")
     return JsonResponse({'error': 'Invalid request method'}, status=405)
@@ -309,6 +174,41 @@ def sync_airtable(request):
 
 
 
+@login_required
+@require_http_methods(["GET"])
+def job_status(request, job_id):
+    """Status and progress of a background job, polled by the sync button"""
+    try:
+        if not request.user.profile.is_employee:
+            return JsonResponse({'error': 'Permission denied'}, status=403)
+    except UserProfile.DoesNotExist:
+        return JsonResponse({'error': 'Permission denied'}, status=403)
+
+    job = get_object_or_404(BackgroundJob, pk=job_id)
+    data = {
+        'id': job.pk,
+        'name': job.name,
+        'status': job.status,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+        'error': job.error_summary(),
+        'progress': None,
+    }
+    sync_log = job.sync_logs.order_by('-started_at').first()
+    if sync_log:
+        data['progress'] = {
+            'phase': sync_log.phase,
+            'status': sync_log.status,
+            'properties_processed': sync_log.properties_processed,
+            'configurations_processed': sync_log.configurations_processed,
+            'images_processed': sync_log.images_processed,
+            'amenities_processed': sync_log.amenities_processed,
+            'errors_count': sync_log.errors_count,
+        }
+    return JsonResponse(data)
+
+
 def dashboard_view(request):
     """Map dashboard view - for employees only"""
     if not request.user.is_authenticated:
@@ -429,62 +329,48 @@ def shared_properties_view(request, token):
     max_bathrooms = request.GET.get('max_bathrooms')
     luxury_status = request.GET.get('luxury_status')
     completion_date = request.GET.get('completion_date')
+    near_lat = request.GET.get('near_lat', '')
+    near_lng = request.GET.get('near_lng', '')
+    radius_km = request.GET.get('radius_km', '')
     
     
     # Get properties from shared list
-    properties = shared_list.properties.filter(is_active=True).prefetch_related(
-        'configurations', 'images', 'amenities'
-    )
+    properties = with_card_data(shared_list.properties.filter(is_active=True))
     
     # Apply filters
+    ordering = DEFAULT_ORDERING
     if search_query:
-        properties = properties.filter(
-            Q(name__icontains=search_query) |
-            Q(address__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
+        properties, ordering = search_properties(properties, search_query)
     
     if luxury_status:
         properties = properties.filter(luxury_status=luxury_status)
     
-    # Filter by price range
-    if min_price:
-        properties = properties.filter(configurations__price__gte=min_price).distinct()
-    if max_price:
-        properties = properties.filter(configurations__price__lte=max_price).distinct()
-    
-    # Filter by bedrooms
-    if min_bedrooms:
-        properties = properties.filter(configurations__bedrooms__gte=min_bedrooms).distinct()
-    if max_bedrooms:
-        properties = properties.filter(configurations__bedrooms__lte=max_bedrooms).distinct()
-    
-    # Filter by bathrooms
-    if min_bathrooms:
-        properties = properties.filter(configurations__bathrooms__gte=min_bathrooms).distinct()
-    if max_bathrooms:
-        properties = properties.filter(configurations__bathrooms__lte=max_bathrooms).distinct()
+    # Filter by configuration summary columns (price, bedrooms, bathrooms)
+    properties = apply_summary_filters(properties, {
+        'min_price': min_price,
+        'max_price': max_price,
+        'min_bedrooms': min_bedrooms,
+        'max_bedrooms': max_bedrooms,
+        'min_bathrooms': min_bathrooms,
+        'max_bathrooms': max_bathrooms,
+    })
     
     # Filter by completion date
     if completion_date:
         properties = properties.filter(completion_date__lte=completion_date)
+
+    # Filter by distance from a point
+    properties = apply_location_filter(properties, near_lat, near_lng, radius_km)
     # Get filter ranges
     all_shared_properties = shared_list.properties.filter(is_active=True)
-    price_range = all_shared_properties.aggregate(
-        min_price=Min('configurations__price'),
-        max_price=Max('configurations__price')
-    )
-    bedroom_range = all_shared_properties.aggregate(
-        min_bedrooms=Min('configurations__bedrooms'),
-        max_bedrooms=Max('configurations__bedrooms')
-    )
-    bathroom_range = all_shared_properties.aggregate(
-        min_bathrooms=Min('configurations__bathrooms'),
-        max_bathrooms=Max('configurations__bathrooms')
-    )
+    summary_ranges = get_summary_ranges(all_shared_properties)
+
+    page, next_cursor = paginate_listing(request, properties, ordering)
     
     context = {
-        'properties': properties,
+        'properties': page,
+        'total_count': properties.count(),
+        'next_page_query': next_page_query(request, next_cursor),
         'shared_list': shared_list,
         'is_shared_view': True,
         'search_query': search_query,
@@ -496,12 +382,11 @@ def shared_properties_view(request, token):
             'min_bathrooms': min_bathrooms,
             'max_bathrooms': max_bathrooms,
             'luxury_status': luxury_status,
+            'near_lat': near_lat,
+            'near_lng': near_lng,
+            'radius_km': radius_km,
         },
-        'filter_ranges': {
-            'price_range': price_range,
-            'bedroom_range': bedroom_range,
-            'bathroom_range': bathroom_range,
-        }
+        'filter_ranges': summary_ranges
     }
     
     return render(request, 'shared_properties.html', context)
@@ -587,47 +472,250 @@ def create_employee_view(request):
 
 
 
-def properties_api(request):
-    """API endpoint to get all properties as JSON for the map"""
+def _is_paginated(request):
+    return 'limit' in request.GET or 'cursor' in request.GET
+
+
+def _snapshot_etag(request):
+    # Pages are read from the database, so never load or rebuild the snapshot for them
+    if _is_paginated(request):
+        return None
+    return get_properties_snapshot()['version']
+
+
+def _snapshot_last_modified(request):
+    if _is_paginated(request):
+        return None
+    return get_properties_snapshot()['built_at']
+
+
+def _paginated_properties_response(request, origin):
+    """One keyset page of the properties API, for infinite scrolling clients"""
+    page_size = get_page_size(request.GET.get('limit'))
     properties = Property.objects.filter(is_active=True).prefetch_related(
         'configurations', 'images', 'amenities'
     )
-    print(properties)
-    
-    properties_data = []
-    for prop in properties:
-        images = [request.build_absolute_uri(img.image.url) for img in prop.images.all()]
-        thumbnail = request.build_absolute_uri(prop.thumbnail.url) if prop.thumbnail else None
-        configurations = [
-            {
-                'type': config.type,
-                'bedrooms': config.bedrooms,
-                'bathrooms': config.bathrooms,
-                'square_footage': config.square_footage,
-                'price': f"₦{float(config.price):,.2f}" if config.price is not None else "TBD"
-            }
-            for config in prop.configurations.all()
-        ]
-        amenities = [amenity.name for amenity in prop.amenities.all()]
-        properties_data.append({
+    try:
+        page, next_cursor = keyset_paginate(properties, request.GET.get('cursor'), page_size)
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    next_url = None
+    if next_cursor:
+        next_url = request.build_absolute_uri(f"{request.path}?{next_page_query(request, next_cursor)}")
+    return JsonResponse({
+        'results': [absolutize_property(serialize_property(prop), origin) for prop in page],
+        'next_cursor': next_cursor,
+        'next': next_url,
+    })
+
+
+@require_http_methods(["GET", "HEAD"])
+@condition(etag_func=_snapshot_etag, last_modified_func=_snapshot_last_modified)
+def properties_api(request):
+    """
+    API endpoint to get all properties as JSON for the map
+    Pass ?limit= and/or ?cursor= to page through the catalog instead.
+    """
+    origin = request.build_absolute_uri('/').rstrip('/')
+    if _is_paginated(request):
+        return _paginated_properties_response(request, origin)
+
+    snapshot = get_properties_snapshot()
+    body = get_snapshot_body(snapshot, origin)
+    return HttpResponse(body, content_type='application/json')
+
+
+def _parse_viewport(params):
+    """Parse south/west/north/east/zoom query parameters"""
+    try:
+        south = float(params['south'])
+        west = float(params['west'])
+        north = float(params['north'])
+        east = float(params['east'])
+        zoom = int(params.get('zoom', 12))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('south, west, north, east and zoom must be numbers')
+    if not all(math.isfinite(value) for value in (south, west, north, east)):
+        raise ValueError('south, west, north and east must be finite')
+    if not (-90 <= south <= 90 and -90 <= north <= 90 and -180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError('Latitudes must be within -90..90 and longitudes within -180..180')
+    if south > north or west > east:
+        raise ValueError('Invalid bounding box')
+    return south, west, north, east, zoom
+
+
+def properties_in_bbox(south, west, north, east, queryset=None):
+    """Active properties inside a bounding box, narrowed through the geohash index"""
+    if queryset is None:
+        queryset = Property.objects.filter(is_active=True)
+    queryset = queryset.exclude(geohash='')
+
+    cells = geohash_cover(south, west, north, east)
+    if cells:
+        cell_filter = Q()
+        for cell in cells:
+            cell_filter |= Q(geohash__gte=cell, geohash__lt=cell + '~')
+        queryset = queryset.filter(cell_filter)
+
+    return queryset.filter(
+        latitude__gte=south, latitude__lte=north,
+        longitude__gte=west, longitude__lte=east
+    )
+
+
+def properties_within_radius(latitude, longitude, radius_km, queryset=None):
+    """
+    Return [(property_id, distance_km)] within radius_km, nearest first.
+    The geohash/bbox query narrows candidates; haversine does the exact cut.
+    """
+    south, west, north, east = radius_bbox(latitude, longitude, radius_km)
+    candidates = properties_in_bbox(south, west, north, east, queryset).values_list(
+        'id', 'latitude', 'longitude'
+    )
+    matches = []
+    for prop_id, prop_lat, prop_lng in candidates:
+        distance = haversine_km(latitude, longitude, prop_lat, prop_lng)
+        if distance <= radius_km:
+            matches.append((distance, prop_id))
+    matches.sort()
+    return [(prop_id, distance) for distance, prop_id in matches]
+
+
+def nearest_properties(latitude, longitude, k, queryset=None, max_radius_km=500):
+    """Return the k nearest [(property_id, distance_km)] by widening the search radius"""
+    radius_km = 1.0
+    while True:
+        matches = properties_within_radius(latitude, longitude, radius_km, queryset)
+        if len(matches) >= k or radius_km >= max_radius_km:
+            return matches[:k]
+        radius_km = min(radius_km * 2, max_radius_km)
+
+
+def apply_location_filter(properties, near_lat, near_lng, radius_km):
+    """
+    Restrict a Property queryset to a circle around (near_lat, near_lng)
+    Invalid or incomplete parameters leave the queryset unchanged.
+    """
+    if not (near_lat and near_lng and radius_km):
+        return properties
+    try:
+        near_lat = float(near_lat)
+        near_lng = float(near_lng)
+        radius_km = float(radius_km)
+    except (TypeError, ValueError):
+        return properties
+    matches = properties_within_radius(near_lat, near_lng, radius_km, properties)
+    return properties.filter(id__in=[prop_id for prop_id, _ in matches])
+
+
+@require_http_methods(["GET"])
+def properties_nearby_api(request):
+    """
+    Geospatial search over active properties
+    Query: ?lat=..&lng=..&radius_km=.. (radius), ?lat=..&lng=..&k=.. (nearest)
+    or ?south=..&west=..&north=..&east=.. (bounding box)
+    """
+    params = request.GET
+    try:
+        if 'south' in params:
+            south, west, north, east, _ = _parse_viewport(params)
+            rows = properties_in_bbox(south, west, north, east).values_list('id', flat=True)
+            results = [(prop_id, None) for prop_id in rows]
+        else:
+            latitude = float(params['lat'])
+            longitude = float(params['lng'])
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                raise ValueError('lat/lng out of range')
+            if 'k' in params:
+                k = int(params['k'])
+                if not 1 <= k <= 100:
+                    raise ValueError('k must be between 1 and 100')
+                results = nearest_properties(latitude, longitude, k)
+            else:
+                radius_km = float(params.get('radius_km', 3))
+                if not 0 < radius_km <= 500:
+                    raise ValueError('radius_km must be between 0 and 500')
+                results = properties_within_radius(latitude, longitude, radius_km)
+    except (KeyError, TypeError, ValueError) as e:
+        return JsonResponse({'error': f'Invalid query: {e}'}, status=400)
+
+    properties = Property.objects.in_bulk([prop_id for prop_id, _ in results])
+    data = []
+    for prop_id, distance in results:
+        prop = properties[prop_id]
+        data.append({
             'id': prop.id,
             'name': prop.name,
+            'address': prop.address,
             'latitude': float(prop.latitude),
             'longitude': float(prop.longitude),
-            'address': prop.address,
-            'description': prop.description,
-            'configurations': configurations,
-            'amenities': amenities,
-            'thumbnail': thumbnail,
-            'images': images,
-            'contact': f"{prop.contact_name} - {prop.contact_phone}",
-            'brochure': request.build_absolute_uri(prop.brochure.url) if prop.brochure else "",
-            'luxury_status': prop.get_luxury_status_display(),
-            'completion_date': prop.completion_date
-            
+            'distance_km': round(distance, 3) if distance is not None else None,
         })
-    
-    return JsonResponse(properties_data, safe=False)
+    return JsonResponse({'count': len(data), 'results': data})
+
+
+@require_http_methods(["GET"])
+def properties_map_api(request):
+    """
+    Viewport endpoint for the map: clusters at low zoom, markers at high zoom
+    Query: ?south=..&west=..&north=..&east=..&zoom=.. plus the listing filters
+    (search, luxury_status, min_price, ...). count is the number of matches
+    in the viewport.
+    """
+    try:
+        south, west, north, east, zoom = _parse_viewport(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    map_settings = settings.MAP_SETTINGS
+    properties, _ = apply_listing_filters(Property.objects.filter(is_active=True), listing_filters(request.GET))
+    properties = properties_in_bbox(south, west, north, east, properties)
+
+    if zoom <= map_settings['CLUSTER_MAX_ZOOM']:
+        precision = zoom_to_precision(zoom)
+        cells = properties.annotate(cell=Substr('geohash', 1, precision)).values('cell').annotate(
+            count=Count('id'),
+            avg_latitude=Avg('latitude'),
+            avg_longitude=Avg('longitude'),
+            cluster_min_price=Min('min_price'),
+        ).order_by('cell')
+        clusters = [
+            {
+                'geohash': cell['cell'],
+                'count': cell['count'],
+                'latitude': float(cell['avg_latitude']),
+                'longitude': float(cell['avg_longitude']),
+                'min_price': float(cell['cluster_min_price']) if cell['cluster_min_price'] is not None else None,
+            }
+            for cell in cells
+        ]
+        return JsonResponse({
+            'mode': 'clusters', 'zoom': zoom, 'precision': precision,
+            'count': sum(cluster['count'] for cluster in clusters), 'clusters': clusters,
+        })
+
+    limit = map_settings['MARKER_LIMIT']
+    rows = list(properties.order_by('geohash').values(
+        'id', 'name', 'latitude', 'longitude', 'luxury_status', 'thumbnail', 'min_price'
+    )[:limit + 1])
+    markers = [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'latitude': float(row['latitude']),
+            'longitude': float(row['longitude']),
+            'luxury_status': row['luxury_status'],
+            'thumbnail': request.build_absolute_uri(default_storage.url(row['thumbnail'])) if row['thumbnail'] else None,
+            'min_price': float(row['min_price']) if row['min_price'] is not None else None,
+        }
+        for row in rows[:limit]
+    ]
+    count = len(rows) if len(rows) <= limit else properties.count()
+    return JsonResponse({
+        'mode': 'markers', 'zoom': zoom, 'count': count, 'markers': markers, 'truncated': len(rows) > limit,
+    })
+
 
 def property_detail_api(request, property_id):
     """API endpoint to get a single property's details as JSON"""
@@ -671,6 +759,15 @@ def property_detail_api(request, property_id):
 
 
 
+def paginate_listing(request, properties, ordering=DEFAULT_ORDERING):
+    """Keyset page of a listing queryset; a bad cursor restarts from the top"""
+    page_size = get_page_size(request.GET.get('page_size'))
+    try:
+        return keyset_paginate(properties, request.GET.get('cursor'), page_size, ordering)
+    except InvalidCursor:
+        return keyset_paginate(properties, None, page_size, ordering)
+
+
 def landing_view(request):
     """Display and filter properties"""
     # Check if user is employee
@@ -685,87 +782,11 @@ def landing_view(request):
             pass
     properties = Property.objects.filter(is_active=True)
     
-    # Initialize filters
-    filters = {
-        'search': request.GET.get('search', '').strip(),
-        'luxury_status': request.GET.get('luxury_status', ''),
-        'min_price': request.GET.get('min_price', ''),
-        'max_price': request.GET.get('max_price', ''),
-        'min_bedrooms': request.GET.get('min_bedrooms', ''),
-        'max_bedrooms': request.GET.get('max_bedrooms', ''),
-        'min_bathrooms': request.GET.get('min_bathrooms', ''),
-        'max_bathrooms': request.GET.get('max_bathrooms', ''),
-        'completion_date': request.GET.get('completion_date', '')
-    }
-
-    # Apply filters
-    if filters['search']:
-        properties =properties.filter(
-            Q(name__icontains=filters['search']) |
-            Q(address__icontains=filters['search']) |
-            Q(description__icontains=filters['search'])
-        )
-    
-    if filters['luxury_status']:
-        properties = properties.filter(luxury_status=filters['luxury_status'])
-    
-    # Filter by configuration fields (price, bedrooms, bathrooms)
-    if filters['min_price']:
-        try:
-            min_price = float(filters['min_price'])
-            properties = properties.filter(configurations__price__gte=min_price, configurations__is_available=True)
-        except ValueError:
-            pass
-    
-    if filters['max_price']:
-        try:
-            max_price = float(filters['max_price'])
-            properties = properties.filter(configurations__price__lte=max_price, configurations__is_available=True)
-        except ValueError:
-            pass
-    
-    if filters['min_bedrooms']:
-        try:
-            min_bedrooms = int(filters['min_bedrooms'])
-            properties = properties.filter(configurations__bedrooms__gte=min_bedrooms, configurations__is_available=True)
-        except ValueError:
-            pass
-    
-    if filters['max_bedrooms']:
-        try:
-            max_bedrooms = int(filters['max_bedrooms'])
-            properties = properties.filter(configurations__bedrooms__lte=max_bedrooms, configurations__is_available=True)
-        except ValueError:
-            pass
-    
-    if filters['min_bathrooms']:
-        try:
-            min_bathrooms = int(filters['min_bathrooms'])
-            properties = properties.filter(configurations__bathrooms__gte=min_bathrooms, configurations__is_available=True)
-        except ValueError:
-            pass
-    
-    if filters['max_bathrooms']:
-        try:
-            max_bathrooms = int(filters['max_bathrooms'])
-            properties = properties.filter(configurations__bathrooms__lte=max_bathrooms, configurations__is_available=True)
-        except ValueError:
-            pass
-    
-    # Filter by completion date
-    if filters['completion_date']:
-        try:
-            completion_date = datetime.strptime(filters['completion_date'], '%Y-%m-%d').date()
-            properties = properties.filter(completion_date__lte=completion_date)
-        except ValueError:
-            pass
-    
-
-    # Ensure distinct results when filtering configurations
-    properties = properties.distinct()
+    filters = listing_filters(request.GET)
+    properties, ordering = apply_listing_filters(properties, filters)
 
     # Get filter ranges for form inputs
-    all_configs = PropertyConfiguration.objects.filter(is_available=True, property__is_active=True)
+    all_properties = Property.objects.filter(is_active=True)
     
     # If not employee, only show properties that are in active shared lists or all if no shared lists exist
     if not is_employee:
@@ -774,13 +795,14 @@ def landing_view(request):
     
     filter_ranges = {
         'luxury_choices': Property.luxury_status.field.choices,
-        'price_range': all_configs.aggregate(min_price=Min('price'), max_price=Max('price')),
-        'bedroom_range': all_configs.aggregate(min_bedrooms=Min('bedrooms'), max_bedrooms=Max('bedrooms')),
-        'bathroom_range': all_configs.aggregate(min_bathrooms=Min('bathrooms'), max_bathrooms=Max('bathrooms')),
+        **get_summary_ranges(all_properties),
         
     }
+    page, next_cursor = paginate_listing(request, with_card_data(properties), ordering)
     context = {
-        'properties': properties,
+        'properties': page,
+        'total_count': properties.count(),
+        'next_page_query': next_page_query(request, next_cursor),
         'filters': filters,
         'filter_ranges': filter_ranges,
         'is_employee': is_employee,
@@ -790,336 +812,92 @@ def landing_view(request):
     return render(request, 'landing.html', context)
 
 
-class PropertyPDFGenerator:
-    """Utility class for generating property PDFs with professional styling"""
-    
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._setup_custom_styles()
-    
-    def _setup_custom_styles(self):
-        """Setup custom paragraph styles"""
-        self.styles.add(ParagraphStyle(
-            name='PropertyTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            spaceAfter=20,
-            textColor=colors.HexColor('#1f2937'),
-            alignment=TA_CENTER
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            spaceBefore=20,
-            spaceAfter=12,
-            textColor=colors.HexColor('#374151'),
-            borderWidth=1,
-            borderColor=colors.HexColor('#e5e7eb'),
-            borderPadding=8,
-            backColor=colors.HexColor('#f9fafb')
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='PropertyInfo',
-            parent=self.styles['Normal'],
-            fontSize=11,
-            spaceAfter=6,
-            textColor=colors.HexColor('#4b5563')
-        ))
-    
-    def _download_and_process_image(self, image_url, max_width=400, max_height=300):
-        """Download and process image for PDF inclusion"""
-        try:
-            if image_url.startswith('/'):
-                # Local file
-                image_path = os.path.join(settings.MEDIA_ROOT, image_url.lstrip('/'))
-                if os.path.exists(image_path):
-                    img = PILImage.open(image_path)
-                else:
-                    return None
-            else:
-                # Remote URL
-                response = requests.get(image_url, timeout=10)
-                response.raise_for_status()
-                img = PILImage.open(BytesIO(response.content))
-            
-            # Resize image maintaining aspect ratio
-            img.thumbnail((max_width, max_height), PILImage.Resampling.LANCZOS)
-            
-            # Save to temporary buffer
-            buffer = BytesIO()
-            img.save(buffer, format='JPEG', quality=85)
-            buffer.seek(0)
-            
-            return Image(buffer, width=img.width, height=img.height)
-        except Exception as e:
-            print(f"Error processing image {image_url}: {e}")
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def _byte_range(header, size):
+    """
+    (start, end) of a single "bytes=" range, None to send the whole file
+    (no range, several ranges or a malformed one), False if unsatisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
             return None
-    
-    def generate_property_pdf(self, property_obj, request):
-        """Generate PDF for a single property"""
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=inch,
-            leftMargin=inch,
-            topMargin=inch,
-            bottomMargin=inch
-        )
-        
-        story = []
-        
-        # Header with company info
-        story.append(Paragraph("Real Estate Properties", self.styles['PropertyTitle']))
-        story.append(Spacer(1, 0.2*inch))
-        
-        # Property name and luxury status
-        title_text = property_obj.name
-        if property_obj.luxury_status == 'luxurious':
-            title_text += " ★ LUXURY PROPERTY"
-        story.append(Paragraph(title_text, self.styles['Heading1']))
-        story.append(Spacer(1, 0.2*inch))
-        
-        # Property images
-        if property_obj.images.exists():
-            story.append(Paragraph("Property Images", self.styles['SectionHeader']))
-            
-            # Add main image
-            main_image = property_obj.get_primary_image()
-            if main_image:
-                image_url = request.build_absolute_uri(main_image.image.url)
-                img = self._download_and_process_image(image_url)
-                if img:
-                    story.append(img)
-                    story.append(Spacer(1, 0.1*inch))
-        
-        # Basic information table
-        story.append(Paragraph("Property Information", self.styles['SectionHeader']))
-        
-        basic_info = [
-            ['Property Name:', property_obj.name],
-            ['Address:', property_obj.address],
-            ['Luxury Status:', 'Luxurious' if property_obj.luxury_status == 'luxurious' else 'Standard'],
-            ['Contact:', property_obj.contact_name or 'Available on request'],
-            ['Phone:', property_obj.contact_phone or 'Available on request'],
-        ]
-        
-        basic_table = Table(basic_info, colWidths=[2*inch, 4*inch])
-        basic_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
-        story.append(basic_table)
-        story.append(Spacer(1, 0.2*inch))
-        
-        # Description
-        if property_obj.description:
-            story.append(Paragraph("Description", self.styles['SectionHeader']))
-            story.append(Paragraph(property_obj.description, self.styles['PropertyInfo']))
-            story.append(Spacer(1, 0.2*inch))
-        
-        # Configurations
-        if property_obj.configurations.exists():
-            story.append(Paragraph("Available Configurations", self.styles['SectionHeader']))
-            
-            config_data = [['Type', 'Bedrooms', 'Bathrooms', 'Sq. Ft.', 'Price', 'Available']]
-            
-            for config in property_obj.configurations.all():
-                price_str = f"₦{config.price:,.0f}" if config.price else "On Request"
-                availability = "Yes" if config.is_available else "No"
-                
-                config_data.append([
-                    config.type,
-                    str(config.bedrooms),
-                    str(config.bathrooms),
-                    f"{config.square_footage:,}",
-                    price_str,
-                    availability
-                ])
-            
-            config_table = Table(config_data, colWidths=[1.2*inch, 0.8*inch, 0.8*inch, 0.8*inch, 1.2*inch, 0.8*inch])
-            config_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#374151')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ]))
-            story.append(config_table)
-            story.append(Spacer(1, 0.2*inch))
-        
-        # Amenities
-        if property_obj.amenities.exists():
-            story.append(Paragraph("Amenities & Features", self.styles['SectionHeader']))
-            
-            amenities_text = ", ".join([amenity.name for amenity in property_obj.amenities.all()])
-            story.append(Paragraph(amenities_text, self.styles['PropertyInfo']))
-            story.append(Spacer(1, 0.2*inch))
-        
-        # Footer
-        story.append(Spacer(1, 0.5*inch))
-        story.append(Paragraph("Contact us for more information or to schedule a viewing.", 
-                              self.styles['PropertyInfo']))
-        
-        # Generate PDF
-        doc.build(story)
-        pdf = buffer.getvalue()
-        buffer.close()
-        
-        return pdf
-    
-    def generate_comparison_pdf(self, properties, request):
-        """Generate PDF comparing multiple properties"""
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=0.5*inch,
-            leftMargin=0.5*inch,
-            topMargin=inch,
-            bottomMargin=inch
-        )
-        
-        story = []
-        
-        # Header
-        story.append(Paragraph("Property Comparison Report", self.styles['PropertyTitle']))
-        story.append(Spacer(1, 0.3*inch))
-        
-        # Summary table
-        story.append(Paragraph("Properties Overview", self.styles['SectionHeader']))
-        
-        # Basic comparison table
-        headers = ['Property', 'Address', 'Luxury', 'Min Price', 'Max Bedrooms']
-        comparison_data = [headers]
-        
-        for prop in properties:
-            min_price = prop.get_min_price()
-            price_str = f"₦{min_price:,.0f}" if min_price else "On Request"
-            
-            comparison_data.append([
-                prop.name[:25] + ('...' if len(prop.name) > 25 else ''),
-                prop.address[:30] + ('...' if len(prop.address) > 30 else ''),
-                '★ Luxury' if prop.luxury_status == 'luxurious' else 'Standard',
-                price_str,
-                str(prop.get_max_bedrooms())
-            ])
-        
-        comparison_table = Table(comparison_data, colWidths=[1.5*inch, 2*inch, 1*inch, 1.2*inch, 1*inch])
-        comparison_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#374151')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
-            ('LEFTPADDING', (0, 0), (-1, -1), 6),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
-        story.append(comparison_table)
-        story.append(PageBreak())
-        
-        # Detailed comparison for each property
-        for i, prop in enumerate(properties):
-            story.append(Paragraph(f"{i+1}. {prop.name}", self.styles['Heading2']))
-            story.append(Spacer(1, 0.1*inch))
-            
-            # Property details
-            details = [
-                ['Address:', prop.address],
-                ['Description:', prop.description[:200] + ('...' if len(prop.description) > 200 else '') if prop.description else 'Not provided'],
-                ['Contact:', f"{prop.contact_name} - {prop.contact_phone}" if prop.contact_name and prop.contact_phone else 'Available on request'],
-            ]
-            
-            details_table = Table(details, colWidths=[1.5*inch, 5*inch])
-            details_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
-                ('LEFTPADDING', (0, 0), (-1, -1), 6),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ]))
-            story.append(details_table)
-            story.append(Spacer(1, 0.15*inch))
-            
-            # Configurations
-            if prop.configurations.exists():
-                config_headers = ['Type', 'Bed', 'Bath', 'Sq.Ft', 'Price']
-                config_data = [config_headers]
-                
-                for config in prop.configurations.all()[:5]:  # Limit to 5 configs
-                    price_str = f"₦{config.price:,.0f}" if config.price else "On Request"
-                    config_data.append([
-                        config.type,
-                        str(config.bedrooms),
-                        str(config.bathrooms),
-                        f"{config.square_footage:,}",
-                        price_str
-                    ])
-                
-                config_table = Table(config_data, colWidths=[1.3*inch, 0.6*inch, 0.6*inch, 0.8*inch, 1.2*inch])
-                config_table.setStyle(TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4b5563')),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                    ('FONTSIZE', (0, 0), (-1, -1), 8),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb')),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                    ('TOPPADDING', (0, 0), (-1, -1), 6),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ]))
-                story.append(config_table)
-            
-            # Amenities
-            if prop.amenities.exists():
-                story.append(Spacer(1, 0.1*inch))
-                amenities = ", ".join([a.name for a in prop.amenities.all()[:10]])  # Limit amenities
-                if prop.amenities.count() > 10:
-                    amenities += f" and {prop.amenities.count() - 10} more..."
-                story.append(Paragraph(f"<b>Amenities:</b> {amenities}", self.styles['PropertyInfo']))
-            
-            if i < len(properties) - 1:  # Don't add page break after last property
-                story.append(PageBreak())
-        
-        doc.build(story)
-        pdf = buffer.getvalue()
-        buffer.close()
-        
-        return pdf
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        if int(last) == 0:
+            return False
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size:
+        return False
+    return start, end
+
+
+def _read_range(f, length):
+    with f:
+        while length > 0:
+            chunk = f.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def file_response(request, path, filename, content_type, etag=None):
+    """
+    Stream a file from disk as an attachment with Content-Length. A single
+    Range request is answered with 206 so interrupted downloads can resume;
+    If-Range must match etag, otherwise the whole file is sent.
+    """
+    size = os.path.getsize(path)
+    byte_range = None
+    if 'HTTP_RANGE' in request.META and request.META.get('HTTP_IF_RANGE', etag) == etag:
+        byte_range = _byte_range(request.META['HTTP_RANGE'], size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    f = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(f, as_attachment=True, filename=filename, content_type=content_type)
+    else:
+        start, end = byte_range
+        f.seek(start)
+        response = StreamingHttpResponse(_read_range(f, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def pdf_response(request, kind, property_ids, filename, render):
+    """
+    Serve the cached PDF of property_ids for the current data version,
+    rendering it first if needed. Answers 304 when the client's copy
+    (If-None-Match / If-Modified-Since) is still current.
+    """
+    version, last_modified = pdf_data_version(property_ids)
+    etag = quote_etag(version)
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        path = cached_pdf(kind, property_ids, version, render)
+        response = file_response(request, path, filename, 'application/pdf', etag=etag)
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    # Access depends on the user's shared lists
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @login_required
@@ -1140,16 +918,10 @@ def download_property_pdf(request, property_id):
         if not shared_lists.exists():
             return JsonResponse({'error': 'Access denied'}, status=403)
     
-    # Generate PDF
-    generator = PropertyPDFGenerator()
-    pdf_content = generator.generate_property_pdf(property_obj, request)
-    
-    # Create response
-    response = HttpResponse(pdf_content, content_type='application/pdf')
-    filename = f"{property_obj.slug}-details.pdf"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
+    return pdf_response(
+        request, 'property', [property_obj.pk], f"{property_obj.slug}-details.pdf",
+        lambda f: PropertyPDFGenerator().generate_property_pdf(property_obj, request, output=f),
+    )
 
 
 @login_required
@@ -1202,12 +974,12 @@ def compare_properties(request):
                 'luxury_status': prop.luxury_status,
                 'contact_name': prop.contact_name,
                 'contact_phone': prop.contact_phone,
-                'min_price': float(prop.get_min_price()) if prop.get_min_price() else None,
+                'min_price': float(prop.min_price) if prop.min_price is not None else None,
                 'max_bedrooms': prop.get_max_bedrooms(),
                 'configurations': configs,
                 'amenities': amenities,
                 'images': [request.build_absolute_uri(img['image']) for img in images] if images else [],
-                'primary_image': request.build_absolute_uri(prop.get_primary_image().image.url) if prop.get_primary_image() else None
+                'primary_image': request.build_absolute_uri(prop.primary_image_url) if prop.primary_image else None
             })
         
         return JsonResponse({
@@ -1248,16 +1020,11 @@ def download_comparison_pdf(request, property_ids):
         if not properties.exists():
             return JsonResponse({'error': 'No accessible properties found'}, status=404)
         
-        # Generate comparison PDF
-        generator = PropertyPDFGenerator()
-        pdf_content = generator.generate_comparison_pdf(properties, request)
-        
-        # Create response
-        response = HttpResponse(pdf_content, content_type='application/pdf')
-        filename = f"property-comparison-{len(properties)}-properties.pdf"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
+        return pdf_response(
+            request, 'comparison', [prop.pk for prop in properties],
+            f"property-comparison-{len(properties)}-properties.pdf",
+            lambda f: PropertyPDFGenerator().generate_comparison_pdf(properties, request, output=f),
+        )
     
     except ValueError:
         return JsonResponse({'error': 'Invalid property IDs'}, status=400)
@@ -1265,78 +1032,166 @@ def download_comparison_pdf(request, property_ids):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+def _export_properties(request, data):
+    """
+    Properties selected by a PDF export request: a shared list, explicit
+    property_ids, or landing-page filters. Returns (queryset, shared_list)
+    or a JsonResponse describing why the selection is not allowed.
+    """
+    is_employee = request.user.profile.is_employee
+    properties = Property.objects.filter(is_active=True)
+    if data.get('shared_list_id'):
+        shared_list = SharedPropertyList.objects.filter(pk=data['shared_list_id']).first()
+        if shared_list is None or not (is_employee or shared_list.created_by_id == request.user.pk):
+            return JsonResponse({'error': 'Shared list not found'}, status=404)
+        return shared_list.properties.filter(is_active=True), shared_list
 
+    if data.get('property_ids'):
+        properties = properties.filter(id__in=[int(pk) for pk in data['property_ids']])
+    elif isinstance(data.get('filters'), dict) and is_employee:
+        filters = {key: str(value).strip() for key, value in data['filters'].items()}
+        if filters.get('search'):
+            properties, _ = search_properties(properties, filters['search'])
+        if filters.get('luxury_status'):
+            properties = properties.filter(luxury_status=filters['luxury_status'])
+        properties = apply_summary_filters(properties, filters)
+    else:
+        return JsonResponse({'error': 'Select a shared list, property_ids or filters'}, status=400)
 
+    if not is_employee:
+        shared_lists = SharedPropertyList.objects.filter(
+            created_by=request.user,
+            is_active=True,
+            expires_at__gt=timezone.now()
+        )
+        properties = properties.filter(shared_lists__in=shared_lists).distinct()
+    return properties, None
 
 
-def get_airtable_data():
+@login_required
+@require_http_methods(["POST"])
+def create_pdf_export(request):
     """
-    Get Airtable data from cache, refresh if not available
+    Queue a batch export of property PDFs as a ZIP (format=zip) or a single
+    merged PDF (format=pdf). Poll status_url for progress and the download link.
     """
-    data = cache.get('airtable_data')
-    if data: 
-        print('there is data in the cache')
-    if not data:
-        print('here')
-        try:
-            # Try to refresh the cache by running the management command
-            logger.info("Airtable cache empty, refreshing...")
-            result = call_command('sync_airtable', return_data=True)
-            print('the result is ', result['properties'])
-            if result:
-                data = result
-                cache.set('airtable_data', data, timeout=3600)
-            else:
-                # Return empty structure if command fails
-                data = {
-                    'properties': [],
-                    'configurations': [],
-                    'images': [],
-                    'amenities': []
-                }
-        except Exception as e:
-            logger.error(f"Failed to refresh Airtable data: {e}")
-            data = {
-                'properties': [],
-                'configurations': [],
-                'images': [],
-                'amenities': []
-            }
-    return data
+    try:
+        data = json.loads(request.body)
+        export_format = data.get('format', 'zip')
+        if export_format not in dict(PropertyPDFExport.FORMAT_CHOICES):
+            return JsonResponse({'error': 'format must be zip or pdf'}, status=400)
+
+        selection = _export_properties(request, data)
+        if isinstance(selection, JsonResponse):
+            return selection
+        properties, shared_list = selection
+
+        property_ids = list(properties.order_by('name', 'id').values_list('id', flat=True))
+        if not property_ids:
+            return JsonResponse({'error': 'No accessible properties found'}, status=404)
+        max_properties = pdf_settings()['EXPORT_MAX_PROPERTIES']
+        if len(property_ids) > max_properties:
+            return JsonResponse({'error': f'Maximum {max_properties} properties can be exported at once'}, status=400)
+
+        export = PropertyPDFExport.objects.create(
+            created_by=request.user, shared_list=shared_list, property_ids=property_ids,
+            format=export_format, total=len(property_ids),
+        )
+        export.job, _ = enqueue('export_pdfs', created_by=request.user, export_id=export.pk)
+        export.save(update_fields=['job'])
+        return JsonResponse({
+            'export_id': export.pk,
+            'job_id': export.job.pk,
+            'status_url': reverse('pdf_export_status', kwargs={'export_id': export.pk}),
+        }, status=202)
+
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid property IDs'}, status=400)
+
+
+def _get_export(request, export_id):
+    export = get_object_or_404(PropertyPDFExport.objects.select_related('job'), pk=export_id)
+    if export.created_by_id != request.user.pk and not request.user.profile.is_employee:
+        raise Http404("No such export")
+    return export
+
+
+@login_required
+@require_http_methods(["GET"])
+def pdf_export_status(request, export_id):
+    """Progress of a batch PDF export and, once finished, its download link"""
+    export = _get_export(request, export_id)
+    status = export.status
+    return JsonResponse({
+        'id': export.pk,
+        'status': status,
+        'format': export.format,
+        'total': export.total,
+        'rendered': export.rendered,
+        'error': export.job.error_summary() if export.job else None,
+        'download_url': reverse('download_pdf_export', kwargs={'export_id': export.pk})
+        if status == 'completed' else None,
+        'file_size': export.file_size,
+    })
+
+
+@login_required
+@require_http_methods(["GET"])
+def download_pdf_export(request, export_id):
+    """Stream a finished batch PDF export"""
+    export = _get_export(request, export_id)
+    if export.status == 'expired':
+        return JsonResponse({'error': 'Export has expired'}, status=410)
+    if export.status != 'completed' or not os.path.exists(export.file_path):
+        return JsonResponse({'error': 'Export is not ready'}, status=404)
+    content_type = 'application/zip' if export.format == 'zip' else 'application/pdf'
+    etag = quote_etag(f"export-{export.pk}-{export.file_size}")
+    response = file_response(request, export.file_path, export.download_name, content_type, etag=etag)
+    response['ETag'] = etag
+    return response
+
+
+
+
+
 
-def enrich_properties_with_related_data(properties, configurations, images, amenities):
+def enrich_properties_with_related_data(properties, configurations=(), images=(), amenities=(), by_property=None):
     """
-    Enrich property data with related configurations, images, and amenities
+    Enrich property data with related configurations, images, and amenities.
+    Pass by_property from the cached airtable_data to skip the grouping pass.
     """
+    if by_property is None:
+        by_property = group_by_property(configurations, images, amenities)
     enriched_properties = []
     
     for prop in properties:
         if not prop.get('is_active', True):
             continue
             
-        prop_id = prop['airtable_id']
-        
-        # Add related configurations
-        prop_configs = [config for config in configurations if config['property_id'] == prop_id]
-        prop['configurations'] = prop_configs
-        
-        # Add related images
-        prop_images = [img for img in images if img['property_id'] == prop_id]
-        # Sort images by order
-        prop_images.sort(key=lambda x: x.get('order', 0))
-        prop['images'] = prop_images
-        
-        # Add related amenities
-        prop_amenities = [amenity for amenity in amenities if amenity['property_id'] == prop_id]
-        prop['amenities'] = prop_amenities
+        related = by_property.get(prop['airtable_id']) or no_related()
+        prop['configurations'] = related['configurations']
+        prop['images'] = related['images']
+        prop['amenities'] = related['amenities']
         
         # Add helper methods similar to Django model methods
-        prop['get_min_price'] = get_property_min_price(prop_configs)
+        prop['get_min_price'] = related['min_price']
         
         enriched_properties.append(prop)
     
     return enriched_properties
 
+def airtable_data_response(airtable_data, data):
+    """
+    JSON response for the airtable_*_api views. X-Airtable-Data-Schema tells
+    clients whether image URLs are Airtable attachments (1) or synced copies
+    served by this site (2), see snapshots.AIRTABLE_DATA_SCHEMA.
+    """
+    response = JsonResponse(data, safe=False)  # safe=False to allow list serialization
+    response['X-Airtable-Data-Schema'] = str(airtable_data.get('schema', AIRTABLE_RECORDS_SCHEMA))
+    return response
+
 @login_required
 @require_http_methods(["GET"])
 def airtable_property_detail_api(request, property_id):
@@ -1345,31 +1200,19 @@ def airtable_property_detail_api(request, property_id):
     """
     try:
         # Get Airtable data from cache
-        airtable_data = get_airtable_data()  # Reuse the function from landing_view
-        print("airtable_data is22 ", airtable_data)
+        airtable_data = get_airtable_data()
         
         # Find the property by airtable_id
-        property_data = None
-        for prop in airtable_data.get('properties', []):
-            if prop.get('airtable_id') == property_id:
-                property_data = prop
-                break
+        property_data = airtable_data['property_index'].get(property_id)
         
         if not property_data:
             return JsonResponse({'error': 'Property not found'}, status=404)
         
-        # Get related data
-        configurations = airtable_data.get('configurations', [])
-        images = airtable_data.get('images', [])
-        amenities = airtable_data.get('amenities', [])
-        
-        # Filter related data for this property
-        prop_configs = [config for config in configurations if config['property_id'] == property_id]
-        prop_images = [img for img in images if img['property_id'] == property_id]
-        prop_amenities = [amenity for amenity in amenities if amenity['property_id'] == property_id]
-        
-        # Sort images by order
-        prop_images.sort(key=lambda x: x.get('order', 0))
+        # Related data, already grouped and with images sorted by order
+        related = airtable_data['by_property'].get(property_id) or no_related()
+        prop_configs = related['configurations']
+        prop_images = related['images']
+        prop_amenities = related['amenities']
         
         # Format the response data
         response_data = {
@@ -1381,7 +1224,7 @@ def airtable_property_detail_api(request, property_id):
             "latitude": property_data.get('latitude'),
             "longitude": property_data.get('longitude'),
             'contact': f"{property_data.get('contact_name', '')} - {property_data.get('contact_phone', '')}".strip(' - '),
-            'images': [img.get('image_url') for img in prop_images if img.get('image_url')],
+            'images': [request.build_absolute_uri(img['image_url']) for img in prop_images if img.get('image_url')],
             'configurations': [],
             'amenities': [amenity.get('name') for amenity in prop_amenities if amenity.get('name')]
             
@@ -1417,7 +1260,7 @@ def airtable_property_detail_api(request, property_id):
                 
                 response_data['configurations'].append(formatted_config)
         
-        return JsonResponse(response_data)
+        return airtable_data_response(airtable_data, response_data)
         
     except Exception as e:
         logger.error(f"Error in airtable_property_detail_api: {e}")
@@ -1427,29 +1270,29 @@ def airtable_property_detail_api(request, property_id):
 @require_http_methods(["GET"])
 def airtable_all_properties_api(request):
     """
-    API endpoint to get detailed information for all properties from Airtable cache
+    API endpoint to get detailed information for all properties from Airtable cache.
+    Accepts the same search/price/bedroom/bathroom query parameters as the listing.
     """
     try:
         # Get Airtable data from cache
-        airtable_data = get_airtable_data()  # Assuming get_airtable_data() is replaced with direct cache access
+        airtable_data = get_airtable_data()
         
         # Extract data
         properties = airtable_data.get('properties', [])
-        configurations = airtable_data.get('configurations', [])
-        images = airtable_data.get('images', [])
-        amenities = airtable_data.get('amenities', [])
+        by_property = airtable_data['by_property']
+        filters = {key: request.GET.get(key) for key in AIRTABLE_FILTER_PARAMS}
+        if any(filters.values()):
+            properties = get_filter_index(airtable_data).filter(**filters)
         
         # Format response data for all properties
         response_data = []
         
         for property_data in properties:
-            # Filter related data for this property
-            prop_configs = [config for config in configurations if config['property_id'] == property_data['airtable_id']]
-            prop_images = [img for img in images if img['property_id'] == property_data['airtable_id']]
-            prop_amenities = [amenity for amenity in amenities if amenity['property_id'] == property_data['airtable_id']]
-            
-            # Sort images by order
-            prop_images.sort(key=lambda x: x.get('order', 0))
+            # Related data, already grouped and with images sorted by order
+            related = by_property.get(property_data['airtable_id']) or no_related()
+            prop_configs = related['configurations']
+            prop_images = related['images']
+            prop_amenities = related['amenities']
             
             # Format property details
             property_response = {
@@ -1461,7 +1304,7 @@ def airtable_all_properties_api(request):
                 "longitude": property_data.get('longitude'),
                 'luxury_status': property_data.get('luxury_status'),
                 'contact': f"{property_data.get('contact_name', '')} - {property_data.get('contact_phone', '')}".strip(' - '),
-                'images': [img.get('image_url') for img in prop_images if img.get('image_url')],
+                'images': [request.build_absolute_uri(img['image_url']) for img in prop_images if img.get('image_url')],
                 'configurations': [],
                 'amenities': [amenity.get('name') for amenity in prop_amenities if amenity.get('name')]
             }
@@ -1498,7 +1341,7 @@ def airtable_all_properties_api(request):
             
             response_data.append(property_response)
         
-        return JsonResponse(response_data, safe=False)  # safe=False to allow list serialization
+        return airtable_data_response(airtable_data, response_data)
         
     except Exception as e:
         logger.error(f"Error in airtable_all_properties_api: {e}")
@@ -132,6 +132,13 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Runtime artifacts (API snapshots etc.) that are rebuilt from the database
+VAR_DIR = os.path.join(BASE_DIR, 'var')
+SNAPSHOT_ROOT = os.path.join(VAR_DIR, 'snapshots')
+CACHE_ROOT = os.path.join(VAR_DIR, 'cache')
+PERSISTENT_CACHE_ROOT = os.path.join(VAR_DIR, 'persistent_cache')
+LOCK_ROOT = os.path.join(VAR_DIR, 'locks')
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
@@ -142,18 +149,106 @@ LOGIN_REDIRECT_URL = 'landing'
 LOGOUT_REDIRECT_URL = 'landing'
 LOGIN_URL = 'login'
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'airtable-cache',
+# The cache holds sync results and API snapshots that every worker process
+# must see, so it cannot be per-process. Files under var/ need no extra
+# service; set REDIS_URL to share it across hosts. CACHE_BACKEND=locmem gives
+# each process its own memory cache (the test runner always uses it).
+#
+# 'persistent' holds the few long-lived entries (API snapshots, airtable_data,
+# the search vocabulary). It is kept apart from 'default' so culling there
+# never evicts them; its MAX_ENTRIES is far above the handful of keys it holds.
+REDIS_URL = config('REDIS_URL', default='')
+CACHE_BACKEND = config('CACHE_BACKEND', default='redis' if REDIS_URL else 'file')
+if CACHE_BACKEND == 'locmem':
+    CACHES = {
+        alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': alias}
+        for alias in ('default', 'persistent')
+    }
+elif CACHE_BACKEND == 'redis':
+    # Run Redis with a noeviction or volatile-* maxmemory policy so entries
+    # stored without a timeout are never evicted
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'realestate',
+        },
+        'persistent': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'realestate:persistent',
+        },
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_ROOT,
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        },
+        'persistent': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': PERSISTENT_CACHE_ROOT,
+            'OPTIONS': {'MAX_ENTRIES': 100_000},
+        },
+    }
+TEST_RUNNER = 'realestate.test_runner.TestRunner'
+
+# The airtable_data cache entry is served as-is for SOFT_TTL seconds, then
+# served stale while one background refresh runs, and dropped after HARD_TTL
+AIRTABLE_CACHE_SETTINGS = {
+    'SOFT_TTL': 15 * 60,
+    'HARD_TTL': 24 * 60 * 60,
+    'LOCK_TIMEOUT': 30,  # seconds a request waits for another worker's refresh
 }
+
 # PDF Generation Settings
 PDF_SETTINGS = {
     'MAX_IMAGE_WIDTH': 400,
     'MAX_IMAGE_HEIGHT': 300,
     'IMAGE_QUALITY': 85,
     'REQUEST_TIMEOUT': 10,  # seconds for downloading remote images
+    'IMAGE_CACHE_ROOT': os.path.join(VAR_DIR, 'pdf_images'),  # resized JPEGs, shared by workers
+    'MEMORY_CACHE_SIZE': 64,  # resized JPEGs kept in each process
+    'FETCH_WORKERS': 4,  # concurrent image reads for comparison PDFs
+    'ARTIFACT_ROOT': os.path.join(VAR_DIR, 'pdfs'),  # rendered PDFs, keyed by data version
+    'EXPORT_ROOT': os.path.join(VAR_DIR, 'exports'),  # finished batch exports (ZIP / merged PDF)
+    'EXPORT_WORKERS': min(os.cpu_count() or 1, 4),  # processes rendering a batch export
+    'EXPORT_MAX_PROPERTIES': 500,
+    'EXPORT_MAX_AGE': 7 * 24 * 60 * 60,  # seconds a finished export stays downloadable
+    'SPOOL_MAX_SIZE': 1024 * 1024,  # bytes of a remote image kept in memory before spooling to disk
+}
+
+# Media downloads during Airtable sync
+DOWNLOAD_SETTINGS = {
+    'MAX_WORKERS': 8,
+    'PER_HOST_LIMIT': 4,  # concurrent connections to any single host
+    'RETRIES': 3,
+    'BACKOFF_FACTOR': 0.5,  # seconds, doubled on each retry
+    'REQUEST_TIMEOUT': 30,
+    'PROGRESS_EVERY': 25,  # files between progress lines
+    'MAX_IN_FLIGHT': 16,  # downloads pending or awaiting the consumer (default 2 x MAX_WORKERS)
+}
+
+# run_jobs worker. A running job records a heartbeat every HEARTBEAT_INTERVAL
+# seconds; one silent for STALE_AFTER seconds is assumed lost (worker killed)
+# and marked failed so its dedupe_key can be queued again
+JOB_SETTINGS = {
+    'HEARTBEAT_INTERVAL': 60,
+    'STALE_AFTER': 10 * 60,
+}
+
+# Responsive renditions generated for property images and thumbnails
+IMAGE_RENDITIONS = {
+    'WIDTHS': [320, 640, 1024],
+    'FORMATS': ['avif', 'webp'],  # formats Pillow cannot encode are skipped (AVIF needs Pillow 11.2+ with libavif)
+    'QUALITY': 75,
+}
+
+# Map endpoint settings
+MAP_SETTINGS = {
+    'CLUSTER_MAX_ZOOM': 14,  # zoom levels up to this return clusters instead of markers
+    'MARKER_LIMIT': 500,  # maximum individual markers returned for one viewport
 }
 
 # Security settings for file downloads